@@ -1,8 +1,18 @@
 import os
+from dotenv import load_dotenv
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
+from .cache import ai_cache, text_cache
+from .pdf_worker import pdf_pool
+from .docx_export import docx_exporter
+from .designer import design_renderer
+from .uploads import UploadRequest
+from .sessions import ServerSideSessionInterface, create_session_backend
+from .database import build_engine_options, configure_engine
+from .metrics import metrics, registry, stats_collector
+from .scheduler import scheduler
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -10,32 +20,189 @@ login_manager = LoginManager()
 migrate = Migrate()
 
 
-def create_app():
-    """Create and configure an instance of the Flask application."""
+def create_app(config=None):
+    """
+    Create and configure an instance of the Flask application.
+    Settings come from environment variables; `config` overrides any of them (e.g. in tests).
+    """
     app = Flask(__name__)
+    app.request_class = UploadRequest
+    load_dotenv()
 
     # --- Configuration ---
     # Set a secret key for session management and forms
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'a-default-secret-key-for-dev')
 
-    # Set the database URI
+    # Set the database URI (any SQLAlchemy URL, e.g. postgresql://... in production)
     basedir = os.path.abspath(os.path.dirname(__file__))
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, '..', 'app.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+        'DATABASE_URL', 'sqlite:///' + os.path.join(basedir, '..', 'app.db')
+    )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    # Connection pool settings (ignored for in-memory SQLite)
+    app.config['DATABASE_POOL_SIZE'] = int(os.getenv('DATABASE_POOL_SIZE', 10))
+    app.config['DATABASE_MAX_OVERFLOW'] = int(os.getenv('DATABASE_MAX_OVERFLOW', 20))
+    app.config['DATABASE_POOL_RECYCLE'] = int(os.getenv('DATABASE_POOL_RECYCLE', 3600))
+    app.config['DATABASE_POOL_PRE_PING'] = os.getenv('DATABASE_POOL_PRE_PING', '1') == '1'
+
+    # Pragmas applied to every SQLite connection
+    app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'wal')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 15000))
+    app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'normal')
+    app.config['SQLITE_CACHE_SIZE'] = int(os.getenv('SQLITE_CACHE_SIZE', -64000))  # negative means KiB
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+    # Persistent tier for the result caches (set to None for in-memory only)
+    app.config['CACHE_DATABASE_PATH'] = os.getenv('CACHE_DATABASE_PATH', os.path.join(basedir, '..', 'cache.db'))
+    app.config['AI_CACHE_TTL'] = int(os.getenv('AI_CACHE_TTL', 7 * 24 * 3600))
+    app.config['TEXT_CACHE_DB_MAX_ENTRIES'] = int(os.getenv('TEXT_CACHE_DB_MAX_ENTRIES', 5000))
+
+    # Server-side sessions: the cookie only carries an opaque id ('sqlite' or 'memory')
+    app.config['SESSION_BACKEND'] = os.getenv('SESSION_BACKEND', 'sqlite')
+    app.config['SESSION_DATABASE_PATH'] = os.getenv('SESSION_DATABASE_PATH')  # defaults to CACHE_DATABASE_PATH
+
+    # Model client: 'gemini', or 'stub' for offline load tests
+    app.config['LLM_PROVIDER'] = os.getenv('LLM_PROVIDER', 'gemini')
+    app.config['GEMINI_API_KEY'] = os.getenv('GEMINI_API_KEY')
+    app.config['LLM_TIMEOUT'] = float(os.getenv('LLM_TIMEOUT', 30))
+    app.config['LLM_MAX_RETRIES'] = int(os.getenv('LLM_MAX_RETRIES', 2))
+    app.config['LLM_HEDGE'] = os.getenv('LLM_HEDGE', '0') == '1'
+
+    # Admission control for model calls: a token bucket sized to the API quota, concurrency
+    # caps, and queue limits past which calls are refused with 429 instead of waiting
+    app.config['AI_REQUESTS_PER_MINUTE'] = int(os.getenv('AI_REQUESTS_PER_MINUTE', 600))  # 0 for no limit
+    app.config['AI_BURST'] = int(os.getenv('AI_BURST', 20))
+    app.config['AI_MAX_CONCURRENCY'] = int(os.getenv('AI_MAX_CONCURRENCY', 256))
+    app.config['AI_MAX_CONCURRENCY_PER_USER'] = int(os.getenv('AI_MAX_CONCURRENCY_PER_USER', 4))
+    app.config['AI_MAX_QUEUE_DEPTH'] = int(os.getenv('AI_MAX_QUEUE_DEPTH', 200))
+    app.config['AI_MAX_QUEUED_PER_USER'] = int(os.getenv('AI_MAX_QUEUED_PER_USER', 8))
+    app.config['AI_QUEUE_TIMEOUT'] = float(os.getenv('AI_QUEUE_TIMEOUT', 10))
+
+    # Uploads are checked and hashed while they stream in; bodies over MAX_CONTENT_LENGTH are
+    # refused before they are read, and files over UPLOAD_SPOOL_BYTES are kept on disk
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 12 * 1024 * 1024))
+    app.config['UPLOAD_MAX_BYTES'] = int(os.getenv('UPLOAD_MAX_BYTES', 10 * 1024 * 1024))
+    app.config['UPLOAD_SPOOL_BYTES'] = int(os.getenv('UPLOAD_SPOOL_BYTES', 512 * 1024))
+
+    # PDF extraction runs in an isolated process pool with these limits
+    app.config['PDF_WORKERS'] = int(os.getenv('PDF_WORKERS', 2))
+    app.config['PDF_TIMEOUT'] = float(os.getenv('PDF_TIMEOUT', 20))
+    app.config['PDF_MAX_PAGES'] = int(os.getenv('PDF_MAX_PAGES', 30))
+    app.config['PDF_MAX_BYTES'] = int(os.getenv('PDF_MAX_BYTES', 10 * 1024 * 1024))
+    app.config['PDF_WORKER_MEMORY_MB'] = int(os.getenv('PDF_WORKER_MEMORY_MB', 1024))
+    app.config['PDF_WORKER_MAX_JOBS'] = int(os.getenv('PDF_WORKER_MAX_JOBS', 100))
+    app.config['PDF_EXTRACTION_MODE'] = os.getenv('PDF_EXTRACTION_MODE', 'layout')
+
+    # DOCX export runs in its own process pool; results are cached by HTML hash
+    app.config['DOCX_EXPORT_WORKERS'] = int(os.getenv('DOCX_EXPORT_WORKERS', 2))
+    app.config['DOCX_EXPORT_TIMEOUT'] = float(os.getenv('DOCX_EXPORT_TIMEOUT', 15))
+    app.config['DOCX_EXPORT_QUEUE_SIZE'] = int(os.getenv('DOCX_EXPORT_QUEUE_SIZE', 8))
+    app.config['DOCX_MAX_HTML_BYTES'] = int(os.getenv('DOCX_MAX_HTML_BYTES', 1024 * 1024))
+    app.config['DOCX_CACHE_MAX_BYTES'] = int(os.getenv('DOCX_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+    # Rendered resume designs, keyed by design, template mtimes and resume data
+    app.config['DESIGNER_CACHE_MAX_ENTRIES'] = int(os.getenv('DESIGNER_CACHE_MAX_ENTRIES', 256))
+    app.config['DESIGNER_CACHE_MAX_BYTES'] = int(os.getenv('DESIGNER_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+    # Background analysis jobs
+    app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 4))
+    app.config['JOB_QUEUE_SIZE'] = int(os.getenv('JOB_QUEUE_SIZE', 32))
+    app.config['JOB_STALE_AFTER'] = int(os.getenv('JOB_STALE_AFTER', 300))  # seconds before a running job is re-queued
+    app.config['JOB_RECOVERY'] = os.getenv('JOB_RECOVERY', '1') == '1'
+    app.config['JOB_EVENTS_TIMEOUT'] = float(os.getenv('JOB_EVENTS_TIMEOUT', 30))
+    app.config['JOB_EVENTS_POLL_INTERVAL'] = float(os.getenv('JOB_EVENTS_POLL_INTERVAL', 1.0))
+
+    # Batch analysis: resumes per request, and how many are analyzed at once
+    app.config['BATCH_MAX_JOBS'] = int(os.getenv('BATCH_MAX_JOBS', 30))
+    app.config['BATCH_CONCURRENCY'] = int(os.getenv('BATCH_CONCURRENCY', 4))
+
+    # Stream cover letters to the browser as they are generated
+    app.config['COVER_LETTER_STREAMING'] = os.getenv('COVER_LETTER_STREAMING', '1') == '1'
+
+    # Analyses shown per dashboard page
+    app.config['DASHBOARD_PAGE_SIZE'] = int(os.getenv('DASHBOARD_PAGE_SIZE', 20))
+    app.config['SEARCH_PAGE_SIZE'] = int(os.getenv('SEARCH_PAGE_SIZE', 20))
+    app.config['SEARCH_RANK_WINDOW'] = int(os.getenv('SEARCH_RANK_WINDOW', 2000))
+
+    # Logged-in users are cached per process, so requests don't query the user table
+    app.config['USER_CACHE_MAX_ENTRIES'] = int(os.getenv('USER_CACHE_MAX_ENTRIES', 10000))
+    app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', 300))
+
+    # /metrics and the stats endpoints need this bearer token; without one they are disabled
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+
+    # Per-request sampling profiler, toggled with ?profile=1 (keep off in production)
+    app.config['METRICS_PROFILING'] = os.getenv('METRICS_PROFILING', '0') == '1'
+
+    # Import heavy libraries and compile templates up front (for gunicorn --preload)
+    app.config['PRELOAD'] = os.getenv('PRELOAD', '0') == '1'
+
+    # Explicit settings (e.g. from tests) win over the environment
+    if config:
+        app.config.update(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(app.config))
+    app.config['SESSION_DATABASE_PATH'] = app.config['SESSION_DATABASE_PATH'] or app.config['CACHE_DATABASE_PATH']
+
     # --- Initialize extensions with the app ---
     db.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
+    # SQLite can't alter columns in place; batch mode recreates the table instead
+    migrate.init_app(app, db, render_as_batch=True)
+    ai_cache.init_app(app)
+    text_cache.init_app(app)
+    pdf_pool.init_app(app)
+    docx_exporter.init_app(app)
+    design_renderer.init_app(app)
+    metrics.init_app(app)
+    scheduler.init_app(app)
+    app.session_interface = ServerSideSessionInterface(create_session_backend(app))
 
     # Tell Flask-Login which view handles logins
     login_manager.login_view = 'main.login'
 
     with app.app_context():
+        configure_engine(db.engine, app.config)
+
         from . import models
 
+        # Flask-Login's user loader, backed by a cache of user snapshots
+        from .identity import user_cache
+        user_cache.init_app(app)
+
+        # Registers the events that keep the full-text search index in sync
+        from . import search
+
+        # One long-lived, instrumented model client per process
+        from .llm import llm_client
+        from .nlp_processor import MODEL_NAME
+        llm_client.init_app(app, MODEL_NAME)
+
+        # Expose the cache and model client counters on /metrics
+        registry.register_collector('cache', stats_collector(
+            'app_cache', lambda: {'ai': ai_cache.stats(), 'text': text_cache.stats(), 'user': user_cache.stats(),
+                                 'docx': docx_exporter.stats(), 'designer': design_renderer.stats()},
+            label='cache'))
+        registry.register_collector('llm', stats_collector(
+            'llm_client', lambda: {MODEL_NAME: llm_client.stats()}, label='model'))
+        registry.register_collector('scheduler', stats_collector(
+            'ai_scheduler', lambda: {'ai': scheduler.stats()}, label='scheduler'))
+
+        # The analysis worker pool; jobs left by a previous process are picked up on the first request
+        from .jobs import job_queue
+        job_queue.init_app(app)
+
         # Import and register blueprints
         from . import routes
         app.register_blueprint(routes.main)
 
+    from .commands import backfill_analyses_command, compress_blobs_command, rebuild_search_index_command
+    app.cli.add_command(backfill_analyses_command)
+    app.cli.add_command(compress_blobs_command)
+    app.cli.add_command(rebuild_search_index_command)
+
+    if app.config['PRELOAD']:
+        from .warmup import warmup
+        warmup(app)
+
     return app
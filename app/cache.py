@@ -0,0 +1,326 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Normalizes text so that cosmetic differences don't change its cache key."""
+    text = unicodedata.normalize('NFKC', text or '')
+    return ' '.join(text.split())
+
+
+def hash_stream(stream, chunk_size=64 * 1024):
+    """
+    Computes the SHA-256 of a seekable binary stream without reading it into memory at once.
+    The stream is rewound to the start afterwards.
+    """
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def make_cache_key(*parts):
+    """
+    Builds a stable, content-addressed key from the given parts.
+    Args:
+        *parts: Strings (or JSON-serializable values) that identify the cached value.
+    Returns:
+        A hex SHA-256 digest of the normalized parts.
+    """
+    normalized = [normalize_text(p) if isinstance(p, str) else p for p in parts]
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """
+    A thread-safe, in-process LRU cache with a per-entry TTL.
+    Entries are evicted when either the entry count or the total size budget is exceeded.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024, ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, size=1, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size, expires_at)
+            self._size += size
+            while len(self._data) > self.max_entries or self._size > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._size -= size
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size(self):
+        return self._size
+
+
+class SQLiteCache:
+    """
+    A persistent key/value store kept in a standalone SQLite file.
+    The least recently accessed rows are evicted once max_entries is exceeded. The row
+    count is tracked in memory, and re-read every RECOUNT_INTERVAL writes to pick up rows
+    written by other processes. The connection is opened on first use and reopened in a
+    forked child, since an SQLite connection must not be used across a fork.
+    """
+
+    RECOUNT_INTERVAL = 1000
+
+    def __init__(self, path, table='cache', max_entries=10000, ttl=None):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._count = 0
+        self._writes = 0
+        self.evictions = 0
+
+    def _connect(self):
+        if self._conn is None or self._pid != os.getpid():
+            # A connection inherited from the parent is dropped without closing it,
+            # so nothing is written through it from this process
+            directory = os.path.dirname(os.path.abspath(self.path)) if self.path != ':memory:' else None
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'accessed_at REAL NOT NULL, expires_at REAL)'
+            )
+            conn.execute(f'CREATE INDEX IF NOT EXISTS ix_{self.table}_accessed_at ON {self.table} (accessed_at)')
+            self._count = conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def close(self):
+        """Closes the connection; the next call opens a new one."""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(f'SELECT value, expires_at FROM {self.table} WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] < now:
+                self._count -= conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,)).rowcount
+                return None
+            conn.execute(f'UPDATE {self.table} SET accessed_at = ? WHERE key = ?', (now, key))
+            return row[0]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            conn = self._connect()
+            exists = conn.execute(f'SELECT 1 FROM {self.table} WHERE key = ?', (key,)).fetchone()
+            conn.execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, value, accessed_at, expires_at) VALUES (?, ?, ?, ?)',
+                (key, value, now, expires_at)
+            )
+            if exists is None:
+                self._count += 1
+            self._evict(conn)
+
+    def delete(self, key):
+        with self._lock:
+            self._count -= self._connect().execute(f'DELETE FROM {self.table} WHERE key = ?', (key,)).rowcount
+
+    def sweep(self):
+        """Deletes every expired row. Returns the number of rows removed."""
+        with self._lock:
+            cursor = self._connect().execute(
+                f'DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at < ?', (time.time(),)
+            )
+            self._count -= cursor.rowcount
+            return cursor.rowcount
+
+    def count(self):
+        with self._lock:
+            return self._connect().execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    def _evict(self, conn):
+        if not self.max_entries:
+            return
+        self._writes += 1
+        if self._writes % self.RECOUNT_INTERVAL == 0:
+            self._count = conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+        excess = self._count - self.max_entries
+        if excess > 0:
+            deleted = conn.execute(
+                f'DELETE FROM {self.table} WHERE key IN '
+                f'(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)', (excess,)
+            ).rowcount
+            self._count -= deleted
+            self.evictions += deleted
+
+
+class TieredCache:
+    """
+    A two-tier cache: an in-process LRU in front of an optional SQLite store.
+    Values must be JSON-serializable. Configure it from the app with init_app().
+    """
+
+    def __init__(self, namespace, config_prefix=None):
+        self.namespace = namespace
+        self.config_prefix = config_prefix or namespace.upper() + '_CACHE'
+        self.enabled = True
+        self.memory = LRUCache()
+        self.disk = None
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.sets = 0
+        # Extra, cache-specific counters reported alongside the standard ones
+        self.counters = {}
+
+    def init_app(self, app):
+        """Reads the <PREFIX>_* settings from the app config."""
+        prefix = self.config_prefix
+        config = app.config
+        self.enabled = config.get(f'{prefix}_ENABLED', True)
+        ttl = config.get(f'{prefix}_TTL', 7 * 24 * 3600)
+        self.memory = LRUCache(
+            max_entries=config.get(f'{prefix}_MAX_ENTRIES', 256),
+            max_bytes=config.get(f'{prefix}_MAX_BYTES', 32 * 1024 * 1024),
+            ttl=ttl
+        )
+        path = config.get('CACHE_DATABASE_PATH')
+        self.disk = SQLiteCache(
+            path, table=f'cache_{self.namespace}',
+            max_entries=config.get(f'{prefix}_DB_MAX_ENTRIES', 10000), ttl=ttl
+        ) if path else None
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            try:
+                raw = self.disk.get(key)
+            except sqlite3.Error as e:
+                print(f"Error reading from the {self.namespace} cache: {e}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.memory.set(key, value, size=len(raw))
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        raw = json.dumps(value)
+        self.memory.set(key, value, size=len(raw))
+        self.sets += 1
+        if self.disk is not None:
+            try:
+                self.disk.set(key, raw)
+            except sqlite3.Error as e:
+                print(f"Error writing to the {self.namespace} cache: {e}")
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def close(self):
+        """Closes the SQLite connection of the persistent tier, if one is open."""
+        if self.disk is not None:
+            self.disk.close()
+
+    def stats(self):
+        """Returns the hit/miss/eviction counters used to size the cache."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'sets': self.sets,
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory.size,
+            'memory_evictions': self.memory.evictions,
+            'memory_expirations': self.memory.expirations,
+            'disk_evictions': self.disk.evictions if self.disk is not None else 0,
+            **self.counters,
+        }
+
+
+# Cache for Gemini analysis results, keyed on the resume, JD, prompt version and model
+ai_cache = TieredCache('ai')
+
+# Cache for text extracted from uploads, keyed on the file's bytes and the extractor version
+text_cache = TieredCache('text')
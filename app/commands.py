@@ -0,0 +1,35 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('backfill-analyses')
+@click.option('--batch-size', default=500, show_default=True, help='Analyses updated per transaction.')
+@with_appcontext
+def backfill_analyses_command(batch_size):
+    """Fills match_score and jd_title on analyses saved before those columns existed."""
+    from .services import backfill_analysis_columns
+    updated = backfill_analysis_columns(batch_size)
+    click.echo(f'Updated {updated} analyses.')
+
+
+@click.command('compress-blobs')
+@click.option('--batch-size', default=200, show_default=True, help='Rows rewritten per transaction.')
+@click.option('--pause', default=0.05, show_default=True, help='Seconds to wait between batches.')
+@with_appcontext
+def compress_blobs_command(batch_size, pause):
+    """Compresses resume and analysis rows stored before compression was enabled."""
+    from app import db
+    from .database import compress_existing_rows
+    from .models import Resume, Analysis
+    for model in (Resume, Analysis):
+        rewritten = compress_existing_rows(db.session, model, batch_size, pause)
+        click.echo(f'Compressed {rewritten} {model.__tablename__} rows.')
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Creates the full-text search index if needed and re-indexes every analysis."""
+    from .search import rebuild_search_index
+    indexed = rebuild_search_index()
+    click.echo(f'Indexed {indexed} analyses.')
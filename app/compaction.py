@@ -0,0 +1,168 @@
+import re
+import unicodedata
+
+# Approximate size of the resume and job description text in one prompt. Typical inputs
+# are far below it; only outliers (very long resumes or job postings) are cut.
+PROMPT_TOKEN_BUDGET = 6000
+
+# The job description keeps at least this share of the budget when both texts are long
+JD_BUDGET_SHARE = 1 / 3
+
+# Gemini's tokenizer averages about four characters per token on English text
+CHARS_PER_TOKEN = 4
+
+# Characters PDF and Word extraction leave behind that carry no meaning (soft hyphens,
+# zero-width characters, private-use bullet glyphs and pdfminer's unmapped "(cid:N)")
+INVISIBLE_RE = re.compile(r'[\u00ad\u200b-\u200d\u2060\ufeff\uf000-\uf8ff]|\(cid:\d+\)')
+BULLET_RE = re.compile(r'^[\u2022\u25cf\u25aa\u25a0\u25e6\u2023\u2043\u27a2\u2713\u2714*\u2013\u2014-]+\s*')
+SEPARATOR_RE = re.compile(r'^[\W_]{3,}$')
+PAGE_NUMBER_RE = re.compile(r'^(page\s+\d+(\s+of\s+\d+)?|\d+\s*(/|of)\s*\d+|-\s*\d+\s*-)$', re.IGNORECASE)
+
+# Legal and HR notices found at the end of most job postings. They are removed one
+# sentence at a time, so a requirement sharing a line with them is kept.
+BOILERPLATE_RE = re.compile('|'.join([
+    r'equal (employment )?opportunit(y|ies)( and affirmative action)? employer',
+    r'\beeo(/aa)?\b',
+    r'affirmative action',
+    r'(without regard|regardless of|on the basis of) [^.]{0,40}\b(race|color|religion|sex|gender|national origin|age|disability)',
+    r'protected (veteran|characteristic|by (federal|state|local|applicable) law)',
+    r'(request|require|need)s? (a |an )?(reasonable )?accommodation',
+    r'reasonable accommodations? (will|may|can|are|is)',
+    r'e-verify',
+    r'(applicant|candidate) privacy|privacy (notice|policy|statement)',
+    r'fair chance|criminal histor(y|ies)|arrest (and|or) conviction',
+    r'unsolicited (resumes|applications|candidates)|(recruitment|recruiting|staffing) agenc(y|ies)',
+    r'pay transparency (nondiscrimination|policy|provision)',
+]), re.IGNORECASE)
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Section headings, by how much the model needs the section. Unknown headings count
+# as "normal"; "low" sections are the first to go when a text is over its budget.
+HEADING_RE = re.compile(r"^[A-Za-z][A-Za-z0-9 &/',’()-]{1,48}:?$")
+LOW_PRIORITY_SECTIONS = re.compile(
+    r'^(about (us|the (company|team|role))|who we are|our (culture|values|mission|story)|why (join|work)'
+    r'|benefits|perks|what we offer|compensation|salary|how to apply|next steps|hobbies|interests'
+    r'|references|personal( details| information)?|activities)\b',
+    re.IGNORECASE)
+
+
+def estimate_tokens(text):
+    """Estimates the number of model tokens in `text` without calling the API."""
+    return (len(text or '') + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def compact_whitespace(text):
+    """
+    Cleans up extracted text without changing its content: Unicode is NFKC-normalized,
+    extraction artifacts, separator rules and page numbers are dropped, bullets become
+    "- ", runs of spaces collapse, and blank lines are kept only between paragraphs.
+    """
+    text = INVISIBLE_RE.sub('', unicodedata.normalize('NFKC', text or ''))
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r'[ \t]*\t[ \t]*', '\t', re.sub(r' {2,}', ' ', line)).strip()
+        if SEPARATOR_RE.match(line) or PAGE_NUMBER_RE.match(line):
+            continue
+        line = BULLET_RE.sub('- ', line) if BULLET_RE.match(line) and len(line) > 2 else line
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return '\n'.join(lines).strip()
+
+
+def dedupe_lines(text):
+    """
+    Removes repeated lines, such as the name and contact line printed on every page.
+    Only lines of four words or more are compared, so short repeated values (a location,
+    a skill) are kept where they occur.
+    """
+    seen = set()
+    lines = []
+    for line in text.split('\n'):
+        if len(line.split()) >= 4:
+            key = line.casefold()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def strip_boilerplate(text):
+    """Removes equal-opportunity, accommodation, privacy and agency notices from a job description."""
+    lines = []
+    for line in text.split('\n'):
+        if BOILERPLATE_RE.search(line):
+            line = ' '.join(s for s in SENTENCE_RE.split(line) if not BOILERPLATE_RE.search(s))
+            if not line:
+                continue
+        lines.append(line)
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def _sections(text):
+    """Splits text into sections at heading lines. Returns [low_priority, lines] pairs."""
+    sections = [[False, []]]
+    for line in text.split('\n'):
+        if line and HEADING_RE.match(line) and len(line.split()) <= 6 and not line.endswith('.'):
+            sections.append([bool(LOW_PRIORITY_SECTIONS.match(line)), []])
+        sections[-1][1].append(line)
+    return [section for section in sections if section[1]]
+
+
+def fit_to_budget(text, max_tokens):
+    """
+    Shortens text to about `max_tokens` tokens. Low-priority sections (company blurbs,
+    benefits, hobbies, references) are dropped first, last one first. Then lines are cut
+    from the end of whichever section is longest, so every section keeps its start (for
+    a resume, the most recent roles).
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sections = _sections(text)
+    sizes = [sum(len(line) + 1 for line in lines) for _, lines in sections]
+    excess = sum(sizes) - max_tokens * CHARS_PER_TOKEN
+
+    for index in reversed(range(len(sections))):
+        if excess <= 0:
+            break
+        if sections[index][0]:
+            excess -= sizes[index]
+            sizes[index] = 0
+            sections[index][1] = []
+
+    while excess > 0:
+        index = max(range(len(sections)), key=sizes.__getitem__)
+        lines = sections[index][1]
+        last = lines[-1]
+        if len(lines) == 1 and len(last) > excess:
+            # A single long line (e.g. text without line breaks) is cut at a word boundary
+            cut = last[:len(last) - excess].rsplit(' ', 1)[0]
+            excess -= len(last) - len(cut)
+            sizes[index] -= len(last) - len(cut)
+            lines[-1] = cut
+            break
+        lines.pop()
+        sizes[index] -= len(last) + 1
+        excess -= len(last) + 1
+    return '\n'.join(line for _, lines in sections for line in lines).strip()
+
+
+def compact_resume(resume_text, max_tokens=PROMPT_TOKEN_BUDGET):
+    """The resume text as it goes into a prompt: normalized, deduplicated and within budget."""
+    return fit_to_budget(dedupe_lines(compact_whitespace(resume_text)), max_tokens)
+
+
+def compact_inputs(resume_text, jd_text, budget=PROMPT_TOKEN_BUDGET):
+    """
+    Prepares a resume and a job description for a prompt that holds both. The job
+    description also loses its legal boilerplate. Together they are kept within `budget`
+    tokens: the job description is cut only past JD_BUDGET_SHARE of it, and the resume
+    gets whatever the job description leaves.
+    Returns:
+        A (resume_text, jd_text) tuple.
+    """
+    resume_text = dedupe_lines(compact_whitespace(resume_text))
+    jd_text = dedupe_lines(strip_boilerplate(compact_whitespace(jd_text)))
+    jd_budget = max(int(budget * JD_BUDGET_SHARE), budget - estimate_tokens(resume_text))
+    jd_text = fit_to_budget(jd_text, jd_budget)
+    return fit_to_budget(resume_text, budget - estimate_tokens(jd_text)), jd_text
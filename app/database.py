@@ -0,0 +1,170 @@
+import time
+import zlib
+from sqlalchemy import event, select, type_coerce, LargeBinary, Text
+from sqlalchemy.engine import make_url
+from sqlalchemy.types import TypeDecorator
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def build_engine_options(config):
+    """
+    Builds SQLALCHEMY_ENGINE_OPTIONS from the DATABASE_* settings.
+    Pool sizing only applies to pooled backends; in-memory SQLite uses a single shared connection.
+    """
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    options = {'pool_pre_ping': config['DATABASE_POOL_PRE_PING']}
+    url = make_url(uri)
+    if is_sqlite(uri) and url.database in (None, '', ':memory:'):
+        return options
+    options['pool_size'] = config['DATABASE_POOL_SIZE']
+    options['max_overflow'] = config['DATABASE_MAX_OVERFLOW']
+    if config.get('DATABASE_POOL_RECYCLE'):
+        options['pool_recycle'] = config['DATABASE_POOL_RECYCLE']
+    return options
+
+
+def sqlite_pragmas(config):
+    """The PRAGMA statements run on every new SQLite connection."""
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA cache_size={int(config['SQLITE_CACHE_SIZE'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+    ]
+
+
+def configure_engine(engine, config):
+    """
+    Applies per-connection settings to the app's engine. For SQLite this enables WAL,
+    so readers don't block the writer, and a busy timeout, so concurrent writers wait
+    for the lock instead of failing with "database is locked". Other backends are left alone.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+# Strings that recur in stored analyses and job descriptions. zlib primes its window with
+# them, which makes even small blobs compress well. Never edit a dictionary in place: add
+# a new version instead, since rows compressed with the old one still need it to decode.
+COMPRESSION_DICTIONARIES = {
+    1: (
+        b'"match_score": "missing_keywords": "resume_suggestions": [{"original": "rewritten": '
+        b'"cover_letter_themes": "full_name": "contact_info": {"email": "phone": "linkedin": "address": '
+        b'"summary": "work_experience": [{"job_title": "company": "location": "dates": "responsibilities": '
+        b'"education": [{"degree": "institution": "graduation_date": "skills": ["'
+        b'experience with years of team development software management data business customer '
+        b'requirements responsibilities qualifications skills ability strong knowledge of the and to in '
+        b'We are looking for a You will Bachelor\'s degree in Computer Science equal opportunity employer '
+    ),
+}
+
+
+class CompressedText(TypeDecorator):
+    """
+    A text column stored zlib-compressed. Values read back as plain strings.
+    Rows written before compression was enabled (plain text) are still read correctly,
+    and short values are stored uncompressed since the header would outweigh the saving.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    # Compressed values start with a NUL byte, which never begins real text,
+    # followed by 'z' and the version of the dictionary used
+    MAGIC = b'\x00z'
+    DICTIONARY_VERSION = 1
+    MIN_SIZE = 128
+    LEVEL = 6
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self.compress(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self.decompress(value)
+
+    @classmethod
+    def compress(cls, text):
+        raw = text.encode('utf-8')
+        if len(raw) < cls.MIN_SIZE:
+            return raw
+        compressor = zlib.compressobj(cls.LEVEL, zdict=COMPRESSION_DICTIONARIES[cls.DICTIONARY_VERSION])
+        return cls.MAGIC + bytes([cls.DICTIONARY_VERSION]) + compressor.compress(raw) + compressor.flush()
+
+    @classmethod
+    def decompress(cls, value):
+        if isinstance(value, str):
+            # Legacy rows stored as TEXT
+            return value
+        value = bytes(value)
+        if not value.startswith(cls.MAGIC):
+            return value.decode('utf-8')
+        version = value[len(cls.MAGIC)]
+        decompressor = zlib.decompressobj(zdict=COMPRESSION_DICTIONARIES[version])
+        return (decompressor.decompress(value[len(cls.MAGIC) + 1:]) + decompressor.flush()).decode('utf-8')
+
+    @classmethod
+    def needs_compression(cls, value):
+        """Whether a raw stored value is worth rewriting in compressed form."""
+        if value is None:
+            return False
+        if isinstance(value, str):
+            return len(value.encode('utf-8')) >= cls.MIN_SIZE
+        return not bytes(value).startswith(cls.MAGIC) and len(value) >= cls.MIN_SIZE
+
+
+def compressed_columns(model):
+    return [column for column in model.__table__.columns if isinstance(column.type, CompressedText)]
+
+
+def compress_existing_rows(session, model, batch_size=200, pause=0.05):
+    """
+    Rewrites a model's plain-text rows in compressed form, one committed batch at a time.
+    Safe to run while the app is serving: each batch is a short transaction, the pause
+    between batches leaves room for other writers, and already compressed rows are skipped.
+    Returns:
+        The number of rows rewritten.
+    """
+    columns = compressed_columns(model)
+    if not columns:
+        return 0
+    table = model.__table__
+    primary_key = table.primary_key.columns[0]
+    # Read the stored values as they are, bypassing decompression
+    raw_columns = [type_coerce(column, Text) for column in columns]
+    rewritten = 0
+    last_id = None
+    while True:
+        query = select(primary_key, *raw_columns).order_by(primary_key).limit(batch_size)
+        if last_id is not None:
+            query = query.where(primary_key > last_id)
+        rows = session.execute(query).all()
+        if not rows:
+            return rewritten
+        last_id = rows[-1][0]
+        for row in rows:
+            values = {column.key: CompressedText.decompress(raw)
+                      for column, raw in zip(columns, row[1:]) if CompressedText.needs_compression(raw)}
+            if values:
+                session.execute(table.update().where(primary_key == row[0]).values(**values))
+                rewritten += 1
+        session.commit()
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+from flask import render_template
+from .cache import LRUCache
+
+# Files in the designs folder that are building blocks rather than designs
+DESIGN_LAYOUT = 'designer_layout.html'
+
+
+class DesignRenderer:
+    """
+    Renders the resume designs under templates/designs and caches the HTML by
+    (design, template mtimes, hash of the resume data). Only names in the registry
+    built at start-up are rendered, so a request can't reach any other template.
+    The cache key also gives a strong ETag, checked before rendering.
+    """
+
+    def __init__(self):
+        self.folder = None
+        self.designs = {}
+        self.shared = []
+        self.cache = LRUCache(max_entries=256, max_bytes=16 * 1024 * 1024, ttl=None)
+        self.counters = {'renders': 0, 'cache_hits': 0, 'not_modified': 0}
+
+    def init_app(self, app):
+        self.folder = os.path.join(app.root_path, app.template_folder, 'designs')
+        names = sorted(os.listdir(self.folder))
+        self.designs = {name[:-len('.html')]: os.path.join(self.folder, name) for name in names
+                        if name.endswith('.html') and not name.startswith('_') and name != DESIGN_LAYOUT}
+        # The layout and the partials are part of every design, so their changes count too
+        self.shared = [os.path.join(self.folder, name) for name in names
+                       if name == DESIGN_LAYOUT or name.startswith('_')]
+        self.cache = LRUCache(max_entries=app.config.get('DESIGNER_CACHE_MAX_ENTRIES', 256),
+                              max_bytes=app.config.get('DESIGNER_CACHE_MAX_BYTES', 16 * 1024 * 1024), ttl=None)
+        app.extensions['design_renderer'] = self
+
+    def etag(self, name, resume):
+        """
+        The strong ETag of a design rendered with `resume`, or None for unknown designs.
+        It changes whenever the data or any of the design's template files change.
+        """
+        path = self.designs.get(name)
+        if path is None:
+            return None
+        mtime = max(os.stat(p).st_mtime_ns for p in [path] + self.shared)
+        data_hash = hashlib.sha256(json.dumps(resume, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        return hashlib.sha256(f'{name}:{mtime}:{data_hash}'.encode('utf-8')).hexdigest()[:32]
+
+    def render(self, name, resume, etag=None):
+        """Returns the HTML of a registered design, from the cache when possible."""
+        etag = etag or self.etag(name, resume)
+        html = self.cache.get(etag)
+        if html is not None:
+            self.counters['cache_hits'] += 1
+            return html
+        html = render_template(f'designs/{name}.html', resume=resume)
+        self.counters['renders'] += 1
+        self.cache.set(etag, html, size=len(html))
+        return html
+
+    def stats(self):
+        return dict(self.counters, designs=len(self.designs), cache_entries=len(self.cache),
+                    cache_bytes=self.cache.size)
+
+
+design_renderer = DesignRenderer()
@@ -0,0 +1,125 @@
+import hashlib
+import threading
+from .cache import LRUCache
+from .process_pool import ProcessPool, WorkerCrashedError, WorkerTimeoutError
+
+# Bump this whenever the conversion changes so cached documents are rebuilt
+EXPORT_VERSION = '1'
+
+
+class DOCXExportError(Exception):
+    """Raised when HTML can't be exported. The message is safe to show to users."""
+    status = 500
+
+
+class DOCXTooLargeError(DOCXExportError):
+    status = 413
+
+
+class DOCXTimeoutError(DOCXExportError):
+    status = 422
+
+
+class DOCXBusyError(DOCXExportError):
+    status = 503
+
+
+def html_to_docx(html, title='Resume'):
+    """
+    Converts an HTML fragment to a .docx document.
+    Returns:
+        The bytes of the document.
+    """
+    from html2docx import html2docx
+    return html2docx(html, title=title).getvalue()
+
+
+def converter_version():
+    """Identifies the converter, so a library upgrade doesn't serve documents built by the old one."""
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        return f'{EXPORT_VERSION}:html2docx-{version("html2docx")}'
+    except PackageNotFoundError:
+        return EXPORT_VERSION
+
+
+class DOCXExporter:
+    """
+    Converts HTML to DOCX in a small process pool, off the request threads. Input is
+    capped at DOCX_MAX_HTML_BYTES, each conversion gets DOCX_EXPORT_TIMEOUT seconds,
+    and at most DOCX_EXPORT_QUEUE_SIZE conversions may be pending. Finished documents
+    are cached in memory by the hash of their HTML and the converter version, which
+    is also their ETag. Set DOCX_EXPORT_WORKERS to 0 to convert inline (e.g. in tests).
+    """
+
+    def __init__(self):
+        self.processes = ProcessPool(workers=2)
+        self.timeout = 15
+        self.max_html_bytes = 1024 * 1024
+        self.queue_size = 8
+        self.cache = LRUCache(max_entries=128, max_bytes=32 * 1024 * 1024, ttl=3600)
+        self._version = None
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self.counters = {'conversions': 0, 'cache_hits': 0, 'not_modified': 0, 'timeouts': 0, 'rejected': 0}
+
+    def init_app(self, app):
+        config = app.config
+        self.processes.workers = config.get('DOCX_EXPORT_WORKERS', self.processes.workers)
+        self.timeout = config.get('DOCX_EXPORT_TIMEOUT', self.timeout)
+        self.max_html_bytes = config.get('DOCX_MAX_HTML_BYTES', self.max_html_bytes)
+        self.queue_size = config.get('DOCX_EXPORT_QUEUE_SIZE', self.queue_size)
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self.cache = LRUCache(max_entries=config.get('DOCX_CACHE_MAX_ENTRIES', 128),
+                              max_bytes=config.get('DOCX_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+                              ttl=config.get('DOCX_CACHE_TTL', 3600))
+        app.extensions['docx_exporter'] = self
+
+    def etag(self, html):
+        """The ETag of the document built from `html`, known before converting it."""
+        if self._version is None:
+            self._version = converter_version()
+        digest = hashlib.sha256(html.encode('utf-8'))
+        digest.update(self._version.encode('utf-8'))
+        return digest.hexdigest()[:32]
+
+    def export(self, html, etag=None):
+        """
+        Returns the DOCX bytes for `html`, from the cache when it was converted before.
+        Raises:
+            DOCXTooLargeError, DOCXTimeoutError, DOCXBusyError or DOCXExportError.
+        """
+        if len(html.encode('utf-8')) > self.max_html_bytes:
+            raise DOCXTooLargeError(f'The document must be smaller than {self.max_html_bytes // 1024} KB.')
+        etag = etag or self.etag(html)
+        data = self.cache.get(etag)
+        if data is not None:
+            self.counters['cache_hits'] += 1
+            return data
+
+        if not self._slots.acquire(blocking=False):
+            self.counters['rejected'] += 1
+            raise DOCXBusyError('Too many exports are in progress. Please try again shortly.')
+        try:
+            data = self._convert(html)
+        finally:
+            self._slots.release()
+        self.counters['conversions'] += 1
+        self.cache.set(etag, data, size=len(data))
+        return data
+
+    def _convert(self, html):
+        try:
+            return self.processes.run(html_to_docx, html, timeout=self.timeout)
+        except WorkerTimeoutError:
+            self.counters['timeouts'] += 1
+            raise DOCXTimeoutError('The document took too long to export. Please try a simpler layout.')
+        except WorkerCrashedError:
+            raise DOCXExportError('The document could not be exported.')
+        except Exception as e:
+            raise DOCXExportError(f'An error occurred: {e}') from e
+
+    def stats(self):
+        return dict(self.counters, cache_entries=len(self.cache), cache_bytes=self.cache.size)
+
+
+docx_exporter = DOCXExporter()
@@ -0,0 +1,116 @@
+import threading
+from flask_login import UserMixin
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from app import db, login_manager
+from .cache import LRUCache
+from .models import User
+
+
+class UserSnapshot(UserMixin):
+    """
+    A detached, read-only copy of the User fields that requests need. It is what
+    current_user holds, so reading it never touches the database; load the User
+    row explicitly to change it.
+    """
+
+    def __init__(self, id, username, email):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'username', username)
+        object.__setattr__(self, 'email', email)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('UserSnapshot is read-only')
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.username}>'
+
+
+class UserCache:
+    """
+    A per-process, bounded cache of UserSnapshots with a TTL, behind Flask-Login's user
+    loader. Entries are invalidated when a user's email or password changes or the user
+    is deleted; other processes see such changes once their entry expires.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self._cache = LRUCache(max_entries=max_entries, max_bytes=max_entries, ttl=ttl)
+        self._invalidations = 0
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def init_app(self, app):
+        max_entries = app.config.get('USER_CACHE_MAX_ENTRIES', 10000)
+        self._cache = LRUCache(max_entries=max_entries, max_bytes=max_entries,
+                               ttl=app.config.get('USER_CACHE_TTL', 300))
+        app.extensions['user_cache'] = self
+
+    def load(self, user_id):
+        """
+        Returns the UserSnapshot for a user id, querying only on a cache miss.
+        Returns None if the user doesn't exist.
+        """
+        snapshot = self._cache.get(user_id)
+        if snapshot is not None:
+            self.counters['hits'] += 1
+            return snapshot
+        self.counters['misses'] += 1
+        with self._lock:
+            invalidations = self._invalidations
+        row = db.session.execute(
+            select(User.id, User.username, User.email).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        snapshot = UserSnapshot(row.id, row.username, row.email)
+        with self._lock:
+            # A change committed while we were reading may not be in `row`; don't cache it
+            if invalidations == self._invalidations:
+                self._cache.set(user_id, snapshot)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._invalidations += 1
+            self._cache.delete(user_id)
+        self.counters['invalidations'] += 1
+
+    def stats(self):
+        return dict(self.counters, entries=len(self._cache), evictions=self._cache.evictions,
+                    expirations=self._cache.expirations)
+
+
+user_cache = UserCache()
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return user_cache.load(int(user_id))
+
+
+@event.listens_for(User.email, 'set')
+@event.listens_for(User.password_hash, 'set')
+def _user_changed(target, value, oldvalue, initiator):
+    if target.id is None:
+        return
+    user_cache.invalidate(target.id)
+    # Again once the change is committed, in case a request cached the old row meanwhile
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    user_cache.invalidate(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session):
+    session.info.pop('changed_user_ids', None)
@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from .models import AnalysisJob
+from .nlp_processor import get_combined_ai_data
+from .services import save_analysis, get_stored_structure
+from .scheduler import scheduler
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job."""
+
+
+class JobQueue:
+    """
+    A bounded, in-process worker pool for analysis jobs.
+    Job state lives in the AnalysisJob table; the pool only holds job ids. The worker
+    threads start with the first job, so CLI commands and a preloading master start none.
+    Jobs left by a previous process are recovered when a serving process handles its
+    first request (set JOB_RECOVERY to False to turn this off), or by calling recover().
+    """
+
+    def __init__(self):
+        self.app = None
+        self.workers = 4
+        self._executor = None
+        self._pid = None
+        self._recovered_pid = None
+        self._slots = None
+        self._events = {}
+        self._finished = OrderedDict()  # recently finished job ids, so wait() returns at once
+        self._backlog = deque()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('JOB_WORKERS', self.workers)
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(app.config.get('JOB_QUEUE_SIZE', 32))
+        app.extensions['job_queue'] = self
+        if app.config.get('JOB_RECOVERY', True):
+            app.before_request(self._recover_once)
+
+    def submit(self, resume_text, jd_text, filename=None, user_id=None, client_address=None):
+        """
+        Persists a new job and hands it to the worker pool. The model call is scheduled
+        under the user id, or under client_address for anonymous users.
+        Returns:
+            The AnalysisJob row, already committed with status 'queued'.
+        Raises:
+            QueueFullError: If the queue is at capacity.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError('The analysis queue is full. Please try again shortly.')
+        try:
+            job = AnalysisJob(
+                id=uuid.uuid4().hex,
+                original_filename=filename,
+                resume_text=resume_text,
+                job_description=jd_text,
+                user_id=user_id,
+                client_address=client_address
+            )
+            db.session.add(job)
+            db.session.commit()
+        except Exception:
+            self._slots.release()
+            raise
+        self._dispatch(job.id)
+        return job
+
+    def recover(self):
+        """
+        Re-enqueues jobs left behind by a previous process: queued jobs, and
+        running jobs that have not been touched within JOB_STALE_AFTER seconds.
+        Jobs beyond the free slots wait in a backlog and are dispatched as slots free up.
+        Returns:
+            The number of jobs recovered.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=self.app.config.get('JOB_STALE_AFTER', 300))
+        try:
+            jobs = AnalysisJob.query.filter(
+                (AnalysisJob.status == 'queued') |
+                ((AnalysisJob.status == 'running') & (AnalysisJob.updated_at < stale_before))
+            ).order_by(AnalysisJob.created_at).all()
+            job_ids = [job.id for job in jobs]
+            for job in jobs:
+                job.status = 'queued'
+            db.session.commit()
+        except SQLAlchemyError as e:
+            # The table may not exist yet (e.g. before the first migration)
+            db.session.rollback()
+            print(f"Could not recover analysis jobs: {getattr(e, 'orig', None) or e}")
+            return 0
+        with self._lock:
+            self._backlog.extend(job_id for job_id in job_ids if job_id not in self._backlog)
+        self._fill()
+        return len(job_ids)
+
+    def _recover_once(self):
+        # Runs before the first request of each serving process (and again after a fork)
+        with self._lock:
+            if self._recovered_pid == os.getpid():
+                return
+            self._recovered_pid = os.getpid()
+        self.recover()
+
+    def wait(self, job_id, timeout):
+        """
+        Blocks until a job run by this process finishes or the timeout elapses.
+        Jobs this process is not running are waited on by sleeping for the timeout.
+        Returns True if the job is known to have finished.
+        """
+        with self._lock:
+            if job_id in self._finished:
+                return True
+            event = self._events.get(job_id)
+        if event is None:
+            time.sleep(timeout)
+            return False
+        return event.wait(timeout)
+
+    def _fill(self):
+        """Dispatches backlogged jobs while there are free slots."""
+        while True:
+            with self._lock:
+                if not self._backlog or not self._slots.acquire(blocking=False):
+                    return
+                job_id = self._backlog.popleft()
+            self._dispatch(job_id)
+
+    def _dispatch(self, job_id):
+        with self._lock:
+            self._events[job_id] = threading.Event()
+            # Threads don't survive a fork, so a forked child starts its own pool
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='analysis-job')
+                self._pid = os.getpid()
+            executor = self._executor
+        executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        try:
+            with self.app.app_context():
+                self._process(job_id)
+        except Exception as e:
+            print(f"An unexpected error in analysis job {job_id}: {e}")
+        finally:
+            self._slots.release()
+            with self._lock:
+                event = self._events.pop(job_id, None)
+                self._finished[job_id] = None
+                if len(self._finished) > 1024:
+                    self._finished.popitem(last=False)
+            if event is not None:
+                event.set()
+            self._fill()
+
+    def _process(self, job_id):
+        # Claim the job atomically so two processes never run the same one
+        claimed = AnalysisJob.query.filter_by(id=job_id, status='queued').update(
+            {'status': 'running', 'updated_at': datetime.utcnow()}
+        )
+        db.session.commit()
+        if not claimed:
+            return
+
+        job = db.session.get(AnalysisJob, job_id)
+        try:
+            structured_resume = get_stored_structure(job.user_id, job.resume_text)
+            client_key = job.user_id if job.user_id is not None else job.client_address
+            with scheduler.request_class(client_key, 'interactive'):
+                full_data = get_combined_ai_data(job.resume_text, job.job_description, structured_resume)
+            if 'error' in full_data:
+                job.status = 'failed'
+                job.error = 'An error occurred during AI processing.'
+            else:
+                if job.user_id is not None:
+                    save_analysis(job.user_id, job.original_filename, job.resume_text, job.job_description, full_data)
+                job.result_json = json.dumps(full_data)
+                job.status = 'done'
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(AnalysisJob, job_id)
+            job.status = 'failed'
+            job.error = f'An unexpected server error occurred: {e}'
+            db.session.commit()
+
+
+job_queue = JobQueue()
@@ -0,0 +1,413 @@
+import random
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from .metrics import LLM_PROMPT_CHARS, LLM_RESPONSE_CHARS, LLM_TOKENS, record_tokens
+
+
+class LLMError(Exception):
+    """Base class for errors raised by the LLM client. `status` is the HTTP status to report."""
+    status = 502
+
+
+class LLMTimeoutError(LLMError):
+    """The call did not finish before its deadline."""
+    status = 504
+
+
+class CircuitOpenError(LLMError):
+    """The upstream is failing, so calls are rejected without being sent."""
+    status = 503
+
+
+class TransientLLMError(LLMError):
+    """A retryable upstream failure (rate limiting, 5xx, dropped connection)."""
+    status = 503
+
+
+# Upstream exception names that are worth retrying (google.api_core and the stub provider)
+TRANSIENT_ERROR_NAMES = frozenset([
+    'ServiceUnavailable', 'InternalServerError', 'TooManyRequests', 'ResourceExhausted',
+    'DeadlineExceeded', 'GatewayTimeout', 'Aborted', 'ConnectionError', 'TimeoutError',
+    'TransientLLMError',
+])
+
+
+def is_transient(error):
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class LLMResponse:
+    """The text of a completed call plus what we know about its cost."""
+
+    def __init__(self, text, prompt_tokens=None, response_tokens=None):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+
+
+class GeminiProvider:
+    """
+    Calls the Gemini API through a single, long-lived GenerativeModel.
+    The SDK is imported and configured on the first call, keeping it out of app start-up.
+    """
+
+    def __init__(self, model_name, api_key=None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    if self.api_key:
+                        genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt, timeout):
+        response = self.model.generate_content(prompt, request_options={'timeout': timeout})
+        return self._to_response(response)
+
+    @staticmethod
+    def _to_response(response):
+        usage = getattr(response, 'usage_metadata', None)
+        return LLMResponse(
+            response.text,
+            prompt_tokens=getattr(usage, 'prompt_token_count', None),
+            response_tokens=getattr(usage, 'candidates_token_count', None)
+        )
+
+    def stream(self, prompt, timeout):
+        response = self.model.generate_content(prompt, stream=True, request_options={'timeout': timeout})
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class StubProvider:
+    """
+    An offline provider for tests and load tests.
+    Args:
+        response: The text to return, or a callable taking the prompt and returning it.
+        latency: Mean latency in seconds, or a callable returning a latency sample.
+        jitter: Uniform +/- jitter in seconds applied to a fixed mean latency.
+        error_rate: The fraction of calls that fail with a TransientLLMError.
+    """
+
+    def __init__(self, response='{}', latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.response = response
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def _sample_latency(self):
+        if callable(self.latency):
+            return max(0.0, self.latency())
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _result(self, prompt):
+        if self._random.random() < self.error_rate:
+            raise TransientLLMError('Simulated upstream failure.')
+        return self.response(prompt) if callable(self.response) else self.response
+
+    def _call(self, prompt):
+        self.calls += 1
+        time.sleep(self._sample_latency())
+        return self._result(prompt)
+
+    def generate(self, prompt, timeout):
+        text = self._call(prompt)
+        return LLMResponse(text, prompt_tokens=len(prompt) // 4, response_tokens=len(text) // 4)
+
+    def stream(self, prompt, timeout):
+        text = self._call(prompt)
+        for i in range(0, len(text), 40):
+            yield text[i:i + 40]
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        """Admits a call or raises CircuitOpenError. Returns True if the call is the half-open trial."""
+        with self._lock:
+            state = self.state
+            if state == 'open' or (state == 'half-open' and self._trial_in_flight):
+                raise CircuitOpenError('The AI service is temporarily unavailable. Please try again shortly.')
+            if state == 'half-open':
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """
+        Ends the half-open trial without a verdict on the upstream's health, e.g. for a rejected
+        prompt. Only the call that before_call() admitted as the trial may release it.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Keeps a rolling window of call latencies to derive percentiles from."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class LLMClient:
+    """
+    The shared entry point for every model call. Adds per-call deadlines, retries with
+    jittered exponential backoff, optional hedged requests and a circuit breaker
+    on top of a provider. With a scheduler, each attempt (retries included) first waits
+    for admission, and backoff sleeps hold no slot. Only timeouts and transient upstream
+    failures count towards opening the circuit. Configure it from the app with init_app().
+    """
+
+    def __init__(self, provider=None, timeout=30.0, max_retries=2, backoff_base=0.5, backoff_max=8.0,
+                 hedge=False, hedge_percentile=95, hedge_min_samples=20, breaker=None, max_workers=32,
+                 scheduler=None):
+        self.provider = provider
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-call')
+        self.counters = {'calls': 0, 'successes': 0, 'retries': 0, 'hedges': 0, 'timeouts': 0,
+                         'failures': 0, 'rejected': 0}
+        self._counters_lock = threading.Lock()
+
+    def init_app(self, app, model_name):
+        config = app.config
+        provider = config.get('LLM_PROVIDER', 'gemini')
+        if provider == 'stub':
+            self.provider = StubProvider(latency=config.get('LLM_STUB_LATENCY', 0.5),
+                                         jitter=config.get('LLM_STUB_JITTER', 0.0),
+                                         error_rate=config.get('LLM_STUB_ERROR_RATE', 0.0),
+                                         response=config.get('LLM_STUB_RESPONSE', '{}'))
+        elif provider == 'gemini':
+            if not config.get('GEMINI_API_KEY'):
+                print("Error: GEMINI_API_KEY not found in .env file")
+            self.provider = GeminiProvider(model_name, config.get('GEMINI_API_KEY'))
+        else:
+            # Any object with generate(prompt, timeout) and stream(prompt, timeout)
+            self.provider = provider
+        self.timeout = config.get('LLM_TIMEOUT', 30.0)
+        self.max_retries = config.get('LLM_MAX_RETRIES', 2)
+        self.hedge = config.get('LLM_HEDGE', False)
+        self.breaker = CircuitBreaker(config.get('LLM_BREAKER_THRESHOLD', 5), config.get('LLM_BREAKER_RESET', 30))
+        self.scheduler = app.extensions.get('ai_scheduler')
+        app.extensions['llm_client'] = self
+
+    def generate(self, prompt, timeout=None):
+        """
+        Runs a prompt and returns an LLMResponse.
+        Raises:
+            LLMTimeoutError, CircuitOpenError, TransientLLMError, OverloadedError or LLMError.
+        """
+        if self.provider is None:
+            raise LLMError('The LLM client has not been configured.')
+        deadline = time.monotonic() + (timeout or self.timeout)
+        self._count('calls')
+        attempt = 0
+        while True:
+            try:
+                trial = self.breaker.before_call()
+            except CircuitOpenError:
+                self._count('rejected')
+                raise
+            try:
+                with self._admission():
+                    response = self._attempt(prompt, deadline)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline, trial)
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._record_success(prompt, response)
+            return response
+
+    def _retry_delay(self, error, attempt, deadline, trial=False):
+        """
+        Records a failed attempt and returns how long to back off before the next one.
+        Raises the error to give up: timeouts, permanent errors and exhausted retries.
+        """
+        if isinstance(error, LLMTimeoutError):
+            self.breaker.record_failure()
+            self._count('timeouts')
+            raise error
+        if not is_transient(error):
+            # A rejected prompt or a shed call is not a sign of an unhealthy upstream
+            if trial:
+                self.breaker.release()
+            self._count('failures')
+            if isinstance(error, LLMError):
+                raise error
+            raise LLMError(str(error)) from error
+        self.breaker.record_failure()
+        delay = self._backoff(attempt)
+        if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+            self._count('failures')
+            raise TransientLLMError(str(error)) from error
+        self._count('retries')
+        return delay
+
+    def _count(self, name):
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    def _admission(self):
+        return self.scheduler.admit() if self.scheduler is not None else nullcontext()
+
+    def _record_success(self, prompt, response):
+        self.breaker.record_success()
+        self._count('successes')
+        self._observe(prompt, response)
+
+    def stream(self, prompt, timeout=None):
+        """Streams a prompt's answer. No retries are made once the first chunk has been sent."""
+        if self.scheduler is None:
+            yield from self._stream(prompt, timeout)
+            return
+        with self.scheduler.admit():
+            yield from self._stream(prompt, timeout)
+
+    def _stream(self, prompt, timeout):
+        trial = self.breaker.before_call()
+        LLM_PROMPT_CHARS.observe(len(prompt))
+        succeeded = False
+        try:
+            for chunk in self.provider.stream(prompt, timeout or self.timeout):
+                yield chunk
+            succeeded = True
+        except Exception as e:
+            if is_transient(e):
+                self.breaker.record_failure()
+            raise
+        finally:
+            # Also runs on GeneratorExit when the client disconnects mid-stream, so a
+            # half-open trial is never left in flight
+            if succeeded:
+                self.breaker.record_success()
+            elif trial:
+                self.breaker.release()
+
+    def _attempt(self, prompt, deadline):
+        started = time.monotonic()
+        remaining = deadline - started
+        if remaining <= 0:
+            raise LLMTimeoutError('The AI service did not respond in time.')
+        futures = {self._executor.submit(self.provider.generate, prompt, remaining)}
+
+        # Hedging: if the first request is slower than usual, race a duplicate against it
+        hedge_after = self._hedge_delay()
+        if hedge_after is not None and hedge_after < remaining:
+            done, _ = wait(futures, timeout=hedge_after)
+            if not done:
+                self._count('hedges')
+                futures.add(self._executor.submit(self.provider.generate, prompt, deadline - time.monotonic()))
+
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise LLMTimeoutError('The AI service did not respond in time.')
+            for future in done:
+                if future.exception() is None:
+                    self.latency.record(time.monotonic() - started)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _observe(self, prompt, response):
+        LLM_PROMPT_CHARS.observe(len(prompt))
+        LLM_RESPONSE_CHARS.observe(len(response.text or ''))
+        if response.prompt_tokens is not None:
+            LLM_TOKENS.observe(response.prompt_tokens, kind='prompt')
+        if response.response_tokens is not None:
+            LLM_TOKENS.observe(response.response_tokens, kind='response')
+        record_tokens(response.prompt_tokens, response.response_tokens)
+
+    def _hedge_delay(self):
+        if not self.hedge or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def _backoff(self, attempt):
+        # "Full jitter" exponential backoff
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def stats(self):
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return dict(counters, breaker_state=self.breaker.state,
+                    latency_p50=round(p50, 4) if p50 is not None else None,
+                    latency_p95=round(p95, 4) if p95 is not None else None)
+
+
+llm_client = LLMClient()
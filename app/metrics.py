@@ -0,0 +1,313 @@
+import collections
+import functools
+import hmac
+import itertools
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from flask import abort, current_app, g, has_request_context, request
+
+# Buckets in seconds, from cache hits to slow model calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Buckets for prompt/response sizes (characters) and token counts
+SIZE_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels."""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels.get(name, '')) for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name + _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Counts observations into cumulative buckets, Prometheus style."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        series = self._series.get(tuple(str(labels.get(name, '')) for name in self.labelnames))
+        return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield self.name + '_bucket' + _format_labels(self.labelnames, key, [('le', bound)]), cumulative
+            yield self.name + '_bucket' + _format_labels(self.labelnames, key, [('le', '+Inf')]), count
+            yield self.name + '_sum' + _format_labels(self.labelnames, key), total
+            yield self.name + '_count' + _format_labels(self.labelnames, key), count
+
+
+class Registry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text format.
+    Collectors are callables returning (name, type, help, [(labels, value), ...]) tuples,
+    used for values that already live elsewhere (e.g. cache and LLM client counters).
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = {}
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._metrics.setdefault(name, Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._metrics.setdefault(name, Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, name, collector):
+        # Keyed by name, so creating several apps in one process doesn't duplicate output
+        self._collectors[name] = collector
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(f'{sample} {_format_value(value)}' for sample, value in metric.samples())
+        for collector in self._collectors.values():
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    lines.append(name + _format_labels(list(labels), list(labels.values())) + ' ' + _format_value(value))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram('http_request_duration_seconds', 'Time spent handling HTTP requests.',
+                                     ['method', 'endpoint', 'status'])
+STAGE_SECONDS = registry.histogram('app_stage_duration_seconds', 'Time spent in each stage of request handling.',
+                                   ['stage'])
+LLM_PROMPT_CHARS = registry.histogram('llm_prompt_characters', 'Size of prompts sent to the model.',
+                                      buckets=SIZE_BUCKETS)
+LLM_RESPONSE_CHARS = registry.histogram('llm_response_characters', 'Size of model responses.',
+                                        buckets=SIZE_BUCKETS)
+LLM_TOKENS = registry.histogram('llm_tokens', 'Tokens per model call, as reported by the provider.',
+                                ['kind'], buckets=SIZE_BUCKETS)
+PROMPT_INPUT_TOKENS = registry.histogram('prompt_input_tokens', 'Estimated tokens of resume and job description '
+                                         'text per prompt, before and after compaction.', ['stage'],
+                                         buckets=SIZE_BUCKETS)
+ERRORS = registry.counter('app_errors_total', 'Errors by the stage they occurred in and their class.',
+                          ['stage', 'error'])
+
+
+def stats_collector(prefix, stats_by_name, label='name'):
+    """
+    Builds a collector exposing the numeric values of stats() dictionaries.
+    Args:
+        prefix: The metric name prefix, e.g. 'app_cache'.
+        stats_by_name: A callable returning {label value: stats dict}.
+        label: The label that tells the dictionaries apart.
+    """
+    def collect():
+        families = {}
+        for name, stats in stats_by_name().items():
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                families.setdefault(f'{prefix}_{key}', []).append(({label: name}, value))
+        for metric_name, samples in sorted(families.items()):
+            yield metric_name, 'gauge', f'{metric_name} as reported by stats().', samples
+    return collect
+
+
+@contextmanager
+def stage(name):
+    """
+    Times a block of work as a named stage. Inside a request the duration is also
+    added to the response's Server-Timing header. Exceptions are counted by class.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        ERRORS.inc(stage=name, error=type(e).__name__)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        if has_request_context():
+            g.setdefault('stage_timings', []).append((name, elapsed))
+
+
+def record_tokens(prompt_tokens, response_tokens):
+    """Adds a model call's token counts to the current request's totals, which are logged when it ends."""
+    if has_request_context():
+        totals = g.setdefault('llm_tokens', {'calls': 0, 'prompt': 0, 'response': 0})
+        totals['calls'] += 1
+        totals['prompt'] += prompt_tokens or 0
+        totals['response'] += response_tokens or 0
+
+
+def operators_only(view):
+    """
+    Restricts a view to operators: the request must carry METRICS_TOKEN as a bearer token.
+    Without a configured token the view refuses every request, since behind a reverse proxy
+    the client address says nothing about where a request came from.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('METRICS_TOKEN')
+        if not token or not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's stack at a fixed interval from a background thread, and
+    reports the result as collapsed stacks ("frame;frame;frame count"), the input
+    format of flame graph tools.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            self.stacks[';'.join(f'{f.name} ({f.filename}:{f.lineno})' for f in stack)] += 1
+
+    def collapsed(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common()) + '\n'
+
+
+class Metrics:
+    """
+    Flask integration: times every request, adds the Server-Timing header and, when
+    METRICS_PROFILING is enabled, profiles requests sent with ?profile=1 or an
+    X-Profile: 1 header. Profiles are kept in memory and served by id.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.profiling = False
+        self.profile_interval = 0.005
+        self.profiles = collections.deque(maxlen=20)
+        self._profile_ids = itertools.count(1)
+
+    def init_app(self, app):
+        self.profiling = app.config.get('METRICS_PROFILING', False)
+        self.profile_interval = app.config.get('METRICS_PROFILE_INTERVAL', self.profile_interval)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.extensions['metrics'] = self
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+        if self.profiling and (request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'):
+            g.profiler = SamplingProfiler(threading.get_ident(), self.profile_interval).start()
+
+    def _after_request(self, response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(elapsed, method=request.method, endpoint=endpoint, status=response.status_code)
+
+        timings = g.pop('stage_timings', [])
+        response.headers['Server-Timing'] = ', '.join(
+            [f'{name};dur={seconds * 1000:.1f}' for name, seconds in timings] + [f'total;dur={elapsed * 1000:.1f}']
+        )
+
+        tokens = g.pop('llm_tokens', None)
+        if tokens:
+            current_app.logger.info('%s %s: %d model calls, %d prompt tokens, %d response tokens',
+                                    request.method, endpoint, tokens['calls'], tokens['prompt'], tokens['response'])
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profile_id = str(next(self._profile_ids))
+            self.profiles.append((profile_id, profiler.stop().collapsed()))
+            response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    def get_profile(self, profile_id):
+        return next((collapsed for pid, collapsed in self.profiles if pid == profile_id), None)
+
+
+metrics = Metrics(registry)
@@ -1,13 +1,22 @@
-from app import db, login_manager
+from app import db
+from app.database import CompressedText
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import json
 
 
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+def _memoized_json(instance, attr):
+    """
+    Decodes a JSON column once per instance. The decoded value is reused until
+    the column is assigned a new value.
+    """
+    raw = getattr(instance, attr)
+    memo = instance.__dict__.setdefault('_decoded_json', {})
+    cached = memo.get(attr)
+    if cached is None or cached[0] is not raw:
+        cached = memo[attr] = (raw, json.loads(raw) if raw else {})
+    return cached[1]
 
 
 class User(UserMixin, db.Model):
@@ -34,11 +43,14 @@ class Resume(db.Model):
     original_filename = db.Column(db.String(128))
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
 
-    # Store the large, structured resume data as a JSON string in a Text field
-    structured_data_json = db.Column(db.Text)
+    # Hash of the normalized resume text; one Resume row per distinct resume and user
+    content_hash = db.Column(db.String(64), index=True)
+
+    # Store the large, structured resume data as a JSON string, compressed on disk
+    structured_data_json = db.Column(CompressedText)
 
     # Foreign key to link to the User who owns this resume
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
 
     # This relationship links a Resume to all its Analyses
     analyses = db.relationship('Analysis', backref='resume', lazy='dynamic', cascade="all, delete-orphan")
@@ -46,7 +58,7 @@ class Resume(db.Model):
     # Property to easily get the structured data back as a Python dictionary
     @property
     def structured_data(self):
-        return json.loads(self.structured_data_json) if self.structured_data_json else {}
+        return _memoized_json(self, 'structured_data_json')
 
     def __repr__(self):
         return f'<Resume {self.original_filename}>'
@@ -54,18 +66,60 @@ class Resume(db.Model):
 
 class Analysis(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    job_description = db.Column(db.Text)
+    job_description = db.Column(CompressedText)
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
 
-    # Store the AI's analysis results as a JSON string
-    analysis_data_json = db.Column(db.Text)
+    # Store the AI's analysis results as a JSON string, compressed on disk
+    analysis_data_json = db.Column(CompressedText)
+
+    # Copied out of the JSON and the JD at write time so listings never deserialize the blob
+    match_score = db.Column(db.Integer, index=True)
+    jd_title = db.Column(db.String(120))
 
     # Foreign key to link to the Resume that was analyzed
-    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), index=True)
 
     @property
     def analysis_data(self):
-        return json.loads(self.analysis_data_json) if self.analysis_data_json else {}
+        return _memoized_json(self, 'analysis_data_json')
 
     def __repr__(self):
         return f'<Analysis for Resume {self.resume_id}>'
+
+
+class AnalysisJob(db.Model):
+    """A queued /api/analyze request, persisted so results survive a worker restart."""
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(16), index=True, nullable=False, default='queued')
+    original_filename = db.Column(db.String(128))
+    resume_text = db.Column(db.Text)
+    job_description = db.Column(db.Text)
+    result_json = db.Column(db.Text)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # The owner, if the job was submitted by a logged-in user
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+
+    # The submitter's address, which the scheduler uses as the key of anonymous users
+    client_address = db.Column(db.String(45))
+
+    @property
+    def result(self):
+        return json.loads(self.result_json) if self.result_json else {}
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def to_dict(self):
+        data = {'job_id': self.id, 'status': self.status}
+        if self.status == 'done':
+            data['result'] = self.result
+        elif self.status == 'failed':
+            data['error'] = self.error
+        return data
+
+    def __repr__(self):
+        return f'<AnalysisJob {self.id} {self.status}>'
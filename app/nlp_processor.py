@@ -1,20 +1,27 @@
-import os
 import json
-import google.generativeai as genai
-from dotenv import load_dotenv
+from .cache import ai_cache, make_cache_key
+from .scoring import score_resume
+from .llm import llm_client, LLMError
+from .metrics import stage, PROMPT_INPUT_TOKENS
+from .compaction import compact_inputs, compact_resume, estimate_tokens
 
-load_dotenv()
+MODEL_NAME = 'models/gemini-1.5-flash'
 
-try:
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not found in .env file")
-    genai.configure(api_key=api_key)
-except ValueError as e:
-    print(f"Error: {e}")
+# Bump this whenever a prompt changes so stale cached results are not reused
+PROMPT_VERSION = '4'
 
 
-def get_combined_prompt(resume_text, jd_text):
+def get_keyword_hint(missing_keywords):
+    """Describes the locally pre-computed missing keywords so the model can start from them."""
+    if not missing_keywords:
+        return ""
+    return (
+        "A local keyword scan found these job description keywords missing from the resume: "
+        f"{', '.join(missing_keywords)}. Verify this list and refine it rather than starting from scratch."
+    )
+
+
+def get_combined_prompt(resume_text, jd_text, missing_keywords=None):
     """Creates a single, combined prompt for parsing and analysis."""
     return f"""
     You are an expert ATS and a highly accurate resume parsing system.
@@ -37,6 +44,8 @@ def get_combined_prompt(resume_text, jd_text):
       - "education": [{{ "degree": "string", "institution": "string", "location": "string", "graduation_date": "string" }}]
       - "skills": ["string", ...]
 
+    {get_keyword_hint(missing_keywords)}
+
     Job Description:
     ```
     {jd_text}
@@ -51,51 +60,257 @@ def get_combined_prompt(resume_text, jd_text):
     """
 
 
+def get_analysis_prompt(resume_text, jd_text, missing_keywords=None):
+    """Creates the lighter, analysis-only prompt used once the resume has been parsed."""
+    return f"""
+    You are an expert ATS.
+    Your task is to analyze the following resume against the job description.
+    Provide a single JSON object as your response. Do not include any explanatory text before or after the JSON object.
+
+    The JSON object must contain:
+      - "match_score": An integer from 0-100.
+      - "missing_keywords": A list of strings.
+      - "resume_suggestions": A list of objects, each with "original" and "rewritten" keys.
+      - "cover_letter_themes": A list of strings.
+
+    {get_keyword_hint(missing_keywords)}
+
+    Job Description:
+    ```
+    {jd_text}
+    ```
+
+    Resume Text:
+    ```
+    {resume_text}
+    ```
+
+    Now, provide the analysis in the specified JSON format.
+    """
+
+
+def get_structure_prompt(resume_text):
+    """Creates a parsing-only prompt that extracts the resume's structure."""
+    return f"""
+    You are a highly accurate resume parsing system.
+    Your task is to parse the structure of the following resume.
+    Provide a single JSON object as your response. Do not include any explanatory text before or after the JSON object.
+
+    The JSON object must contain:
+      - "full_name": "string"
+      - "contact_info": {{ "email": "string", "phone": "string", "linkedin": "string", "address": "string" }}
+      - "summary": "string"
+      - "work_experience": [{{ "job_title": "string", "company": "string", "location": "string", "dates": "string", "responsibilities": ["string", ...] }}]
+      - "education": [{{ "degree": "string", "institution": "string", "location": "string", "graduation_date": "string" }}]
+      - "skills": ["string", ...]
+
+    Resume Text:
+    ```
+    {resume_text}
+    ```
+
+    Now, provide the parsed resume in the specified JSON format.
+    """
+
+
+def compact_prompt_inputs(resume_text, jd_text=None):
+    """
+    The resume and job description text as it goes into a prompt: cleaned up, without
+    duplicate lines or legal boilerplate, and within the prompt's token budget.
+    Returns:
+        A (resume_text, jd_text) tuple; jd_text stays None for resume-only prompts.
+    """
+    with stage('compact'):
+        if jd_text is None:
+            compacted = (compact_resume(resume_text), None)
+        else:
+            compacted = compact_inputs(resume_text, jd_text)
+    PROMPT_INPUT_TOKENS.observe(estimate_tokens(resume_text) + estimate_tokens(jd_text), stage='raw')
+    PROMPT_INPUT_TOKENS.observe(estimate_tokens(compacted[0]) + estimate_tokens(compacted[1]), stage='compacted')
+    return compacted
+
+
+def resume_content_hash(resume_text):
+    """Identifies a resume by its normalized text, so re-uploads of the same resume match."""
+    return make_cache_key(resume_text)
+
+
+def _structured_resume_cache_key(resume_text):
+    return make_cache_key('structured_resume', resume_content_hash(resume_text), PROMPT_VERSION, MODEL_NAME)
+
+
+def ai_error(message, e):
+    """
+    Builds the error dictionary returned by the AI functions.
+    "status" is the HTTP status the routes should answer with.
+    """
+    if isinstance(e, LLMError):
+        status = e.status
+    elif isinstance(e, ValueError):
+        # The model answered, but not with the JSON we asked for
+        status = 502
+    else:
+        status = 500
+    error = {"error": f"{message} Details: {e}", "status": status}
+    if getattr(e, 'retry_after', None):
+        error["retry_after"] = e.retry_after
+    return error
+
+
+def extract_json(response_text):
+    """
+    Parses a model answer that should be a JSON object, ignoring Markdown code fences.
+    Raises:
+        ValueError: If the answer is not valid JSON.
+    """
+    cleaned_response = response_text.strip().replace("```json", "").replace("```", "")
+    return json.loads(cleaned_response)
+
+
+def _generate_json(prompt, cache_key):
+    """Sends a prompt that expects a JSON answer, going through the result cache."""
+    with stage('ai_cache'):
+        cached = ai_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    with stage('llm'):
+        response = llm_client.generate(prompt)
+
+    with stage('json'):
+        data = extract_json(response.text)
+    ai_cache.set(cache_key, data)
+    return data
+
+
+def _combined_request(resume_text, jd_text):
+    """
+    The combined prompt and its cache key. The local pre-scan gives the model a head start on keywords.
+    The key is built from the compacted text, so inputs that differ only in what compaction removes share it.
+    """
+    resume_text, jd_text = compact_prompt_inputs(resume_text, jd_text)
+    missing_keywords = score_resume(resume_text, jd_text)['missing_keywords']
+    return (get_combined_prompt(resume_text, jd_text, missing_keywords),
+            make_cache_key(resume_text, jd_text, PROMPT_VERSION, MODEL_NAME))
+
+
+def _analysis_request(resume_text, jd_text):
+    """The analysis-only prompt and its cache key."""
+    resume_text, jd_text = compact_prompt_inputs(resume_text, jd_text)
+    missing_keywords = score_resume(resume_text, jd_text)['missing_keywords']
+    return (get_analysis_prompt(resume_text, jd_text, missing_keywords),
+            make_cache_key('analysis', resume_text, jd_text, PROMPT_VERSION, MODEL_NAME))
+
+
 #AI Function
-def get_combined_ai_data(resume_text, jd_text):
+def get_combined_ai_data(resume_text, jd_text, structured_resume=None):
     """
-    Sends the resume and JD to the Gemini API for combined analysis and parsing.
+    Sends the resume and JD to the Gemini API for analysis and, if needed, parsing.
+    The resume structure is parsed only once per resume content: when it is passed in
+    (e.g. from a stored Resume) or was parsed before, only the lighter analysis prompt is sent.
+    Results are cached by content, so repeat analyses skip the API call.
     Returns:
         A Python dictionary with all data, or an error dictionary.
     """
-    try:
-        model = genai.GenerativeModel('models/gemini-1.5-flash')
-        prompt = get_combined_prompt(resume_text, jd_text)
-
-        response = model.generate_content(prompt)
+    if not structured_resume:
+        structured_resume = ai_cache.get(_structured_resume_cache_key(resume_text))
 
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
+    if structured_resume:
+        analysis_results = get_ai_analysis(resume_text, jd_text)
+        if 'error' in analysis_results:
+            return analysis_results
+        return {"analysis_results": analysis_results, "structured_resume": structured_resume}
 
-        full_data = json.loads(cleaned_response)
+    try:
+        full_data = _generate_json(*_combined_request(resume_text, jd_text))
+        if full_data.get('structured_resume'):
+            ai_cache.set(_structured_resume_cache_key(resume_text), full_data['structured_resume'])
         return full_data
 
     except Exception as e:
         print(f"An error occurred during combined AI processing: {e}")
-        return {"error": f"Failed to get data from AI. Details: {e}"}
+        return ai_error("Failed to get data from AI.", e)
+
+
+def get_fast_analysis(resume_text, jd_text, structured_resume=None):
+    """
+    Analyzes the resume locally without calling the Gemini API.
+    Returns:
+        A dictionary in the same shape as get_combined_ai_data, without AI suggestions.
+    """
+    local = score_resume(resume_text, jd_text)
+    return {
+        "analysis_results": {
+            "match_score": local['match_score'],
+            "missing_keywords": local['missing_keywords'],
+            "resume_suggestions": [],
+            "cover_letter_themes": [],
+        },
+        "structured_resume": structured_resume or ai_cache.get(_structured_resume_cache_key(resume_text)) or {},
+        "mode": "fast",
+    }
 
 
 
 def generate_full_cover_letter(resume_text, jd_text):
     """Sends a request to the Gemini API to generate a full cover letter."""
     try:
-        model = genai.GenerativeModel('models/gemini-1.5-flash')
-        prompt = get_cover_letter_prompt(resume_text, jd_text)
+        prompt = _cover_letter_prompt(resume_text, jd_text)
 
-        response = model.generate_content(prompt)
+        response = llm_client.generate(prompt)
 
         return response.text
 
     except Exception as e:
         print(f"An error occurred during cover letter generation: {e}")
-        return {"error": f"Failed to generate cover letter from AI. Details: {e}"}
+        return ai_error("Failed to generate cover letter from AI.", e)
+
+
+def stream_cover_letter(resume_text, jd_text):
+    """
+    Streams a cover letter from the Gemini API as it is generated.
+    Yields:
+        Text chunks in the order the model produces them. Errors are raised to the caller.
+    """
+    prompt = _cover_letter_prompt(resume_text, jd_text)
+
+    yield from llm_client.stream(prompt)
 
 
-def get_ai_analysis():
-    return None
+def _cover_letter_prompt(resume_text, jd_text):
+    return get_cover_letter_prompt(*compact_prompt_inputs(resume_text, jd_text))
 
 
-def get_structured_resume():
-    return None
+def cover_letter_cache_key(resume_text, jd_text):
+    """The cache key under which a finished cover letter is kept for later viewing."""
+    return make_cache_key('cover_letter', resume_text, jd_text, PROMPT_VERSION, MODEL_NAME)
+
+
+def get_ai_analysis(resume_text, jd_text):
+    """
+    Sends only the analysis prompt, for resumes whose structure is already known.
+    Returns:
+        The "analysis_results" dictionary, or an error dictionary.
+    """
+    try:
+        return _generate_json(*_analysis_request(resume_text, jd_text))
+    except Exception as e:
+        print(f"An error occurred during AI analysis: {e}")
+        return ai_error("Failed to get analysis from AI.", e)
+
+
+def get_structured_resume(resume_text):
+    """
+    Sends only the parsing prompt. The result is cached per resume content.
+    Returns:
+        The "structured_resume" dictionary, or an error dictionary.
+    """
+    try:
+        prompt = get_structure_prompt(compact_prompt_inputs(resume_text)[0])
+        return _generate_json(prompt, _structured_resume_cache_key(resume_text))
+    except Exception as e:
+        print(f"An error occurred during resume parsing: {e}")
+        return ai_error("Failed to parse resume with AI.", e)
 
 
 def get_cover_letter_prompt(resume_text, jd_text):
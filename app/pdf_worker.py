@@ -0,0 +1,108 @@
+import io
+import os
+from .process_pool import ProcessPool, WorkerCrashedError, WorkerTimeoutError
+
+
+class PDFExtractionError(Exception):
+    """Raised when a PDF can't be extracted. The message is safe to show to users."""
+    status = 400
+
+
+class PDFTooLargeError(PDFExtractionError):
+    status = 413
+
+
+class PDFTimeoutError(PDFExtractionError):
+    status = 422
+
+
+def extract_pdf_text(data, max_pages=None, mode='layout'):
+    """
+    Extracts the text of a PDF held in memory or in a file.
+    Args:
+        data: The raw bytes of the PDF, or the path of a PDF file (read in place, not copied).
+        max_pages: Only this many pages are read (None for all, 0 for none).
+        mode: 'layout' runs pdfplumber's layout analysis; 'fast' reads the text layer
+              with pdfium, which is much cheaper when character positions aren't needed.
+    Returns:
+        The text of each page, joined by newlines.
+    """
+    chunks = []
+    if mode == 'fast':
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(data)
+        try:
+            page_count = len(pdf) if max_pages is None else min(len(pdf), max_pages)
+            for index in range(page_count):
+                page = pdf[index]
+                text_page = page.get_textpage()
+                chunks.append(text_page.get_text_range())
+                text_page.close()
+                page.close()
+        finally:
+            pdf.close()
+    else:
+        import pdfplumber
+        with pdfplumber.open(io.BytesIO(data) if isinstance(data, bytes) else data) as pdf:
+            for page in pdf.pages[:max_pages]:
+                page_text = page.extract_text()
+                if page_text:
+                    chunks.append(page_text)
+                # Release the parsed layout of pages we are done with
+                page.close()
+    return '\n'.join(chunks)
+
+
+class PDFWorkerPool:
+    """
+    Runs PDF extraction in a dedicated process pool, isolated from request threads.
+    Each document gets a wall-clock timeout and page/byte caps, workers have a memory
+    limit, and each worker is replaced after PDF_WORKER_MAX_JOBS documents.
+    Set PDF_WORKERS to 0 to extract inline (e.g. in tests).
+    """
+
+    def __init__(self):
+        self.timeout = 20
+        self.max_pages = 30
+        self.max_bytes = 10 * 1024 * 1024
+        self.mode = 'layout'
+        self.processes = ProcessPool(workers=2, max_tasks_per_child=100, memory_limit_mb=1024)
+
+    def init_app(self, app):
+        config = app.config
+        processes = self.processes
+        processes.workers = config.get('PDF_WORKERS', processes.workers)
+        processes.max_tasks_per_child = config.get('PDF_WORKER_MAX_JOBS', processes.max_tasks_per_child)
+        processes.memory_limit_mb = config.get('PDF_WORKER_MEMORY_MB', processes.memory_limit_mb)
+        self.timeout = config.get('PDF_TIMEOUT', self.timeout)
+        self.max_pages = config.get('PDF_MAX_PAGES', self.max_pages)
+        self.max_bytes = config.get('PDF_MAX_BYTES', self.max_bytes)
+        self.mode = config.get('PDF_EXTRACTION_MODE', self.mode)
+        app.extensions['pdf_pool'] = self
+
+    def extract(self, data, mode=None):
+        """
+        Extracts a PDF's text in a worker process. `data` is the PDF's bytes or the path of
+        a PDF file; a path is much cheaper to send to the worker.
+        Raises:
+            PDFTooLargeError, PDFTimeoutError or PDFExtractionError.
+        """
+        size = len(data) if isinstance(data, bytes) else os.path.getsize(data)
+        if size > self.max_bytes:
+            raise PDFTooLargeError(f'PDF files must be smaller than {self.max_bytes // (1024 * 1024)} MB.')
+        mode = mode or self.mode
+        try:
+            return self.processes.run(extract_pdf_text, data, self.max_pages, mode, timeout=self.timeout)
+        except WorkerTimeoutError:
+            raise PDFTimeoutError('The PDF took too long to process. Please try a simpler file.')
+        except WorkerCrashedError:
+            # Most likely the worker hit its memory limit
+            raise PDFExtractionError('The PDF could not be processed.')
+        except Exception as e:
+            raise PDFExtractionError('Could not read the PDF file.') from e
+
+    def shutdown(self):
+        self.processes.shutdown()
+
+
+pdf_pool = PDFWorkerPool()
@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+import threading
+import time
+
+
+class WorkerTimeoutError(Exception):
+    """Raised when a call doesn't finish in time. Its worker, if it had one, was killed."""
+
+
+class WorkerCrashedError(Exception):
+    """Raised when the worker process died during a call, e.g. at its memory limit."""
+
+
+def _get_context():
+    # Forking this process would copy its threads' held locks (job workers, the AI
+    # scheduler, gRPC) and its address space into the worker, so workers start from a
+    # fresh interpreter instead. The fork server only preloads this module, not __main__
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _limit_memory(memory_limit_mb):
+    """Caps the address space of a worker process so hostile input can't exhaust memory."""
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"Could not set the worker memory limit: {e}")
+
+
+def _worker_main(conn, memory_limit_mb):
+    _limit_memory(memory_limit_mb)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        func, args = task
+        try:
+            result = (True, func(*args))
+        except Exception as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            # The result or the exception couldn't be pickled
+            conn.send((False, RuntimeError(str(e))))
+
+
+class _Worker:
+    def __init__(self, context, memory_limit_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.calls = 0
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+            self.process.join(timeout=5)
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.conn.close()
+
+
+class ProcessPool:
+    """
+    A small pool of worker processes for CPU-heavy work on untrusted input. Each worker
+    runs one call at a time: a call that overruns its timeout kills only its own worker,
+    a worker that dies fails only its own call, and each worker is replaced after
+    `max_tasks_per_child` calls. Workers start on first use from a fresh interpreter
+    (forkserver or spawn), never as a fork of the app process, and have their address
+    space capped at `memory_limit_mb`. With `workers` set to 0, calls run inline.
+    """
+
+    def __init__(self, workers=2, max_tasks_per_child=None, memory_limit_mb=None):
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.memory_limit_mb = memory_limit_mb
+        self._context = None
+        self._idle = []
+        self._started = 0
+        self._pid = None
+        self._cond = threading.Condition()
+
+    def run(self, func, *args, timeout=None):
+        """
+        Calls func(*args) in a worker process and returns its result. `func`, its arguments
+        and its result must be picklable, and func must be importable by the worker.
+        Raises:
+            WorkerTimeoutError, WorkerCrashedError, or the exception raised by func.
+        """
+        if not self.workers:
+            return func(*args)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        worker = self._checkout(deadline)
+        try:
+            worker.conn.send((func, args))
+            if not worker.conn.poll(None if deadline is None else max(0.0, deadline - time.monotonic())):
+                # The only way to stop a runaway call is to kill its worker
+                self._retire(worker, kill=True)
+                raise WorkerTimeoutError('The call did not finish in time.')
+            succeeded, value = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._retire(worker, kill=True)
+            raise WorkerCrashedError('The worker process died.') from e
+        except WorkerTimeoutError:
+            raise
+        except BaseException:
+            self._retire(worker, kill=True)
+            raise
+        self._checkin(worker)
+        if not succeeded:
+            raise value
+        return value
+
+    def _checkout(self, deadline):
+        with self._cond:
+            if self._pid != os.getpid():
+                # Workers started before a fork belong to the parent
+                self._idle, self._started, self._pid = [], 0, os.getpid()
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.process.is_alive():
+                        return worker
+                    worker.conn.close()
+                    self._started -= 1
+                if self._started < self.workers:
+                    self._started += 1
+                    break
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise WorkerTimeoutError('No worker became free in time.')
+                self._cond.wait(remaining)
+        try:
+            if self._context is None:
+                self._context = _get_context()
+            return _Worker(self._context, self.memory_limit_mb)
+        except BaseException:
+            with self._cond:
+                self._started -= 1
+                self._cond.notify()
+            raise
+
+    def _checkin(self, worker):
+        worker.calls += 1
+        if self.max_tasks_per_child and worker.calls >= self.max_tasks_per_child:
+            # Replace the worker to return any memory fragmented by previous calls
+            self._retire(worker)
+            return
+        with self._cond:
+            self._idle.append(worker)
+            self._cond.notify()
+
+    def _retire(self, worker, kill=False):
+        worker.stop(kill)
+        with self._cond:
+            self._started -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {'workers': self._started, 'idle': len(self._idle)}
+
+    def shutdown(self):
+        """Stops the idle workers."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+        for worker in idle:
+            worker.stop()
@@ -1,12 +1,27 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, session, Response, jsonify, abort
+from flask import Blueprint, render_template, request, flash, redirect, url_for, session, Response, jsonify, abort, stream_with_context, current_app
 from .utils import get_text_from_file, allowed_file
-from .nlp_processor import get_ai_analysis, generate_full_cover_letter, get_structured_resume, get_combined_ai_data
+from .nlp_processor import get_ai_analysis, get_structured_resume
+from .nlp_processor import stream_cover_letter, cover_letter_cache_key, get_fast_analysis
+from .nlp_processor import get_combined_ai_data, generate_full_cover_letter
 from .forms import RegistrationForm, LoginForm
-from .models import User, Resume, Analysis
+from .models import User, Analysis, AnalysisJob
+from .cache import ai_cache, text_cache
+from .llm import llm_client
+from .scheduler import scheduler
+from .identity import user_cache
+from .pdf_worker import PDFExtractionError
+from .docx_export import docx_exporter, DOCXExportError
+from .designer import design_renderer
+from .jobs import job_queue, QueueFullError
+from .services import save_analysis, get_stored_structure, get_dashboard_page
+from .search import search_analyses
+from .metrics import metrics, registry, stage, operators_only
 from app import db
-import io, json
-from html2docx import Html2Docx
+import json, time
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask_login import current_user, login_user, logout_user, login_required
+from werkzeug.exceptions import HTTPException
 
 main = Blueprint('main', __name__)
 
@@ -18,11 +33,52 @@ def index():
 
 @main.route('/api/analyze', methods=['POST'])
 def api_analyze():
-    if 'resume' not in request.files or 'job_description' not in request.form:
+    try:
+        prepared = _prepare_analysis()
+        if not isinstance(prepared, dict):
+            return prepared
+
+        # --- ONE EFFICIENT AI CALL ---
+        with stage('ai'), scheduler.request_class(prepared['user_id'] or request.remote_addr, 'interactive'):
+            full_data = get_combined_ai_data(prepared['resume_text'], prepared['jd_text'],
+                                             prepared['structured_resume'])
+
+        if 'error' in full_data:
+            return _ai_error_response(full_data)
+
+        if prepared['user_id'] is not None:
+            with stage('db'):
+                _save_analysis(prepared, full_data)
+
+        # We now return the nested structure
+        _remember_analysis(full_data, prepared['resume_text'], prepared['jd_text'])
+
+        return jsonify(full_data)
+
+    except Exception as e:
+        print(f"An unexpected error in /api/analyze: {e}")
+        return jsonify({'error': f'An unexpected server error occurred: {e}'}), 500
+
+
+def _prepare_analysis():
+    """
+    Validates an /api/analyze upload and extracts the resume text. Fast-mode and queued
+    (async=1) requests are answered here in full.
+    Returns:
+        A dictionary describing the analysis to run, or the response to send.
+    """
+    # The multipart body is read and parsed on first access; a file of the wrong type or
+    # size is refused while it streams in (see UploadRequest)
+    with stage('upload'):
+        try:
+            files, form = request.files, request.form
+        except HTTPException as e:
+            return jsonify({'error': e.description}), e.code
+    if 'resume' not in files or 'job_description' not in form:
         return jsonify({'error': 'Missing form data.'}), 400
 
-    resume_file = request.files['resume']
-    jd_text = request.form.get('job_description', '').strip()
+    resume_file = files['resume']
+    jd_text = form.get('job_description', '').strip()
 
     if resume_file.filename == '' or not jd_text:
         return jsonify({'error': 'Resume file and job description are required.'}), 400
@@ -31,45 +87,223 @@ def api_analyze():
         return jsonify({'error': 'Invalid file type. Please upload a .pdf or .docx file.'}), 400
 
     try:
-        resume_text = get_text_from_file(resume_file)
-        if not resume_text:
-            return jsonify({'error': 'Could not parse the resume file.'}), 400
+        with stage('extract'):
+            resume_text = get_text_from_file(resume_file)
+    except PDFExtractionError as e:
+        return jsonify({'error': str(e)}), e.status
+    if not resume_text:
+        return jsonify({'error': 'Could not parse the resume file.'}), 400
+
+    user_id = current_user.id if current_user.is_authenticated else None
+    fast_mode = request.values.get('mode') == 'fast'
+
+    # Async mode: queue the AI call and let the client poll or subscribe for the result
+    if request.values.get('async') in ('1', 'true') and not fast_mode:
+        try:
+            job = job_queue.submit(resume_text, jd_text, resume_file.filename, user_id, request.remote_addr)
+        except QueueFullError as e:
+            return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': url_for('main.job_status', job_id=job.id),
+            'events_url': url_for('main.job_events', job_id=job.id)
+        }), 202
+
+    # A resume the user has analyzed before is not parsed again
+    with stage('lookup'):
+        structured_resume = get_stored_structure(user_id, resume_text)
+
+    if fast_mode:
+        # Local scoring only: no Gemini call, returns in milliseconds
+        with stage('ai'):
+            full_data = get_fast_analysis(resume_text, jd_text, structured_resume)
+        if user_id is not None:
+            with stage('db'):
+                save_analysis(user_id, resume_file.filename, resume_text, jd_text, full_data)
+                db.session.commit()
+        _remember_analysis(full_data, resume_text, jd_text)
+        return jsonify(full_data)
 
-        # --- ONE EFFICIENT AI CALL ---
-        full_data = get_combined_ai_data(resume_text, jd_text)
+    return {'resume_text': resume_text, 'jd_text': jd_text, 'filename': resume_file.filename,
+            'user_id': user_id, 'structured_resume': structured_resume}
 
-        if 'error' in full_data:
-            return jsonify({'error': 'An error occurred during AI processing.'}), 500
-
-        # Extract the two parts from the response
-        analysis_results = full_data.get('analysis_results', {})
-        structured_data = full_data.get('structured_resume', {})
-
-        if current_user.is_authenticated:
-            new_resume = Resume(
-                original_filename=resume_file.filename,
-                structured_data_json=json.dumps(structured_data),
-                author=current_user
-            )
-            db.session.add(new_resume)
-            new_analysis = Analysis(
-                job_description=jd_text,
-                analysis_data_json=json.dumps(analysis_results),
-                resume=new_resume
-            )
-            db.session.add(new_analysis)
-            db.session.commit()
 
-        # We now return the nested structure
-        session['structured_resume'] = structured_data
-        session['original_resume_text'] = resume_text
-        session['original_jd_text'] = jd_text
+def _save_analysis(prepared, full_data):
+    save_analysis(prepared['user_id'], prepared['filename'], prepared['resume_text'], prepared['jd_text'], full_data)
+    db.session.commit()
 
-        return jsonify(full_data)
 
-    except Exception as e:
-        print(f"An unexpected error in /api/analyze: {e}")
-        return jsonify({'error': f'An unexpected server error occurred: {e}'}), 500
+@main.route('/api/analyze/batch', methods=['POST'])
+def api_analyze_batch():
+    """
+    Analyzes one resume against many job descriptions. The file is parsed once, the AI
+    calls run concurrently, and results are streamed back as NDJSON as each one completes.
+    """
+    try:
+        resume_file = request.files.get('resume')
+    except HTTPException as e:
+        return jsonify({'error': e.description}), e.code
+    jd_texts = [jd.strip() for jd in request.form.getlist('job_description') if jd.strip()]
+    if 'job_descriptions' in request.form:
+        try:
+            jd_texts += [jd.strip() for jd in json.loads(request.form['job_descriptions']) if jd.strip()]
+        except (ValueError, TypeError, AttributeError):
+            return jsonify({'error': 'job_descriptions must be a JSON list of strings.'}), 400
+
+    if resume_file is None or resume_file.filename == '' or not jd_texts:
+        return jsonify({'error': 'A resume file and at least one job description are required.'}), 400
+    max_jobs = current_app.config['BATCH_MAX_JOBS']
+    if len(jd_texts) > max_jobs:
+        return jsonify({'error': f'A batch can contain at most {max_jobs} job descriptions.'}), 400
+    if not allowed_file(resume_file.filename):
+        return jsonify({'error': 'Invalid file type. Please upload a .pdf or .docx file.'}), 400
+
+    try:
+        resume_text = get_text_from_file(resume_file)
+    except PDFExtractionError as e:
+        return jsonify({'error': str(e)}), e.status
+    if not resume_text:
+        return jsonify({'error': 'Could not parse the resume file.'}), 400
+
+    user_id = current_user.id if current_user.is_authenticated else None
+    filename = resume_file.filename
+    structured_resume = get_stored_structure(user_id, resume_text)
+    concurrency = current_app.config['BATCH_CONCURRENCY']
+    client_key = user_id or request.remote_addr
+
+    def generate():
+        results = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as executor, scheduler.request_class(client_key, 'batch'):
+            def submit(fn, *args):
+                # Each call runs in a copy of this context, so the scheduler knows whose batch it is
+                return executor.submit(copy_context().run, fn, *args)
+
+            # The resume is parsed at most once, alongside the analysis-only calls
+            parse_future = None if structured_resume else submit(get_structured_resume, resume_text)
+            futures = {submit(get_ai_analysis, resume_text, jd): i for i, jd in enumerate(jd_texts)}
+            for future in as_completed(futures):
+                index = futures[future]
+                analysis_results = future.result()
+                if 'error' in analysis_results:
+                    line = {'index': index, 'error': 'An error occurred during AI processing.'}
+                else:
+                    results[index] = analysis_results
+                    line = {'index': index, 'analysis_results': analysis_results}
+                yield json.dumps(line) + '\n'
+            structure = structured_resume or parse_future.result()
+
+        if 'error' in structure:
+            structure = {}
+        if user_id is not None and results:
+            # All analyses of the batch are written in a single transaction
+            for index in sorted(results):
+                save_analysis(user_id, filename, resume_text, jd_texts[index],
+                              {'analysis_results': results[index], 'structured_resume': structure})
+            db.session.commit()
+        yield json.dumps({'done': True, 'completed': len(results), 'total': len(jd_texts),
+                          'structured_resume': structure}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def _ai_error_response(error):
+    """Turns an AI error dictionary into a JSON response with a meaningful status code."""
+    status = error.get('status', 500)
+    messages = {
+        429: 'The AI service is busy. Please try again shortly.',
+        503: 'The AI service is temporarily unavailable. Please try again shortly.',
+        504: 'The AI service took too long to respond. Please try again.',
+    }
+    response = jsonify({'error': messages.get(status, 'An error occurred during AI processing.')})
+    headers = {'Retry-After': str(error.get('retry_after', 30))} if status in (429, 503) else {}
+    return response, status, headers
+
+
+def _remember_analysis(full_data, resume_text, jd_text):
+    """Keeps the latest analysis in the session for the designer and cover letter pages."""
+    session['structured_resume'] = full_data.get('structured_resume', {})
+    session['original_resume_text'] = resume_text
+    session['original_jd_text'] = jd_text
+
+
+def _get_job_or_404(job_id):
+    job = db.session.get(AnalysisJob, job_id)
+    # Jobs owned by a user are only visible to that user
+    if job is None or (job.user_id is not None and
+                       (not current_user.is_authenticated or job.user_id != current_user.id)):
+        abort(404)
+    return job
+
+
+@main.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = _get_job_or_404(job_id)
+    if job.status == 'done':
+        _remember_analysis(job.result, job.resume_text, job.job_description)
+    return jsonify(job.to_dict())
+
+
+@main.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    _get_job_or_404(job_id)
+    timeout = current_app.config['JOB_EVENTS_TIMEOUT']
+    poll_interval = current_app.config['JOB_EVENTS_POLL_INTERVAL']
+    # The stream holds a server thread, so it is kept short; EventSource reconnects by itself
+    db.session.remove()
+
+    def generate():
+        deadline = time.monotonic() + timeout
+        status = None
+        yield f"retry: {int(poll_interval * 1000)}\n\n"
+        while True:
+            current = db.session.get(AnalysisJob, job_id)
+            data, finished = current.to_dict(), current.finished
+            # Hand the connection back to the pool while waiting
+            db.session.remove()
+            if data['status'] != status:
+                status = data['status']
+                yield f"event: status\ndata: {json.dumps(data)}\n\n"
+            if finished or time.monotonic() >= deadline:
+                break
+            # Wakes up as soon as a local worker finishes; jobs run elsewhere are polled
+            job_queue.wait(job_id, poll_interval)
+            yield ": keep-alive\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@main.route('/api/cache/stats')
+@operators_only
+def cache_stats():
+    # Hit/miss/eviction counters for sizing the AI result, parsed-text, user, export and design caches
+    return jsonify({'ai': ai_cache.stats(), 'text': text_cache.stats(), 'user': user_cache.stats(),
+                    'docx': docx_exporter.stats(), 'designer': design_renderer.stats()})
+
+
+@main.route('/api/llm/stats')
+@operators_only
+def llm_stats():
+    # Call, retry, hedge and circuit breaker counters plus rolling latency percentiles
+    return jsonify(llm_client.stats())
+
+
+@main.route('/metrics')
+@operators_only
+def prometheus_metrics():
+    """Request, stage, model and cache metrics in the Prometheus text format."""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+@main.route('/metrics/profiles/<profile_id>')
+@operators_only
+def profile(profile_id):
+    """A profile recorded for a request sent with ?profile=1, as collapsed stacks."""
+    collapsed = metrics.get_profile(profile_id) if metrics.profiling else None
+    if collapsed is None:
+        abort(404)
+    return Response(collapsed, mimetype='text/plain')
 
 
 @main.route('/generate-cover-letter', methods=['POST'])
@@ -79,10 +313,57 @@ def generate_cover_letter():
     if not resume_text or not jd_text:
         flash("Your session may have expired. Please analyze a resume again.")
         return redirect(url_for('main.index'))
-    cover_letter_text = generate_full_cover_letter(resume_text, jd_text)
+    # Streaming mode: the page opens an SSE connection and renders the letter as it arrives
+    if current_app.config['COVER_LETTER_STREAMING'] and request.form.get('stream') != '0':
+        return render_template('cover_letter.html', cover_letter='', streaming=True)
+    with scheduler.request_class(session.get('_user_id') or request.remote_addr, 'cover_letter'):
+        cover_letter_text = generate_full_cover_letter(resume_text, jd_text)
     if isinstance(cover_letter_text, dict) and 'error' in cover_letter_text:
         flash(f"An AI error occurred: {cover_letter_text['error']}")
         return redirect(url_for('main.index'))
+    ai_cache.set(cover_letter_cache_key(resume_text, jd_text), cover_letter_text)
+    return render_template('cover_letter.html', cover_letter=cover_letter_text)
+
+
+@main.route('/generate-cover-letter/stream')
+def stream_cover_letter_events():
+    resume_text = session.get('original_resume_text')
+    jd_text = session.get('original_jd_text')
+    if not resume_text or not jd_text:
+        return jsonify({'error': 'Your session may have expired. Please analyze a resume again.'}), 400
+    client_key = session.get('_user_id') or request.remote_addr
+
+    def generate():
+        # Flush the headers right away so the browser can start listening
+        yield ": stream-open\n\n"
+        chunks = []
+        try:
+            with scheduler.request_class(client_key, 'cover_letter'):
+                for chunk in stream_cover_letter(resume_text, jd_text):
+                    chunks.append(chunk)
+                    yield f"event: chunk\ndata: {json.dumps({'text': chunk})}\n\n"
+        except Exception as e:
+            print(f"An error occurred during cover letter streaming: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': 'Failed to generate cover letter from AI.'})}\n\n"
+            return
+        # Keep the finished letter so it can be reopened as a complete document
+        ai_cache.set(cover_letter_cache_key(resume_text, jd_text), ''.join(chunks))
+        yield f"event: done\ndata: {json.dumps({'url': url_for('main.view_cover_letter')})}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@main.route('/cover-letter')
+def view_cover_letter():
+    resume_text = session.get('original_resume_text')
+    jd_text = session.get('original_jd_text')
+    cover_letter_text = None
+    if resume_text and jd_text:
+        cover_letter_text = ai_cache.get(cover_letter_cache_key(resume_text, jd_text))
+    if not cover_letter_text:
+        flash("No cover letter has been generated yet. Please generate one first.")
+        return redirect(url_for('main.index'))
     return render_template('cover_letter.html', cover_letter=cover_letter_text)
 
 
@@ -100,40 +381,85 @@ def designer(template_name):
     if not structured_data:
         flash("Please analyze a resume first before accessing the designer.")
         return redirect(url_for('main.index'))
-    session['last_template'] = template_name
-    template_path = f"designs/{template_name}.html"
-    return render_template(template_path, resume=structured_data)
+    # Unknown names are refused before they reach the template loader
+    etag = design_renderer.etag(template_name, structured_data)
+    if etag is None:
+        abort(404)
+    if session.get('last_template') != template_name:
+        session['last_template'] = template_name
+
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+    if etag in request.if_none_match:
+        design_renderer.counters['not_modified'] += 1
+        return Response(status=304, headers=headers)
+    return Response(design_renderer.render(template_name, structured_data, etag), mimetype='text/html',
+                    headers=headers)
 
 
 @main.route('/export/docx', methods=['POST'])
 def export_docx():
-    data = request.get_json()
+    # Refuse oversized bodies before parsing them (JSON escaping can double the HTML's size)
+    if (request.content_length or 0) > 2 * docx_exporter.max_html_bytes:
+        return jsonify({'error': 'The document is too large to export.'}), 413
+    data = request.get_json(silent=True) or {}
     html_content = data.get('html', '')
     if not html_content:
         return jsonify({'error': 'No HTML content received.'}), 400
+
+    # The ETag is derived from the HTML, so unchanged content is answered before converting it
+    etag = docx_exporter.etag(html_content)
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+    if etag in request.if_none_match:
+        docx_exporter.counters['not_modified'] += 1
+        return Response(status=304, headers=headers)
+
     try:
-        parser = Html2Docx()
-        parser.parse_html_string(html_content)
-        file_stream = io.BytesIO()
-        parser.save(file_stream)
-        file_stream.seek(0)
-        return Response(
-            file_stream,
-            mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": "attachment;filename=resume_edited.docx"}
-        )
-    except Exception as e:
-        error_message = f"An error occurred: {str(e)}"; print(f"Error generating DOCX: {error_message}")
-        return jsonify({'error': error_message}), 500
+        with stage('export'):
+            document = docx_exporter.export(html_content, etag)
+    except DOCXExportError as e:
+        print(f"Error generating DOCX: {e}")
+        return jsonify({'error': str(e)}), e.status
+    headers['Content-Disposition'] = 'attachment;filename=resume_edited.docx'
+    return Response(document, mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                    headers=headers)
 
 # The user's dashboard page
 @main.route('/dashboard')
 @login_required # This decorator protects the page, requiring login
 def dashboard():
-    # Query the database for all resumes belonging to the current user
-    # Order them by most recent first
-    resumes = Resume.query.filter_by(author=current_user).order_by(Resume.timestamp.desc()).all()
-    return render_template('dashboard.html', resumes=resumes)
+    query = request.args.get('q', '').strip()
+    if query:
+        page = request.args.get('page', 1, type=int)
+        results, has_more = search_analyses(current_user.id, query, page, current_app.config['SEARCH_PAGE_SIZE'],
+                                            current_app.config['SEARCH_RANK_WINDOW'])
+        return render_template('dashboard.html', query=query, results=results, page=page, has_more=has_more)
+
+    # One page of the current user's analyses, most recent first, grouped by resume
+    resumes, analyses, next_cursor = get_dashboard_page(
+        current_user.id, request.args.get('cursor'), current_app.config['DASHBOARD_PAGE_SIZE']
+    )
+    return render_template('dashboard.html', resumes=resumes, analyses=analyses, next_cursor=next_cursor,
+                           first_page=not request.args.get('cursor'))
+
+
+@main.route('/api/search')
+@login_required
+def api_search():
+    """Ranked full-text search over the current user's saved analyses."""
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    results, has_more = search_analyses(current_user.id, query, page, current_app.config['SEARCH_PAGE_SIZE'],
+                                        current_app.config['SEARCH_RANK_WINDOW'])
+    return jsonify({
+        'query': query,
+        'page': page,
+        'has_more': has_more,
+        'results': [dict(result,
+                         timestamp=result['timestamp'].isoformat() if result['timestamp'] else None,
+                         snippet=str(result['snippet']),
+                         url=url_for('main.view_analysis', analysis_id=result['analysis_id']))
+                    for result in results],
+    })
 
 
 @main.route('/login', methods=['GET', 'POST'])
@@ -147,6 +473,7 @@ def login():
             flash('Invalid username or password')
             return redirect(url_for('main.login'))
         login_user(user, remember=form.remember_me.data)
+        session.regenerate()
         flash('You have been logged in successfully!')
         next_page = request.args.get('next')
         if not next_page:
@@ -158,6 +485,7 @@ def login():
 @main.route('/logout')
 def logout():
     logout_user()
+    session.regenerate()
     flash('You have been logged out.')
     return redirect(url_for('main.index'))
 
@@ -184,7 +512,7 @@ def view_analysis(analysis_id):
     analysis = Analysis.query.get_or_404(analysis_id)
 
     # SECURITY CHECK: Ensure the analysis belongs to the currently logged-in user
-    if analysis.resume.author != current_user:
+    if analysis.resume.user_id != current_user.id:
         abort(403)  # Forbidden error
 
     return render_template('view_analysis.html', analysis=analysis)
\ No newline at end of file
@@ -0,0 +1,259 @@
+import contextvars
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from .llm import LLMError
+
+# Lower numbers are served first
+PRIORITIES = {'interactive': 0, 'cover_letter': 1, 'batch': 2}
+
+# Lower classes are shed once the queue is this fraction of AI_MAX_QUEUE_DEPTH deep,
+# which keeps room for interactive requests during a peak
+SHED_FRACTION = {'interactive': 1.0, 'cover_letter': 0.5, 'batch': 0.5}
+
+# (user key, priority class) of the model calls made in the current context
+_request_class = contextvars.ContextVar('ai_request_class', default=(None, 'batch'))
+
+
+class OverloadedError(LLMError):
+    """The call was shed, or waited too long for its turn. `retry_after` is in seconds."""
+    status = 429
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """Seconds until a token is available (0 if one is available now)."""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate:
+            self.tokens -= 1
+
+
+class _Ticket:
+    """One call waiting for admission, woken through an Event."""
+
+    __slots__ = ('user', 'priority', 'granted', 'event')
+
+    def __init__(self, user, priority):
+        self.user = user
+        self.priority = priority
+        self.granted = False
+        self.event = threading.Event()
+
+
+class Scheduler:
+    """
+    Admission control in front of every model call. Calls take a token from a global
+    bucket sized to the API quota and one of AI_MAX_CONCURRENCY slots, at most
+    AI_MAX_CONCURRENCY_PER_USER per user. Waiting calls are served by priority class,
+    and round-robin between users within a class, so a few busy users can't starve
+    the rest. When the queue is too deep a call is refused at once with an
+    OverloadedError (HTTP 429 with Retry-After) instead of waiting to time out.
+    Callers declare who they are with request_class(); the LLM client does the rest.
+    """
+
+    def __init__(self, requests_per_minute=600, burst=20, max_concurrency=256, max_per_user=4,
+                 max_queue_depth=200, max_queued_per_user=8, queue_timeout=10.0):
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self.max_queue_depth = max_queue_depth
+        self.max_queued_per_user = max_queued_per_user
+        self.queue_timeout = queue_timeout
+        self.bucket = TokenBucket(requests_per_minute / 60, burst)
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}  # class -> user -> tickets
+        self._queued = 0
+        self._queued_by_user = {}
+        self._in_flight = 0
+        self._in_flight_by_user = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.counters = {'admitted': 0, 'queued': 0, 'shed': 0, 'timeouts': 0}
+
+    def init_app(self, app):
+        config = app.config
+        self.max_concurrency = config.get('AI_MAX_CONCURRENCY', self.max_concurrency)
+        self.max_per_user = config.get('AI_MAX_CONCURRENCY_PER_USER', self.max_per_user)
+        self.max_queue_depth = config.get('AI_MAX_QUEUE_DEPTH', self.max_queue_depth)
+        self.max_queued_per_user = config.get('AI_MAX_QUEUED_PER_USER', self.max_queued_per_user)
+        self.queue_timeout = config.get('AI_QUEUE_TIMEOUT', self.queue_timeout)
+        with self._cond:
+            self.bucket = TokenBucket(config.get('AI_REQUESTS_PER_MINUTE', 600) / 60, config.get('AI_BURST', 20))
+        app.extensions['ai_scheduler'] = self
+
+    @staticmethod
+    @contextmanager
+    def request_class(user, priority):
+        """
+        Tags the model calls made inside the block with a user key (a user id, or the
+        client address for anonymous users) and a priority class from PRIORITIES.
+        The tag is a context variable, so it follows copy_context() into worker threads.
+        """
+        token = _request_class.set((user, priority))
+        try:
+            yield
+        finally:
+            _request_class.reset(token)
+
+    @contextmanager
+    def admit(self, timeout=None):
+        """
+        Blocks until the current call may go to the API and holds its slot for the block.
+        Raises:
+            OverloadedError: If the call is shed or not admitted within the queue timeout.
+        """
+        ticket = self._enqueue()
+        if not ticket.granted and not ticket.event.wait(self.queue_timeout if timeout is None else timeout):
+            if not self._cancel(ticket):
+                raise self._timed_out(ticket)
+        try:
+            yield
+        finally:
+            self._release(ticket)
+
+    def _enqueue(self):
+        user, priority = _request_class.get()
+        if priority not in PRIORITIES:
+            raise ValueError(f'Unknown priority class: {priority}')
+        with self._cond:
+            self._ensure_dispatcher()
+            depth_limit = self.max_queue_depth * SHED_FRACTION[priority]
+            if self._queued and (self._queued >= depth_limit or
+                                 self._queued_by_user.get(user, 0) >= self.max_queued_per_user):
+                self.counters['shed'] += 1
+                raise OverloadedError('The AI service is busy. Please try again shortly.',
+                                      self._retry_after(priority))
+            ticket = _Ticket(user, priority)
+            self._queues[priority].setdefault(user, deque()).append(ticket)
+            self._queued += 1
+            self._queued_by_user[user] = self._queued_by_user.get(user, 0) + 1
+            self._dispatch()
+            if not ticket.granted:
+                self.counters['queued'] += 1
+                self._cond.notify()
+            return ticket
+
+    def _cancel(self, ticket):
+        """Takes a ticket out of the queue. Returns True if it had been granted meanwhile."""
+        with self._cond:
+            if ticket.granted:
+                return True
+            tickets = self._queues[ticket.priority].get(ticket.user)
+            if tickets is not None and ticket in tickets:
+                tickets.remove(ticket)
+                if not tickets:
+                    del self._queues[ticket.priority][ticket.user]
+                self._dequeued(ticket.user)
+            return False
+
+    def _timed_out(self, ticket):
+        self.counters['timeouts'] += 1
+        with self._cond:
+            retry_after = self._retry_after(ticket.priority)
+        return OverloadedError('The AI service is busy. Please try again shortly.', retry_after)
+
+    def _release(self, ticket):
+        with self._cond:
+            self._in_flight -= 1
+            self._in_flight_by_user[ticket.user] -= 1
+            if not self._in_flight_by_user[ticket.user]:
+                del self._in_flight_by_user[ticket.user]
+            self._cond.notify()
+
+    def _dequeued(self, user):
+        self._queued -= 1
+        self._queued_by_user[user] -= 1
+        if not self._queued_by_user[user]:
+            del self._queued_by_user[user]
+
+    def _retry_after(self, priority):
+        # Roughly how long the calls ahead of this one will take to drain
+        ahead = sum(len(tickets) for p in PRIORITIES if PRIORITIES[p] <= PRIORITIES[priority]
+                    for tickets in self._queues[p].values())
+        rate = self.bucket.rate or 1.0
+        return max(1, math.ceil((ahead + 1) / rate))
+
+    def _dispatch(self):
+        """
+        Grants waiting tickets while the budget allows. Must hold the lock.
+        Returns:
+            Seconds until the next token if calls are waiting for one, else None.
+        """
+        while self._queued and self._in_flight < self.max_concurrency:
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                return wait
+            ticket = self._next_ticket()
+            if ticket is None:
+                # Everyone waiting is at their per-user limit
+                return None
+            self.bucket.take()
+            self._grant(ticket)
+        return None
+
+    def _next_ticket(self):
+        for priority in sorted(PRIORITIES, key=PRIORITIES.get):
+            users = self._queues[priority]
+            for user in list(users):
+                if self._in_flight_by_user.get(user, 0) >= self.max_per_user:
+                    continue
+                tickets = users.pop(user)
+                ticket = tickets.popleft()
+                if tickets:
+                    # Back of the line, so users take turns
+                    users[user] = tickets
+                return ticket
+        return None
+
+    def _grant(self, ticket):
+        self._dequeued(ticket.user)
+        self._in_flight += 1
+        self._in_flight_by_user[ticket.user] = self._in_flight_by_user.get(ticket.user, 0) + 1
+        self.counters['admitted'] += 1
+        ticket.granted = True
+        ticket.event.set()
+
+    def _ensure_dispatcher(self):
+        # Started on first use, and again in a forked child since threads don't survive a fork
+        if self._thread is None or self._pid != os.getpid():
+            self._thread = threading.Thread(target=self._run, name='ai-scheduler', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        # Wakes up on every enqueue and release, and when the next token is due
+        with self._cond:
+            while True:
+                self._cond.wait(self._dispatch())
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counters, waiting=self._queued, in_flight=self._in_flight,
+                        waiting_users=len(self._queued_by_user), tokens=round(self.bucket.tokens, 2))
+
+
+scheduler = Scheduler()
@@ -0,0 +1,168 @@
+import re
+from collections import Counter
+import numpy as np
+
+# Tokens keep the characters used in skill names such as "c++", "c#", "node.js" and "ci/cd"
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./\-]*")
+
+STOPWORDS = frozenset("""
+a about above across after again against all also an and any are as at be because been before being
+below between both but by can could did do does doing down during each either etc few for from further
+had has have having he her here hers him his how i if in into is it its itself just may me more most must
+my no nor not of off on once only or other our ours out over own per same she should so some such than
+that the their theirs them then there these they this those through to too under until up upon us very
+via was we were what when where which while who whom why will with within without would you your yours
+ability able across candidate candidates company daily demonstrated desired develop duties environment
+excellent experience experienced familiarity familiar good great ideal including join knowledge looking
+opportunity plus preferred proven related required requirements responsibilities responsible role skills
+strong team teams understanding using work working year years new well highly
+""".split())
+
+# Common abbreviations mapped to the form used in most job descriptions
+SYNONYMS = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'k8s': 'kubernetes',
+    'postgres': 'postgresql',
+    'golang': 'go',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'nlp': 'natural language processing',
+    'aws': 'amazon web services',
+    'gcp': 'google cloud platform',
+    'ci/cd': 'continuous integration',
+}
+
+# Multi-word skills that should be matched as a single keyword
+KNOWN_PHRASES = frozenset([
+    'machine learning', 'deep learning', 'data analysis', 'data science', 'data engineering',
+    'project management', 'product management', 'natural language processing', 'computer vision',
+    'continuous integration', 'amazon web services', 'google cloud platform', 'unit testing',
+    'artificial intelligence', 'customer service', 'stakeholder management', 'business intelligence',
+    'financial modeling', 'agile methodologies', 'software development', 'web development',
+    'rest apis', 'version control', 'problem solving', 'public speaking', 'supply chain',
+])
+
+
+# Words ending in "s" that are not plurals
+NO_STEM = frozenset([
+    'analysis', 'basis', 'kubernetes', 'aws', 'analytics', 'sales', 'windows', 'jenkins', 'ios',
+    'redis', 'pandas', 'express', 'series', 'news', 'postgres', 'physics', 'economics', 'statistics',
+    'mathematics', 'logistics', 'devops', 'always', 'various', 'is', 'has', 'was', 'does', 'this',
+])
+
+
+def normalize_token(token):
+    """Strips punctuation and plural endings so 'APIs', 'api' and 'api.' compare equal."""
+    token = token.strip('.-/')
+    if token in SYNONYMS or token in NO_STEM or '.' in token:
+        return SYNONYMS.get(token, token)
+    if len(token) > 4 and token.endswith('ies'):
+        token = token[:-3] + 'y'
+    elif len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us')):
+        token = token[:-1]
+    return SYNONYMS.get(token, token)
+
+
+def tokenize(text):
+    """
+    Splits text into normalized, lowercase tokens with stopwords removed.
+    Args:
+        text: Raw resume or job description text.
+    Returns:
+        A list of tokens in document order.
+    """
+    tokens = []
+    for raw in TOKEN_RE.findall((text or '').lower()):
+        raw = raw.strip('.-/')
+        if raw in STOPWORDS:
+            continue
+        token = normalize_token(raw)
+        if token and token not in STOPWORDS and not token.isdigit() and len(token) > 1:
+            tokens.extend(token.split(' '))
+    return tokens
+
+
+def extract_terms(text):
+    """
+    Extracts the keyword terms of a document: single tokens, known multi-word skills,
+    and adjacent word pairs (which capture phrases such as "react native").
+    Returns:
+        A list of terms, one entry per occurrence.
+    """
+    terms = []
+    for line in (text or '').splitlines():
+        tokens = tokenize(line)
+        terms.extend(tokens)
+        for first, second in zip(tokens, tokens[1:]):
+            terms.append(f'{first} {second}')
+    return terms
+
+
+def _documents(text):
+    # Lines act as the "documents" for IDF, so boilerplate repeated across lines weighs less
+    return [set(extract_terms(line)) for line in (text or '').splitlines() if line.strip()]
+
+
+def score_resume(resume_text, jd_text, max_keywords=15):
+    """
+    Scores a resume against a job description locally with TF-IDF and cosine similarity.
+    Args:
+        resume_text: The extracted resume text.
+        jd_text: The job description text.
+        max_keywords: The maximum number of missing keywords to return.
+    Returns:
+        A dictionary with "match_score" (0-100), "missing_keywords" and "matched_keywords".
+    """
+    resume_terms = extract_terms(resume_text)
+    jd_terms = extract_terms(jd_text)
+    if not resume_terms or not jd_terms:
+        return {'match_score': 0, 'missing_keywords': [], 'matched_keywords': []}
+
+    vocabulary = {term: i for i, term in enumerate(dict.fromkeys(jd_terms + resume_terms))}
+    documents = _documents(jd_text) + _documents(resume_text)
+
+    # Smoothed inverse document frequency over all lines of both documents
+    df = np.zeros(len(vocabulary))
+    for doc in documents:
+        df[[vocabulary[t] for t in doc if t in vocabulary]] += 1
+    idf = np.log((1 + len(documents)) / (1 + df)) + 1
+
+    def vectorize(terms):
+        counts = np.bincount([vocabulary[t] for t in terms], minlength=len(vocabulary)).astype(float)
+        # Sublinear term frequency stops a single repeated word from dominating
+        tf = np.where(counts > 0, 1 + np.log(np.maximum(counts, 1)), 0)
+        return tf * idf
+
+    resume_vec = vectorize(resume_terms)
+    jd_vec = vectorize(jd_terms)
+    cosine = float(resume_vec @ jd_vec / (np.linalg.norm(resume_vec) * np.linalg.norm(jd_vec)))
+
+    # Keyword coverage: how much of the JD's weighted vocabulary the resume contains
+    jd_mask = jd_vec > 0
+    present = resume_vec > 0
+    coverage = float(jd_vec[jd_mask & present].sum() / jd_vec[jd_mask].sum())
+
+    match_score = int(round(100 * min(1.0, 0.4 * cosine + 0.6 * coverage)))
+
+    terms = list(vocabulary)
+    jd_counts = Counter(jd_terms)
+    ranked = np.argsort(-jd_vec, kind='stable')
+    missing, matched = [], []
+    for i in ranked:
+        if not jd_mask[i]:
+            break
+        term = terms[i]
+        # Word pairs only count as keywords when they are known skills or recur in the JD
+        if ' ' in term and term not in KNOWN_PHRASES and jd_counts[term] < 2:
+            continue
+        (matched if present[i] else missing).append(term)
+    # Drop single words that are already covered by a missing phrase
+    phrases = [t for t in missing if ' ' in t]
+    missing = [t for t in missing if ' ' in t or not any(t in p.split(' ') for p in phrases)]
+
+    return {
+        'match_score': match_score,
+        'missing_keywords': missing[:max_keywords],
+        'matched_keywords': matched[:max_keywords],
+    }
@@ -0,0 +1,240 @@
+import json
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, event, func, inspect, literal_column, or_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import column, table
+from app import db
+from .models import Resume, Analysis
+from .scoring import STOPWORDS
+
+# One row per Analysis (rowid = analysis.id). "owner" holds a "u<user_id>" token so a
+# user's rows are found through the index itself rather than by filtering afterwards.
+FTS_COLUMNS = ('owner', 'posted', 'job_description', 'filename', 'keywords', 'skills')
+
+# bm25 weight per column, in FTS_COLUMNS order: filenames and keywords count most
+RANK = "bm25(0.0, 2.0, 1.0, 3.0, 2.0, 1.0)"
+
+CREATE_INDEX = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS analysis_fts USING fts5({', '.join(FTS_COLUMNS)}, "
+    "tokenize='porter unicode61', prefix='2 3')"
+)
+SET_RANK = f"INSERT INTO analysis_fts(analysis_fts, rank) VALUES ('rank', '{RANK}')"
+
+# Placeholders for the highlighted terms of a snippet; swapped for <mark> after escaping
+SNIPPET_START, SNIPPET_END = '\x02', '\x03'
+
+analysis_fts = table('analysis_fts', column('rowid'), *(column(name) for name in FTS_COLUMNS))
+
+# The index is created and dropped together with the analysis table (SQLite only). Databases
+# created by migrations, or before the index existed, get it from `flask rebuild-search-index`;
+# until then searches fall back to matching titles and filenames.
+event.listen(Analysis.__table__, 'after_create', DDL(CREATE_INDEX).execute_if(dialect='sqlite'))
+event.listen(Analysis.__table__, 'after_create', DDL(SET_RANK).execute_if(dialect='sqlite'))
+event.listen(Analysis.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS analysis_fts').execute_if(dialect='sqlite'))
+
+
+def _resume_fields(structured_data, filename):
+    skills = structured_data.get('skills') or []
+    return {'filename': filename or '', 'skills': ' '.join(str(skill) for skill in skills)}
+
+
+def _load_json(raw):
+    return json.loads(raw) if raw else {}
+
+
+def _document(analysis, resume):
+    """Builds an index row from an Analysis and its Resume's user_id, filename and structure JSON."""
+    timestamp = analysis.timestamp
+    return {
+        'rowid': analysis.id,
+        'owner': f'u{resume.user_id}',
+        'posted': timestamp.strftime('%B %Y') if timestamp else '',
+        'job_description': analysis.job_description or '',
+        'keywords': ' '.join(_load_json(analysis.analysis_data_json).get('missing_keywords') or []),
+        **_resume_fields(_load_json(resume.structured_data_json), resume.original_filename),
+    }
+
+
+def has_search_index(connection):
+    """Whether the full-text index exists. A lookup in sqlite_master, cheap enough to run per call."""
+    if connection.dialect.name != 'sqlite':
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'analysis_fts'")
+    ).first() is not None
+
+
+def _execute(connection, statement, params):
+    if not has_search_index(connection):
+        return
+    try:
+        connection.execute(statement, params)
+    except OperationalError as e:
+        # e.g. a database created before the index existed; run `flask rebuild-search-index`
+        print(f"Search index not updated: {e}")
+
+
+@event.listens_for(Analysis, 'after_insert')
+def _index_analysis(mapper, connection, target):
+    # Read the resume's columns directly; loading a Resume instance mid-flush is not allowed
+    resume = connection.execute(
+        select(Resume.user_id, Resume.original_filename, Resume.structured_data_json)
+        .where(Resume.id == target.resume_id)
+    ).first()
+    if resume is not None:
+        _execute(connection, analysis_fts.insert(), _document(target, resume))
+
+
+@event.listens_for(Analysis, 'after_delete')
+def _unindex_analysis(mapper, connection, target):
+    _execute(connection, analysis_fts.delete().where(analysis_fts.c.rowid == target.id), {})
+
+
+@event.listens_for(Resume, 'after_update')
+def _reindex_resume(mapper, connection, target):
+    state = inspect(target)
+    if not (state.attrs.structured_data_json.history.has_changes()
+            or state.attrs.original_filename.history.has_changes()):
+        return
+    analysis_ids = select(Analysis.id).where(Analysis.resume_id == target.id).scalar_subquery()
+    _execute(connection,
+             analysis_fts.update().where(analysis_fts.c.rowid.in_(analysis_ids))
+             .values(**_resume_fields(target.structured_data, target.original_filename)), {})
+
+
+def build_match_query(user_id, query):
+    """
+    Turns free text into an FTS5 query over one user's analyses.
+    Terms are quoted (so user input can't inject query syntax), stopwords are dropped,
+    and any term may match; rows matching more of the terms rank higher.
+    The last term is a prefix, so results update while the user types.
+    Returns:
+        The MATCH expression, or None if the query has no searchable terms.
+    """
+    terms = [t for t in re.findall(r'\w+', (query or '').lower()) if t not in STOPWORDS]
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms[:-1]] + [f'"{terms[-1]}"*']
+    return f'owner:u{int(user_id)} AND ({" OR ".join(quoted)})'
+
+
+def _highlight(snippet):
+    return Markup(str(escape(snippet or '')).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>'))
+
+
+def search_analyses(user_id, query, page=1, per_page=20, rank_window=2000):
+    """
+    Searches a user's saved analyses by job description, resume filename, missing
+    keywords, resume skills and month of analysis (e.g. "data engineer march").
+    Args:
+        user_id: The id of the User whose analyses are searched.
+        query: The free-text query.
+        page: The 1-based page number.
+        per_page: Results per page.
+        rank_window: Only the most recent this many matches are ranked by relevance.
+                     bm25 costs about a microsecond per match, so this bounds the
+                     latency of broad queries for users with very many analyses.
+    Returns:
+        A (results, has_more) tuple. Each result is a dict with the analysis id, jd_title,
+        match_score, timestamp, filename and an HTML-safe snippet with <mark>ed terms.
+    """
+    match = build_match_query(user_id, query)
+    if match is None:
+        return [], False
+    offset = (max(page, 1) - 1) * per_page
+
+    if not has_search_index(db.session.connection()):
+        return _search_without_index(user_id, query, offset, per_page)
+
+    # Walking matches newest first is cheap, so find where the ranking window starts
+    window_start = db.session.execute(
+        select(analysis_fts.c.rowid).where(text('analysis_fts MATCH :match'))
+        .order_by(analysis_fts.c.rowid.desc()).limit(1).offset(rank_window - 1),
+        {'match': match}
+    ).scalar()
+
+    # Rank and page inside the index first, then join only the rows on this page
+    hits = select(
+        analysis_fts.c.rowid.label('analysis_id'),
+        func.snippet(literal_column('analysis_fts'), FTS_COLUMNS.index('job_description'),
+                     SNIPPET_START, SNIPPET_END, '…', 16).label('snippet'),
+        literal_column('rank').label('rank'),
+    ).where(text('analysis_fts MATCH :match'))
+    if window_start is not None:
+        hits = hits.where(analysis_fts.c.rowid >= window_start)
+    hits = hits.order_by(text('rank')).limit(per_page + 1).offset(offset).subquery()
+
+    rows = db.session.execute(
+        select(Analysis.id, Analysis.jd_title, Analysis.match_score, Analysis.timestamp,
+               Resume.original_filename, hits.c.snippet)
+        .join(hits, hits.c.analysis_id == Analysis.id)
+        .join(Resume, Resume.id == Analysis.resume_id)
+        .order_by(hits.c.rank),
+        {'match': match}
+    ).all()
+    results = [{
+        'analysis_id': row.id,
+        'jd_title': row.jd_title,
+        'match_score': row.match_score,
+        'timestamp': row.timestamp,
+        'filename': row.original_filename,
+        'snippet': _highlight(row.snippet),
+    } for row in rows[:per_page]]
+    return results, len(rows) > per_page
+
+
+def escape_like(value):
+    """Escapes LIKE wildcards in user input with a backslash, so "%" and "_" match themselves."""
+    return re.sub(r'([%_\\])', r'\\\1', value)
+
+
+def _search_without_index(user_id, query, offset, per_page):
+    # Without the FTS5 index (other backends, or before it is built) match the short, uncompressed columns
+    pattern = f'%{escape_like(query.strip())}%'
+    rows = db.session.execute(
+        select(Analysis.id, Analysis.jd_title, Analysis.match_score, Analysis.timestamp, Resume.original_filename)
+        .join(Resume, Resume.id == Analysis.resume_id)
+        .where(Resume.user_id == user_id,
+               or_(Analysis.jd_title.ilike(pattern, escape='\\'),
+                   Resume.original_filename.ilike(pattern, escape='\\')))
+        .order_by(Analysis.timestamp.desc()).limit(per_page + 1).offset(offset)
+    ).all()
+    results = [{
+        'analysis_id': row.id,
+        'jd_title': row.jd_title,
+        'match_score': row.match_score,
+        'timestamp': row.timestamp,
+        'filename': row.original_filename,
+        'snippet': Markup(''),
+    } for row in rows[:per_page]]
+    return results, len(rows) > per_page
+
+
+def rebuild_search_index(batch_size=500):
+    """
+    Creates the search index if needed and re-indexes every analysis.
+    Returns:
+        The number of analyses indexed.
+    """
+    with db.engine.begin() as connection:
+        connection.execute(text(CREATE_INDEX))
+        connection.execute(text(SET_RANK))
+        connection.execute(analysis_fts.delete())
+
+    indexed = 0
+    last_id = 0
+    while True:
+        # Plain rows rather than ORM instances, so memory stays flat however large the table is
+        batch = db.session.execute(
+            select(Analysis.id, Analysis.timestamp, Analysis.job_description, Analysis.analysis_data_json,
+                   Resume.user_id, Resume.original_filename, Resume.structured_data_json)
+            .join(Resume, Resume.id == Analysis.resume_id)
+            .where(Analysis.id > last_id).order_by(Analysis.id).limit(batch_size)
+        ).all()
+        if not batch:
+            return indexed
+        db.session.execute(analysis_fts.insert(), [_document(row, row) for row in batch])
+        db.session.commit()
+        last_id = batch[-1].id
+        indexed += len(batch)
@@ -0,0 +1,153 @@
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+from app import db
+from .models import Resume, Analysis
+from .nlp_processor import resume_content_hash
+
+
+def find_resume(user_id, resume_text):
+    """Returns the user's stored Resume with the same content, or None."""
+    if user_id is None:
+        return None
+    return Resume.query.filter_by(user_id=user_id, content_hash=resume_content_hash(resume_text)) \
+        .order_by(Resume.id).first()
+
+
+def get_stored_structure(user_id, resume_text):
+    """Returns the already-parsed structure of a stored resume, so it isn't parsed again."""
+    resume = find_resume(user_id, resume_text)
+    return resume.structured_data if resume is not None else None
+
+
+def job_title(jd_text, max_length=120):
+    """Returns a short title for a job description: its first non-empty line, truncated."""
+    for line in (jd_text or '').splitlines():
+        line = ' '.join(line.split())
+        if line:
+            return line if len(line) <= max_length else line[:max_length - 3].rstrip() + '...'
+    return ''
+
+
+def match_score_of(analysis_results):
+    """Reads the match score out of an analysis result, or None if it is missing or malformed."""
+    try:
+        return int(analysis_results.get('match_score'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def save_analysis(user_id, filename, resume_text, jd_text, full_data):
+    """
+    Persists a combined AI result as an Analysis of the user's Resume.
+    Resumes are deduplicated by content hash, so re-uploading the same resume adds
+    a new Analysis to the existing Resume instead of creating another one.
+    Args:
+        user_id: The id of the User who owns the resume.
+        filename: The original filename of the uploaded resume.
+        resume_text: The extracted resume text.
+        jd_text: The job description the resume was analyzed against.
+        full_data: The dictionary returned by get_combined_ai_data.
+    Returns:
+        The new Analysis instance (the caller is responsible for committing).
+    """
+    resume = find_resume(user_id, resume_text)
+    if resume is None:
+        resume = Resume(
+            original_filename=filename,
+            content_hash=resume_content_hash(resume_text),
+            structured_data_json=json.dumps(full_data.get('structured_resume', {})),
+            user_id=user_id
+        )
+        db.session.add(resume)
+    elif not resume.structured_data and full_data.get('structured_resume'):
+        resume.structured_data_json = json.dumps(full_data['structured_resume'])
+    analysis_results = full_data.get('analysis_results', {})
+    new_analysis = Analysis(
+        job_description=jd_text,
+        analysis_data_json=json.dumps(analysis_results),
+        match_score=match_score_of(analysis_results),
+        jd_title=job_title(jd_text),
+        resume=resume
+    )
+    db.session.add(new_analysis)
+    return new_analysis
+
+
+def encode_cursor(row):
+    return f'{row.timestamp.isoformat()}_{row.id}'
+
+
+def decode_cursor(cursor):
+    """Parses a dashboard cursor; returns None for a missing or malformed one."""
+    try:
+        timestamp, row_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_dashboard_page(user_id, cursor=None, per_page=20):
+    """
+    Loads one page of a user's analyses, newest first, grouped by resume for display.
+    The analyses themselves are paginated with a keyset on (timestamp, id), so a page
+    is bounded however many analyses a resume has. Uses exactly two queries, selecting
+    only the columns the dashboard shows, so no ORM objects are built and no analysis
+    JSON is parsed.
+    Args:
+        user_id: The id of the User whose analyses are listed.
+        cursor: The next_cursor returned for the previous page, or None for the first page.
+        per_page: The number of analyses per page.
+    Returns:
+        A (resumes, analyses_by_resume_id, next_cursor) tuple. Resumes are ordered by
+        their newest analysis on the page; a resume whose analyses span two pages is
+        listed on both. next_cursor is None on the last page.
+    """
+    query = db.session.query(Analysis.id, Analysis.resume_id, Analysis.timestamp,
+                             Analysis.match_score, Analysis.jd_title) \
+        .join(Resume, Analysis.resume_id == Resume.id) \
+        .filter(Resume.user_id == user_id)
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        timestamp, analysis_id = position
+        query = query.filter(or_(Analysis.timestamp < timestamp,
+                                 and_(Analysis.timestamp == timestamp, Analysis.id < analysis_id)))
+    rows = query.order_by(Analysis.timestamp.desc(), Analysis.id.desc()).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1])
+
+    analyses_by_resume_id = {}
+    for row in rows:
+        analyses_by_resume_id.setdefault(row.resume_id, []).append(row)
+    resumes = []
+    if analyses_by_resume_id:
+        by_id = {resume.id: resume for resume in db.session.query(
+            Resume.id, Resume.original_filename, Resume.timestamp
+        ).filter(Resume.id.in_(list(analyses_by_resume_id)))}
+        resumes = [by_id[resume_id] for resume_id in analyses_by_resume_id]
+    return resumes, analyses_by_resume_id, next_cursor
+
+
+def backfill_analysis_columns(batch_size=500):
+    """
+    Fills match_score and jd_title on analyses saved before those columns existed.
+    Works through the table in id order, one committed batch at a time.
+    Returns:
+        The number of analyses updated.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        batch = Analysis.query.filter(Analysis.id > last_id, Analysis.jd_title.is_(None)) \
+            .order_by(Analysis.id).limit(batch_size).all()
+        if not batch:
+            return updated
+        for analysis in batch:
+            analysis.match_score = match_score_of(analysis.analysis_data)
+            analysis.jd_title = job_title(analysis.job_description)
+        last_id = batch[-1].id
+        updated += len(batch)
+        db.session.commit()
@@ -0,0 +1,168 @@
+import secrets
+import time
+from datetime import timedelta
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+from .cache import LRUCache, SQLiteCache
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """A session whose data lives on the server; the cookie only holds its id."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.previous_sid = None
+
+    def regenerate(self):
+        """
+        Moves the session to a fresh id, keeping its data. The old id is deleted from
+        the backend when the session is saved. Call it whenever the user's privileges
+        change (log in, log out) so an id planted before the change is worthless after it.
+        """
+        if not self.new and self.previous_sid is None:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class MemorySessionBackend:
+    """Keeps sessions in a per-process LRU. Suitable for development and tests only."""
+
+    def __init__(self, max_entries=10000):
+        self.memory = LRUCache(max_entries=max_entries, max_bytes=256 * 1024 * 1024)
+
+    def load(self, sid):
+        return self.memory.get(sid)
+
+    def save(self, sid, raw, ttl):
+        self.memory.set(sid, raw, size=len(raw), ttl=ttl)
+
+    def delete(self, sid):
+        self.memory.delete(sid)
+
+    def sweep(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionBackend:
+    """
+    Stores sessions in SQLite, shared by every process using the same database file.
+    Every read goes to the database: a per-process memory tier would serve a session
+    another worker has since changed or deleted.
+    """
+
+    def __init__(self, path, max_entries=100000):
+        self.disk = SQLiteCache(path, table='sessions', max_entries=max_entries)
+
+    def load(self, sid):
+        return self.disk.get(sid)
+
+    def save(self, sid, raw, ttl):
+        self.disk.set(sid, raw, ttl=ttl)
+
+    def delete(self, sid):
+        self.disk.delete(sid)
+
+    def sweep(self):
+        return self.disk.sweep()
+
+    def close(self):
+        self.disk.close()
+
+
+def create_session_backend(app):
+    """Builds the session backend named by SESSION_BACKEND ('sqlite' or 'memory')."""
+    backend = app.config.get('SESSION_BACKEND', 'sqlite')
+    if backend == 'memory':
+        return MemorySessionBackend()
+    if backend == 'sqlite':
+        return SQLiteSessionBackend(
+            app.config['SESSION_DATABASE_PATH'],
+            max_entries=app.config.get('SESSION_MAX_ENTRIES', 100000)
+        )
+    # Any object implementing load/save/delete/sweep can be plugged in directly
+    return backend
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    A Flask session interface that keeps session data in a pluggable backend.
+    The cookie carries only a signed, opaque session id.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, backend, sweep_interval=3600):
+        self.backend = backend
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='server-side-session')
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode('ascii')
+            except BadSignature:
+                sid = None
+            if sid:
+                raw = self.backend.load(sid)
+                if raw is not None:
+                    return ServerSideSession(self.serializer.loads(raw), sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.previous_sid is not None:
+            self.backend.delete(session.previous_sid)
+            session.previous_sid = None
+
+        if not session:
+            if session.modified:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified:
+            lifetime = app.permanent_session_lifetime if session.permanent else \
+                app.config.get('SESSION_TTL', timedelta(days=1))
+            self.backend.save(session.sid, self.serializer.dumps(dict(session)), lifetime.total_seconds())
+            self._maybe_sweep()
+
+        if session.modified or self.should_set_cookie(app, session):
+            response.vary.add('Cookie')
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid.encode('ascii')).decode('ascii'),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+    def _maybe_sweep(self):
+        # Expired sessions are removed opportunistically rather than by a separate task
+        if time.monotonic() - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = time.monotonic()
+            try:
+                self.backend.sweep()
+            except Exception as e:
+                print(f"Error sweeping expired sessions: {e}")
@@ -0,0 +1,74 @@
+import hashlib
+import io
+import tempfile
+from flask import Request, current_app
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+from .utils import allowed_file
+
+# The first bytes of each accepted upload type (a .docx file is a zip archive)
+FILE_SIGNATURES = {'pdf': b'%PDF-', 'docx': b'PK\x03\x04'}
+
+
+class UploadStream:
+    """
+    The file a multipart upload is written into while the body is parsed. The type is
+    checked against the first bytes and the size against UPLOAD_MAX_BYTES as data arrives,
+    so a bad upload is refused before the rest of it is read. The SHA-256 is computed in
+    the same pass. Uploads larger than UPLOAD_SPOOL_BYTES are moved to a named temp file,
+    whose `path` lets parsers open the file themselves instead of copying it into memory.
+    """
+
+    def __init__(self, ext, max_bytes, spool_bytes):
+        self.ext = ext
+        self.max_bytes = max_bytes
+        self.spool_bytes = spool_bytes
+        self.size = 0
+        self.path = None
+        self._head = b''
+        self._digest = hashlib.sha256()
+        self._file = io.BytesIO()
+
+    def write(self, data):
+        signature = FILE_SIGNATURES[self.ext]
+        if len(self._head) < len(signature):
+            self._head += data[:len(signature) - len(self._head)]
+            if not signature.startswith(self._head):
+                raise BadRequest(f'The file is not a valid .{self.ext} document.')
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise RequestEntityTooLarge(f'Uploaded files must be smaller than {self.max_bytes // (1024 * 1024)} MB.')
+        self._digest.update(data)
+        if self.path is None and self.size > self.spool_bytes:
+            self._spool()
+        return self._file.write(data)
+
+    def _spool(self):
+        spooled = tempfile.NamedTemporaryFile(prefix='upload-', suffix=f'.{self.ext}')
+        spooled.write(self._file.getbuffer())
+        self._file = spooled
+        self.path = spooled.name
+
+    @property
+    def sha256(self):
+        """The hex SHA-256 of everything written so far."""
+        return self._digest.hexdigest()
+
+    def __getattr__(self, name):
+        # read(), seek(), tell(), close() and the rest come from the underlying file
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """Streams uploads into UploadStreams, refusing types other than ALLOWED_EXTENSIONS early."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        filename = secure_filename(filename or '')
+        if not filename:
+            # No file was chosen; the view reports the missing field
+            return io.BytesIO()
+        if not allowed_file(filename):
+            raise BadRequest('Invalid file type. Please upload a .pdf or .docx file.')
+        config = current_app.config
+        return UploadStream(filename.rsplit('.', 1)[1].lower(), config['UPLOAD_MAX_BYTES'],
+                            config['UPLOAD_SPOOL_BYTES'])
@@ -1,26 +1,150 @@
 import os
-import docx
-import pdfplumber
+import re
+import time
+import zipfile
+from xml.etree.ElementTree import iterparse
 from werkzeug.utils import secure_filename
+from .pdf_worker import pdf_pool, extract_pdf_text
+from .cache import text_cache, hash_stream
+from .metrics import stage
 
 # Define the allowed file extensions
 ALLOWED_EXTENSIONS = {'pdf', 'docx'}
 
+# Bump this whenever an extractor changes so cached text is re-extracted
+EXTRACTOR_VERSION = '2'
+
+# WordprocessingML element names used by the streaming DOCX extractor
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+# Parts that hold visible text, in the order they are read: headers, body, notes, footers
+DOCX_TEXT_PARTS = re.compile(r'word/(header\d*|document|footnotes|endnotes|footer\d*)\.xml$')
+DOCX_PART_ORDER = {'header': 0, 'document': 1, 'footnotes': 2, 'endnotes': 3, 'footer': 4}
+
+# Refuse to inflate any single XML part beyond this size (zip bomb protection)
+DOCX_MAX_PART_BYTES = 50 * 1024 * 1024
+
 
 def allowed_file(filename):
     """Checks if the uploaded file has an allowed extension."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _iter_part_lines(xml_file):
+    """
+    Streams the text lines of one WordprocessingML part in document order.
+    Paragraphs become lines, table rows become tab-separated lines, and text boxes are
+    emitted where they are anchored. Elements are cleared as soon as they are consumed.
+    """
+    paragraphs = []  # Stack of open paragraphs (text boxes nest paragraphs inside runs)
+    rows = []        # Stack of open table rows, each a list of cell texts
+    cells = []       # Stack of open table cells, each a list of paragraph texts
+    fallback_depth = 0
+
+    for event, elem in iterparse(xml_file, events=('start', 'end')):
+        tag = elem.tag
+        if tag == MC_FALLBACK:
+            # Alternate content is stored twice; only read the preferred choice
+            fallback_depth += 1 if event == 'start' else -1
+            continue
+        if fallback_depth:
+            continue
+
+        if event == 'start':
+            if tag == W + 'p':
+                paragraphs.append([])
+            elif tag == W + 'tr':
+                rows.append([])
+            elif tag == W + 'tc':
+                cells.append([])
+            continue
+
+        if tag == W + 't' and paragraphs:
+            paragraphs[-1].append(elem.text or '')
+        elif tag == W + 'tab' and paragraphs:
+            paragraphs[-1].append('\t')
+        elif tag in (W + 'br', W + 'cr') and paragraphs:
+            paragraphs[-1].append('\n')
+        elif tag == W + 'p' and paragraphs:
+            text = ''.join(paragraphs.pop())
+            if cells and len(paragraphs) == 0:
+                cells[-1].append(text)
+            elif text:
+                yield text
+            elem.clear()
+        elif tag == W + 'tc' and cells:
+            cell_text = ' '.join(t for t in cells.pop() if t)
+            if rows:
+                rows[-1].append(cell_text)
+        elif tag == W + 'tr' and rows:
+            row = rows.pop()
+            line = '\t'.join(row).strip()
+            if cells:
+                cells[-1].append(line)  # Nested table
+            elif line:
+                yield line
+            elem.clear()
+
+
+def extract_docx_text(file_stream):
+    """
+    Extracts the text of a .docx file by streaming its XML parts straight from the zip,
+    without building the python-docx object model. Unlike python-docx's paragraph list,
+    this includes tables, text boxes, headers, footers and notes.
+    Args:
+        file_stream: A seekable binary file object.
+    Returns:
+        A string containing the text, one paragraph or table row per line.
+    """
+    with zipfile.ZipFile(file_stream) as archive:
+        parts = [info for info in archive.infolist() if DOCX_TEXT_PARTS.match(info.filename)]
+        if not any(info.filename == 'word/document.xml' for info in parts):
+            raise ValueError('Not a Word document: word/document.xml is missing.')
+        parts.sort(key=lambda info: (DOCX_PART_ORDER[DOCX_TEXT_PARTS.match(info.filename).group(1).rstrip('0123456789')],
+                                     info.filename))
+
+        lines = []
+        seen_parts = set()
+        for info in parts:
+            if info.file_size > DOCX_MAX_PART_BYTES:
+                raise ValueError(f'{info.filename} is too large to extract.')
+            with archive.open(info) as xml_file:
+                part_lines = tuple(_iter_part_lines(xml_file))
+            # First-page and even-page headers/footers often repeat the default one
+            if part_lines and part_lines not in seen_parts:
+                seen_parts.add(part_lines)
+                lines.extend(part_lines)
+        return '\n'.join(lines)
+
+
 def parse_docx(file_stream):
     """
     Parses the content of a .docx file.
+    Uses the streaming extractor and falls back to python-docx if it fails.
+    Args:
+        file_stream: The file stream object from the uploaded file.
+    Returns:
+        A string containing the text from the .docx file.
+    """
+    try:
+        return extract_docx_text(file_stream)
+    except Exception as e:
+        print(f"Streaming DOCX extraction failed, falling back to python-docx: {e}")
+        file_stream.seek(0)
+    return parse_docx_with_python_docx(file_stream)
+
+
+def parse_docx_with_python_docx(file_stream):
+    """
+    Parses the body paragraphs of a .docx file with python-docx.
     Args:
         file_stream: The file stream object from the uploaded file.
     Returns:
         A string containing the text from the .docx file.
     """
     try:
+        import docx
         doc = docx.Document(file_stream)
         full_text = []
         for para in doc.paragraphs:
@@ -32,22 +156,18 @@ def parse_docx(file_stream):
         return ""
 
 
-def parse_pdf(file_stream):
+def parse_pdf(file_stream, mode='layout'):
     """
-    Parses the content of a .pdf file.
+    Parses the content of a .pdf file in the current process.
+    Uploads go through the isolated worker pool instead (see get_text_from_file).
     Args:
         file_stream: The file stream object from the uploaded file.
+        mode: 'layout' for pdfplumber's layout analysis, 'fast' for the plain text layer.
     Returns:
         A string containing the text from the .pdf file.
     """
-    text = ""
     try:
-        with pdfplumber.open(file_stream) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text
+        return extract_pdf_text(file_stream.read(), mode=mode)
     except Exception as e:
         print(f"Error parsing PDF file: {e}")
         return ""
@@ -61,6 +181,8 @@ def get_text_from_file(file):
         file: The file object from the Flask request.
     Returns:
         A string of the extracted text or None if the file type is not allowed.
+    Raises:
+        PDFExtractionError: If a PDF is too large, times out or can't be read.
     """
     filename = secure_filename(file.filename)
 
@@ -73,10 +195,33 @@ def get_text_from_file(file):
     # file.stream gives us a file-like object that our parsers can read
     file_stream = file.stream
 
-    if ext == 'docx':
-        return parse_docx(file_stream)
-    elif ext == 'pdf':
-        return parse_pdf(file_stream)
+    # Re-uploads of the same file skip parsing entirely. Uploads parsed by UploadRequest
+    # were hashed as they arrived
+    mode = pdf_pool.mode if ext == 'pdf' else None
+    with stage('hash'):
+        digest = getattr(file_stream, 'sha256', None) or hash_stream(file_stream)
+        cache_key = f'{digest}:{ext}:{mode}:{EXTRACTOR_VERSION}'
+    cached = text_cache.get(cache_key)
+    if cached is not None:
+        text_cache.counters['parse_seconds_saved'] = round(
+            text_cache.counters.get('parse_seconds_saved', 0.0) + cached['parse_seconds'], 6)
+        return cached['text']
+
+    started = time.perf_counter()
+    with stage('parse'):
+        if ext == 'docx':
+            text = parse_docx(file_stream)
+        else:
+            # PDFs are parsed in a separate, time- and memory-bounded process, which reads
+            # uploads spooled to disk straight from their temp file
+            text = pdf_pool.extract(getattr(file_stream, 'path', None) or file_stream.read())
+    parse_seconds = time.perf_counter() - started
 
-    return None
+    if text:
+        text_cache.set(cache_key, {
+            'text': text,
+            'extractor_version': EXTRACTOR_VERSION,
+            'parse_seconds': parse_seconds,
+        })
+    return text
 
@@ -0,0 +1,56 @@
+import importlib
+import time
+
+# Libraries imported on first use rather than at start-up, slowest first
+LAZY_MODULES = ('google.generativeai', 'pdfplumber', 'html2docx', 'docx', 'pypdfium2')
+
+
+def warmup(app):
+    """
+    Pays the one-off start-up costs before the first request: imports the lazily
+    loaded libraries and compiles every Jinja template. Run it in the master process
+    of a pre-forking server (gunicorn --preload) so the workers inherit the result.
+    No model client is created here, since gRPC channels don't survive a fork, and
+    any database connection opened while building the app is closed at the end.
+    Job and scheduler threads start on first use, so the master runs none.
+    Args:
+        app: The Flask application.
+    Returns:
+        A dictionary of {module name or 'templates': seconds taken}.
+    """
+    timings = {}
+    for name in LAZY_MODULES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Could not preload {name}: {e}")
+            continue
+        timings[name] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for template in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(template)
+        except Exception as e:
+            print(f"Could not compile template {template}: {e}")
+    timings['templates'] = time.perf_counter() - started
+
+    release_connections(app)
+    return timings
+
+
+def release_connections(app):
+    """
+    Closes the app's database and cache connections, so processes forked afterwards
+    open their own rather than sharing the parent's. They reopen on next use.
+    """
+    from app import db
+    from .cache import ai_cache, text_cache
+    with app.app_context():
+        db.engine.dispose()
+    for cache in (ai_cache, text_cache):
+        cache.close()
+    backend = getattr(app.session_interface, 'backend', None)
+    if hasattr(backend, 'close'):
+        backend.close()
@@ -0,0 +1,73 @@
+"""
+Compares the streaming DOCX extractor with python-docx on a corpus of resumes.
+
+Usage:
+    python benchmarks/bench_docx.py [CORPUS_DIR ...] [--repeat N]
+
+Every .docx file found (recursively) under the given directories is parsed with both
+extractors. The report shows mean time per document, peak traced memory and how much
+text each extractor recovered.
+"""
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils import extract_docx_text, parse_docx_with_python_docx  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test_files')
+
+EXTRACTORS = {
+    'streaming': extract_docx_text,
+    'python-docx': parse_docx_with_python_docx,
+}
+
+
+def measure(extractor, documents, repeat):
+    """Returns (mean seconds per document, peak bytes, total characters extracted)."""
+    chars = sum(len(extractor(io.BytesIO(data))) for data in documents)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in documents:
+            extractor(io.BytesIO(data))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for data in documents:
+        extractor(io.BytesIO(data))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed / (repeat * len(documents)), peak, chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='*', default=[DEFAULT_CORPUS], help='Directories containing .docx files')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed passes over the corpus')
+    args = parser.parse_args()
+
+    paths = sorted(p for d in args.corpus for p in glob.glob(os.path.join(d, '**', '*.docx'), recursive=True)
+                   if not os.path.basename(p).startswith('~$'))
+    if not paths:
+        sys.exit('No .docx files found.')
+    documents = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            documents.append(f.read())
+
+    print(f"{len(documents)} documents, {sum(map(len, documents)) / 1024:.1f} KiB, {args.repeat} passes")
+    print(f"{'extractor':<12} {'ms/doc':>10} {'peak KiB':>10} {'chars':>10}")
+    for name, extractor in EXTRACTORS.items():
+        seconds, peak, chars = measure(extractor, documents, args.repeat)
+        print(f"{name:<12} {seconds * 1000:>10.3f} {peak / 1024:>10.1f} {chars:>10}")
+
+
+if __name__ == '__main__':
+    main()
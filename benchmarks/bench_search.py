@@ -0,0 +1,108 @@
+"""
+Measures full-text search latency over a large synthetic set of saved analyses.
+
+Usage:
+    python benchmarks/bench_search.py [--analyses N] [--users N] [--repeat N]
+
+A temporary SQLite database is filled with N analyses (spread over --users users, with
+the first user owning half of them), the search index is rebuilt, and a set of typical
+queries is timed against the busiest user. The report shows p50/p95 latency per query.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, db  # noqa: E402
+from app.models import User, Resume, Analysis  # noqa: E402
+from app.search import search_analyses, rebuild_search_index  # noqa: E402
+
+TITLES = ['Data Engineer', 'Senior Data Engineer', 'Frontend Developer', 'Backend Engineer', 'Product Manager',
+          'Machine Learning Engineer', 'DevOps Engineer', 'Data Analyst', 'QA Engineer', 'Engineering Manager']
+WORDS = ('python sql spark airflow kafka react typescript kubernetes terraform aws gcp azure docker pandas '
+         'tableau excel java go rust graphql postgres redis snowflake dbt looker agile scrum stakeholders '
+         'pipelines dashboards microservices testing automation mentoring roadmap analytics').split()
+QUERIES = ['data engineer', 'data engineer march', 'kubernetes terraform', 'snowflake', 'react typ', 'zzz']
+
+
+def populate(count, users, rng):
+    user_ids = []
+    for n in range(users):
+        user = User(username=f'bench{n}', email=f'bench{n}@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        user_ids.append(user.id)
+    resume_ids = {}
+    for user_id in user_ids:
+        resume = Resume(original_filename=f'resume_{user_id}.pdf', user_id=user_id,
+                        structured_data_json='{"skills": ["Python", "SQL", "Spark"]}')
+        db.session.add(resume)
+        db.session.flush()
+        resume_ids[user_id] = resume.id
+    db.session.commit()
+
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        user_id = user_ids[0] if i % 2 == 0 else rng.choice(user_ids)
+        title = rng.choice(TITLES)
+        body = ' '.join(rng.choice(WORDS) for _ in range(120))
+        rows.append({
+            'resume_id': resume_ids[user_id],
+            'job_description': f'{title}\n{body}',
+            'jd_title': title,
+            'match_score': rng.randint(20, 95),
+            'analysis_data_json': '{"missing_keywords": ["%s", "%s"]}' % (rng.choice(WORDS), rng.choice(WORDS)),
+            'timestamp': start + timedelta(minutes=5 * i),
+        })
+        if len(rows) == 5000:
+            db.session.execute(Analysis.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Analysis.__table__.insert(), rows)
+    db.session.commit()
+    return user_ids[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--analyses', type=int, default=100000, help='Analyses to generate')
+    parser.add_argument('--users', type=int, default=50, help='Users to spread them over')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed runs per query')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(directory, 'bench.db'),
+        'CACHE_DATABASE_PATH': None,
+        'SESSION_BACKEND': 'memory',
+    })
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        user_id = populate(args.analyses, args.users, random.Random(0))
+        print(f"Generated {args.analyses} analyses in {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        rebuild_search_index()
+        print(f"Indexed in {time.perf_counter() - started:.1f}s")
+
+        print(f"{'query':<24} {'hits':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                results, _ = search_analyses(user_id, query)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{query:<24} {len(results):>6} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Measures how long a fresh process takes to import the app and build it.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat N] [--top N] [--max-ms MS]
+
+Each run starts a new interpreter (so nothing is already imported) that times
+`import app`, `create_app()` and a first GET /login, with and without PRELOAD=1.
+The slowest imports are listed from `python -X importtime`. With --max-ms the exit
+status is 1 when the median cold create_app() exceeds the threshold, so CI can
+catch a heavy dependency creeping back into module load.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROBE = '''
+import json, os, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app({'TESTING': True, 'WTF_CSRF_ENABLED': False})
+created = time.perf_counter()
+application.test_client().get('/login')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - started) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'loaded': [m for m in ('google.generativeai', 'pdfplumber', 'docx', 'html2docx') if m in sys.modules],
+}))
+'''
+
+
+def run_probe(env, directory):
+    env = dict(os.environ, PYTHONPATH=ROOT, DATABASE_URL='sqlite:///' + os.path.join(directory, 'app.db'),
+               CACHE_DATABASE_PATH=os.path.join(directory, 'cache.db'), LLM_PROVIDER='stub', **env)
+    output = subprocess.run([sys.executable, '-W', 'ignore', '-c', PROBE], env=env, cwd=directory,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(directory, top, depth=2):
+    """
+    Returns the `top` modules with the highest cumulative import time (in ms) among
+    those imported at most `depth` levels below the import of the app package.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    stderr = subprocess.run([sys.executable, '-W', 'ignore', '-X', 'importtime', '-c', 'import app'],
+                            env=env, cwd=directory, capture_output=True, text=True).stderr
+    costs = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Each level of nesting indents the module name by two spaces
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level <= depth:
+            costs.append((int(cumulative) / 1000, name.strip()))
+    return sorted(costs, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    parser.add_argument('--max-ms', type=float, help='Fail if the median create_app() time exceeds this')
+    args = parser.parse_args()
+
+    medians = {}
+    with tempfile.TemporaryDirectory(prefix='startup-') as directory:
+        for label, env in (('lazy', {'PRELOAD': '0'}), ('preload', {'PRELOAD': '1'})):
+            runs = [run_probe(env, directory) for _ in range(args.repeat)]
+            medians[label] = {key: statistics.median(run[key] for run in runs)
+                              for key in ('import_ms', 'create_app_ms', 'first_request_ms')}
+            print(f"{label:<8} import {medians[label]['import_ms']:7.1f} ms   "
+                  f"create_app {medians[label]['create_app_ms']:7.1f} ms   "
+                  f"first request {medians[label]['first_request_ms']:6.1f} ms   "
+                  f"heavy modules loaded: {', '.join(runs[0]['loaded']) or 'none'}")
+
+        print('\nSlowest imports of `import app`:')
+        for ms, name in slowest_imports(directory, args.top):
+            print(f'  {ms:8.1f} ms  {name}')
+
+    if args.max_ms is not None and medians['lazy']['create_app_ms'] > args.max_ms:
+        print(f"create_app() took {medians['lazy']['create_app_ms']:.1f} ms, over the {args.max_ms:.0f} ms limit")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Generates synthetic resumes and job descriptions for benchmarks and load tests.
+
+Usage:
+    python benchmarks/corpus.py OUTPUT_DIR [--count N] [--seed N]
+
+Writes N resumes in each size (small: 1 page, medium: 2 pages, large: 5 pages) as
+both .docx and .pdf, plus a jds.json file of job descriptions. PDFs are written directly
+(one Helvetica text stream per page), so no PDF library is needed.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+
+import docx
+
+FIRST_NAMES = ['Jane', 'John', 'Priya', 'Wei', 'Fatima', 'Carlos', 'Olga', 'Kwame', 'Aiko', 'Liam']
+LAST_NAMES = ['Doe', 'Smith', 'Patel', 'Chen', 'Haddad', 'Garcia', 'Ivanova', 'Mensah', 'Sato', 'Murphy']
+TITLES = ['Data Engineer', 'Backend Developer', 'Frontend Engineer', 'Product Manager', 'Data Analyst',
+          'Machine Learning Engineer', 'DevOps Engineer', 'QA Engineer', 'Engineering Manager']
+SKILLS = ['Python', 'SQL', 'Spark', 'Airflow', 'Kafka', 'React', 'TypeScript', 'Kubernetes', 'Terraform', 'AWS',
+          'GCP', 'Docker', 'Pandas', 'Tableau', 'Java', 'Go', 'GraphQL', 'PostgreSQL', 'Redis', 'Snowflake', 'dbt']
+VERBS = ['Built', 'Designed', 'Led', 'Migrated', 'Automated', 'Optimized', 'Launched', 'Maintained', 'Scaled']
+OBJECTS = ['data pipelines', 'REST APIs', 'a design system', 'CI/CD workflows', 'reporting dashboards',
+           'a recommendation service', 'the billing platform', 'ETL jobs', 'monitoring and alerting']
+OUTCOMES = ['reducing latency by 40%', 'saving $200k a year', 'serving 2M daily users', 'cutting costs by 25%',
+            'improving reliability to 99.95%', 'shortening release cycles from weeks to days']
+
+# Jobs per resume size; each job has six bullet points
+SIZES = {'small': 2, 'medium': 8, 'large': 28}
+
+
+def resume_lines(rng, jobs):
+    """Returns the lines of a synthetic resume with the given number of jobs."""
+    name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+    lines = [name, f'{name.lower().replace(" ", ".")}@example.com | 555-01{rng.randint(10, 99)}',
+             'Summary', f'{rng.choice(TITLES)} with {rng.randint(2, 15)} years of experience in '
+                        f'{", ".join(rng.sample(SKILLS, 4))}.', 'Experience']
+    for job in range(jobs):
+        lines.append(f'{rng.choice(TITLES)}, Company {job + 1} ({2024 - 2 * job - 2} - {2024 - 2 * job})')
+        for _ in range(6):
+            lines.append(f'- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(SKILLS)}, '
+                         f'{rng.choice(OUTCOMES)}.')
+    lines += ['Education', 'BSc Computer Science, State University, 2015', 'Skills',
+              ', '.join(rng.sample(SKILLS, 10))]
+    return lines
+
+
+def job_description(rng):
+    title = rng.choice(TITLES)
+    skills = rng.sample(SKILLS, 6)
+    return '\n'.join([
+        title,
+        f'We are looking for a {title} to join our growing team.',
+        'Responsibilities:',
+        *[f'- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {skill}.' for skill in skills[:4]],
+        'Requirements:',
+        f'- {rng.randint(2, 8)}+ years of experience with {", ".join(skills)}.',
+        '- Strong communication skills.',
+    ])
+
+
+def docx_bytes(lines):
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    stream = io.BytesIO()
+    document.save(stream)
+    return stream.getvalue()
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('latin-1', 'replace')
+
+
+def pdf_bytes(lines, lines_per_page=50):
+    """Writes a minimal, valid multi-page PDF with one line of Helvetica text per resume line."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_ids = []
+    for page_lines in pages:
+        stream = b'BT /F1 10 Tf 50 800 Td 14 TL ' + b''.join(
+            b'(' + _pdf_escape(line) + b') Tj T* ' for line in page_lines) + b'ET'
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects))
+        page_ids.append(len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % i for i in page_ids), len(page_ids))
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+    xref = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    out.write(b''.join(b'%010d 00000 n \n' % offset for offset in offsets))
+    out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def generate(count=3, seed=0):
+    """
+    Builds an in-memory corpus.
+    Returns:
+        A dict with "resumes" (a list of {"name", "size", "format", "data"}) and "jds" (a list of strings).
+    """
+    rng = random.Random(seed)
+    resumes = []
+    for size, jobs in SIZES.items():
+        for i in range(count):
+            lines = resume_lines(rng, jobs)
+            resumes.append({'name': f'{size}_{i}.docx', 'size': size, 'format': 'docx', 'data': docx_bytes(lines)})
+            resumes.append({'name': f'{size}_{i}.pdf', 'size': size, 'format': 'pdf', 'data': pdf_bytes(lines)})
+    return {'resumes': resumes, 'jds': [job_description(rng) for _ in range(max(5, count * 3))]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='Directory to write the corpus to')
+    parser.add_argument('--count', type=int, default=5, help='Resumes per size and format')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible corpora')
+    args = parser.parse_args()
+
+    corpus = generate(args.count, args.seed)
+    os.makedirs(args.output, exist_ok=True)
+    for resume in corpus['resumes']:
+        with open(os.path.join(args.output, resume['name']), 'wb') as f:
+            f.write(resume['data'])
+    with open(os.path.join(args.output, 'jds.json'), 'w') as f:
+        json.dump(corpus['jds'], f, indent=2)
+    print(f"Wrote {len(corpus['resumes'])} resumes and {len(corpus['jds'])} job descriptions to {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
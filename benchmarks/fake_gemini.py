@@ -0,0 +1,104 @@
+"""
+An offline stand-in for the Gemini API, used by the load test and microbenchmarks.
+
+It answers each kind of prompt the app sends (combined, analysis-only, structure-only
+and cover letter) with plausible JSON or text, after a delay drawn from a configurable
+latency distribution:
+
+    fixed:0.8             always 0.8 s
+    uniform:0.3,1.5       uniformly between 0.3 and 1.5 s
+    normal:0.8,0.2        mean 0.8 s, standard deviation 0.2 s (never below 0)
+    lognormal:0.8,0.5     median 0.8 s with a long tail (sigma 0.5), like real model calls
+"""
+import json
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.llm import StubProvider  # noqa: E402
+from app.scoring import score_resume  # noqa: E402
+
+
+def latency_distribution(spec, rng=None):
+    """
+    Parses a latency spec (see the module docstring) into a callable returning seconds.
+    Raises:
+        ValueError: If the spec is not understood.
+    """
+    rng = rng or random.Random()
+    kind, _, args = spec.partition(':')
+    try:
+        params = [float(a) for a in args.split(',')] if args else []
+    except ValueError:
+        raise ValueError(f'Invalid latency spec: {spec!r}')
+    if kind == 'fixed' and len(params) == 1:
+        return lambda: params[0]
+    if kind == 'uniform' and len(params) == 2:
+        return lambda: rng.uniform(params[0], params[1])
+    if kind == 'normal' and len(params) == 2:
+        return lambda: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == 'lognormal' and len(params) == 2:
+        mu = math.log(params[0])
+        return lambda: rng.lognormvariate(mu, params[1])
+    raise ValueError(f'Invalid latency spec: {spec!r}')
+
+
+def _section(prompt, name):
+    """Returns the text between the ``` fences that follow a heading in a prompt."""
+    start = prompt.find(name)
+    if start < 0:
+        return ''
+    start = prompt.find('```', start)
+    end = prompt.find('```', start + 3)
+    return prompt[start + 3:end].strip() if start >= 0 and end > start else ''
+
+
+def _structure(resume_text):
+    lines = [line.strip() for line in resume_text.splitlines() if line.strip()]
+    return {
+        'full_name': lines[0] if lines else 'Jane Doe',
+        'contact_info': {'email': 'jane.doe@example.com', 'phone': '555-0100', 'linkedin': '', 'address': ''},
+        'summary': ' '.join(lines[1:3]),
+        'work_experience': [{'job_title': 'Engineer', 'company': 'Example Corp', 'location': 'Remote',
+                             'dates': '2020 - Present', 'responsibilities': lines[3:8]}],
+        'education': [{'degree': 'BSc Computer Science', 'institution': 'State University', 'location': '',
+                       'graduation_date': '2019'}],
+        'skills': sorted({word.strip(',.') for line in lines for word in line.split() if word.istitle()})[:15],
+    }
+
+
+def _analysis(resume_text, jd_text):
+    local = score_resume(resume_text, jd_text)
+    return {
+        'match_score': local['match_score'],
+        'missing_keywords': local['missing_keywords'],
+        'resume_suggestions': [{'original': 'Worked on data pipelines.',
+                                'rewritten': 'Built Spark pipelines processing 2 TB of events per day.'}],
+        'cover_letter_themes': ['Impact', 'Ownership'],
+    }
+
+
+def fake_response(prompt):
+    """Answers a prompt the way Gemini would, wrapped in a ```json fence like the real model."""
+    resume_text = _section(prompt, 'Resume Text')
+    jd_text = _section(prompt, 'Job Description')
+    if 'cover letter' in prompt and 'Dear Hiring Manager' in prompt:
+        return 'Dear Hiring Manager,\n\n' + '\n\n'.join(
+            ['I am excited to apply for this role. ' * 4] * 3) + '\n\nSincerely,\nJane Doe'
+    if '"analysis_results"' in prompt:
+        data = {'analysis_results': _analysis(resume_text, jd_text), 'structured_resume': _structure(resume_text)}
+    elif 'Job Description' in prompt:
+        data = _analysis(resume_text, jd_text)
+    else:
+        data = _structure(resume_text)
+    return '```json\n' + json.dumps(data, indent=2) + '\n```'
+
+
+def make_provider(latency='lognormal:0.8,0.5', error_rate=0.0, seed=None):
+    """Builds a StubProvider that behaves like Gemini with the given latency spec."""
+    rng = random.Random(seed)
+    return StubProvider(response=fake_response, latency=latency_distribution(latency, rng),
+                        error_rate=error_rate, seed=seed)
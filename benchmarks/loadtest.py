@@ -0,0 +1,282 @@
+"""
+Offline end-to-end load test.
+
+Usage:
+    python benchmarks/loadtest.py [--users N] [--duration S] [--latency SPEC]
+                                  [--baseline PATH [--tolerance F]] [--save-baseline PATH] [--output PATH]
+
+Starts the app in-process on a local port with a temporary database and the fake Gemini
+backend (see fake_gemini.py for latency specs), then runs N virtual users for S seconds.
+Each user registers, logs in and analyzes a resume once, then loops over a weighted mix
+of /api/analyze, /dashboard, /designer/<template_name> and /export/docx.
+
+The report shows requests, errors, p50/p95/p99 latency and requests/sec per endpoint.
+With --baseline, the run is compared against a previous --save-baseline result: the
+exit status is 1 if any endpoint's p95 grew, or throughput fell, by more than the
+tolerance (default 25%), if its error rate rose, or if it completed no requests, so CI
+can fail on regressions. A baseline records the run parameters it was made with (users,
+duration, latency, corpus size, AI cache and seed); a run with different parameters is
+not compared and exits with status 2. Baselines depend on the
+machine, so record them on the hardware that runs the comparison.
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import corpus  # noqa: E402
+from fake_gemini import make_provider  # noqa: E402
+
+# Relative frequency of each request in a virtual user's loop
+SCENARIOS = {'analyze': 1, 'dashboard': 3, 'designer': 3, 'export_docx': 1}
+
+EXPORT_HTML = '<h1>Jane Doe</h1><p>jane.doe@example.com</p>' + ''.join(
+    f'<h2>Role {i}</h2><ul>' + '<li>Built data pipelines with Spark, reducing latency by 40%.</li>' * 6 + '</ul>'
+    for i in range(6)
+)
+
+
+def design_names(app):
+    """The designer templates a user can pick."""
+    return sorted(app.extensions['design_renderer'].designs)
+
+
+def multipart(fields, files):
+    """Encodes form fields and (name, filename, bytes) files as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, filename, data in files:
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                   f'Content-Type: application/octet-stream\r\n\r\n'.encode())
+        body.write(data + b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+class VirtualUser:
+    def __init__(self, base_url, number, data, designs, rng):
+        self.base_url = base_url
+        self.number = number
+        self.data = data
+        self.designs = designs
+        self.rng = rng
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+
+    def request(self, path, body=None, content_type=None):
+        request = Request(self.base_url + path, data=body, headers={'Content-Type': content_type} if content_type else {})
+        try:
+            with self.opener.open(request, timeout=120) as response:
+                response.read()
+                return response.status
+        except HTTPError as e:
+            e.read()
+            return e.code
+
+    def login(self):
+        username = f'load{self.number}_{uuid.uuid4().hex[:6]}'
+        form = f'username={username}&email={username}@example.com&password=secret&password2=secret&submit=Register'
+        self.request('/register', form.encode(), 'application/x-www-form-urlencoded')
+        self.request('/login', f'username={username}&password=secret&submit=Sign+In'.encode(),
+                     'application/x-www-form-urlencoded')
+
+    def analyze(self):
+        resume = self.rng.choice(self.data['resumes'])
+        body, content_type = multipart({'job_description': self.rng.choice(self.data['jds'])},
+                                       [('resume', resume['name'], resume['data'])])
+        return self.request('/api/analyze', body, content_type)
+
+    def dashboard(self):
+        return self.request('/dashboard')
+
+    def designer(self):
+        return self.request(f'/designer/{self.rng.choice(self.designs)}')
+
+    def export_docx(self):
+        return self.request('/export/docx', json.dumps({'html': EXPORT_HTML}).encode(), 'application/json')
+
+
+def run_user(user, deadline, results, lock):
+    user.login()
+    user.analyze()  # puts a structured resume in the session for the designer
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name] for name in names]
+    while time.monotonic() < deadline:
+        name = user.rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            status = getattr(user, name)()
+        except Exception:
+            status = 0
+        elapsed = time.perf_counter() - started
+        with lock:
+            results.append((name, elapsed, status))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def summarize(results, duration):
+    report = {}
+    for name in itertools.chain(SCENARIOS, ['total']):
+        samples = [r for r in results if name == 'total' or r[0] == name]
+        latencies = sorted(r[1] * 1000 for r in samples)
+        report[name] = {
+            'requests': len(samples),
+            'errors': sum(1 for r in samples if not 200 <= r[2] < 400),
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'rps': len(samples) / duration,
+        }
+    return report
+
+
+# Arguments that change the workload; runs are only comparable when these match
+BASELINE_PARAMS = ('users', 'duration', 'latency', 'corpus_size', 'no_ai_cache', 'seed')
+
+
+def run_params(args):
+    return {name: getattr(args, name) for name in BASELINE_PARAMS}
+
+
+def mismatched_params(params, baseline_params):
+    """Returns a list of messages for the run parameters that differ from the baseline's."""
+    return [f"{name}: {params[name]!r} vs baseline {baseline_params.get(name, 'unrecorded')!r}"
+            for name in BASELINE_PARAMS if baseline_params.get(name) != params[name]]
+
+
+def compare(report, baseline, tolerance):
+    """Returns a list of regression messages (empty if the run is within tolerance)."""
+    regressions = []
+    for name, base in baseline.items():
+        current = report.get(name)
+        if not current or not current['requests']:
+            regressions.append(f"{name}: no requests completed (baseline {base.get('requests', 0)})")
+            continue
+        error_rate = current['errors'] / current['requests']
+        base_error_rate = base.get('errors', 0) / base['requests'] if base.get('requests') else 0
+        if error_rate > base_error_rate * (1 + tolerance):
+            regressions.append(f"{name}: {error_rate:.1%} errors vs baseline {base_error_rate:.1%}")
+        if base.get('p95_ms') and current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f} ms")
+        if base.get('rps') and current['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {current['rps']:.1f} req/s vs baseline {base['rps']:.1f} req/s")
+    return regressions
+
+
+def start_app(directory, args):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import create_app, db
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    app = create_app({
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(directory, 'load.db'),
+        'CACHE_DATABASE_PATH': os.path.join(directory, 'cache.db'),
+        'AI_CACHE_ENABLED': not args.no_ai_cache,
+        'LLM_PROVIDER': make_provider(args.latency, seed=args.seed),
+        'JOB_WORKERS': args.users,
+    })
+    with app.app_context():
+        db.create_all()
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return app, server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=8, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to run for')
+    parser.add_argument('--latency', default='lognormal:0.8,0.5', help='Fake Gemini latency distribution')
+    parser.add_argument('--corpus-size', type=int, default=2, help='Resumes per size and format')
+    parser.add_argument('--no-ai-cache', action='store_true', help='Send every analysis to the fake model')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', help='Compare against this baseline JSON')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative regression')
+    parser.add_argument('--save-baseline', help='Write this run as a baseline JSON')
+    parser.add_argument('--output', help='Write the full report as JSON')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatches = mismatched_params(run_params(args), baseline.get('params', {}))
+        if mismatches:
+            print('Not compared: the baseline was recorded with different parameters:')
+            for message in mismatches:
+                print(f'  {message}')
+            sys.exit(2)
+
+    directory = tempfile.mkdtemp(prefix='loadtest-')
+    try:
+        app, server = start_app(directory, args)
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        data = corpus.generate(args.corpus_size, args.seed)
+        designs = design_names(app)
+
+        results, lock = [], threading.Lock()
+        deadline = time.monotonic() + args.duration
+        users = [VirtualUser(base_url, n, data, designs, random.Random(args.seed + n)) for n in range(args.users)]
+        threads = [threading.Thread(target=run_user, args=(user, deadline, results, lock)) for user in users]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        server.shutdown()
+        report = summarize(results, time.monotonic() - started)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{args.users} users, {args.duration:.0f}s, latency {args.latency}")
+    print(f"{'endpoint':<12} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+    for name, row in report.items():
+        if not row['requests']:
+            continue
+        print(f"{name:<12} {row['requests']:>9} {row['errors']:>7} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+              f"{row['p99_ms']:>9.1f} {row['rps']:>8.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'report': report}, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'params': run_params(args), 'report': report}, f, indent=2)
+
+    if baseline:
+        regressions = compare(report, baseline['report'], args.tolerance)
+        if regressions:
+            print('Regressions against the baseline:')
+            for message in regressions:
+                print(f'  {message}')
+            sys.exit(1)
+        print('No regressions against the baseline.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Microbenchmarks for the CPU-bound steps of an analysis.
+
+Usage:
+    python benchmarks/microbench.py [--count N] [--repeat N] [--json]
+
+Times parse_pdf and parse_docx on a synthetic corpus (see corpus.py), prompt compaction and building,
+and extraction of the JSON from a model answer. Reports the mean and p95 per call.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import corpus  # noqa: E402
+from fake_gemini import fake_response  # noqa: E402
+from app.utils import parse_docx, parse_pdf  # noqa: E402
+from app.nlp_processor import get_combined_prompt, get_analysis_prompt, extract_json, compact_prompt_inputs  # noqa: E402
+from app.scoring import score_resume  # noqa: E402
+
+
+def timed(func, inputs, repeat):
+    """Calls func on every input `repeat` times. Returns the per-call durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        for item in inputs:
+            started = time.perf_counter()
+            func(item)
+            durations.append(time.perf_counter() - started)
+    return durations
+
+
+def summarize(durations):
+    durations = sorted(durations)
+    return {
+        'calls': len(durations),
+        'mean_ms': statistics.fmean(durations) * 1000,
+        'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000,
+    }
+
+
+def run(count=2, repeat=5):
+    """Runs every microbenchmark. Returns {name: summary}."""
+    data = corpus.generate(count)
+    by_format = {fmt: [r for r in data['resumes'] if r['format'] == fmt] for fmt in ('pdf', 'docx')}
+    texts = [parse_docx(io.BytesIO(r['data'])) for r in by_format['docx']]
+    pairs = [(text, jd) for text in texts for jd in data['jds'][:3]]
+    answers = [fake_response(get_combined_prompt(text, jd)) for text, jd in pairs]
+
+    benchmarks = {}
+    for size in corpus.SIZES:
+        for fmt, parser in (('pdf', parse_pdf), ('docx', parse_docx)):
+            inputs = [r['data'] for r in by_format[fmt] if r['size'] == size]
+            benchmarks[f'parse_{fmt}[{size}]'] = (lambda data, parser=parser: parser(io.BytesIO(data)), inputs)
+    benchmarks['compact_prompt_inputs'] = (lambda pair: compact_prompt_inputs(*pair), pairs)
+    benchmarks['score_resume'] = (lambda pair: score_resume(*pair), pairs)
+    benchmarks['get_combined_prompt'] = (
+        lambda pair: get_combined_prompt(pair[0], pair[1], score_resume(*pair)['missing_keywords']), pairs)
+    benchmarks['get_analysis_prompt'] = (lambda pair: get_analysis_prompt(*pair), pairs)
+    benchmarks['extract_json'] = (extract_json, answers)
+
+    return {name: summarize(timed(func, inputs, repeat)) for name, (func, inputs) in benchmarks.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=2, help='Resumes per size and format')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed passes over the inputs')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    results = run(args.count, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'benchmark':<24} {'calls':>6} {'mean ms':>10} {'p95 ms':>10}")
+    for name, summary in results.items():
+        print(f"{name:<24} {summary['calls']:>6} {summary['mean_ms']:>10.3f} {summary['p95_ms']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
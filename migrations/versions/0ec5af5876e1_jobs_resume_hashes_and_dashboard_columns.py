@@ -0,0 +1,67 @@
+"""Analysis jobs, resume content hashes and denormalized dashboard columns
+
+Revision ID: 0ec5af5876e1
+Revises: 1fdf6e1a7d9a
+Create Date: 2026-10-18 09:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0ec5af5876e1'
+down_revision = '1fdf6e1a7d9a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('analysis_job',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('original_filename', sa.String(length=128), nullable=True),
+    sa.Column('resume_text', sa.Text(), nullable=True),
+    sa.Column('job_description', sa.Text(), nullable=True),
+    sa.Column('result_json', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('analysis_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_analysis_job_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_analysis_job_status'), ['status'], unique=False)
+
+    with op.batch_alter_table('resume', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_resume_content_hash'), ['content_hash'], unique=False)
+        batch_op.create_index(batch_op.f('ix_resume_user_id'), ['user_id'], unique=False)
+
+    # match_score and jd_title start empty; fill them with "flask backfill-analyses"
+    with op.batch_alter_table('analysis', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('match_score', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('jd_title', sa.String(length=120), nullable=True))
+        batch_op.create_index(batch_op.f('ix_analysis_match_score'), ['match_score'], unique=False)
+        batch_op.create_index(batch_op.f('ix_analysis_resume_id'), ['resume_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('analysis', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_analysis_resume_id'))
+        batch_op.drop_index(batch_op.f('ix_analysis_match_score'))
+        batch_op.drop_column('jd_title')
+        batch_op.drop_column('match_score')
+
+    with op.batch_alter_table('resume', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_resume_user_id'))
+        batch_op.drop_index(batch_op.f('ix_resume_content_hash'))
+        batch_op.drop_column('content_hash')
+
+    with op.batch_alter_table('analysis_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_analysis_job_status'))
+        batch_op.drop_index(batch_op.f('ix_analysis_job_created_at'))
+
+    op.drop_table('analysis_job')
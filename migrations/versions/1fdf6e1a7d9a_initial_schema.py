@@ -0,0 +1,69 @@
+"""Initial schema: users, resumes and analyses
+
+Revision ID: 1fdf6e1a7d9a
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1fdf6e1a7d9a'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=64), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('password_hash', sa.String(length=128), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_user_username'), ['username'], unique=True)
+
+    op.create_table('resume',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('original_filename', sa.String(length=128), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('structured_data_json', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('resume', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_resume_timestamp'), ['timestamp'], unique=False)
+
+    op.create_table('analysis',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_description', sa.Text(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('analysis_data_json', sa.Text(), nullable=True),
+    sa.Column('resume_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['resume_id'], ['resume.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('analysis', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_analysis_timestamp'), ['timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('analysis', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_analysis_timestamp'))
+
+    op.drop_table('analysis')
+    with op.batch_alter_table('resume', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_resume_timestamp'))
+
+    op.drop_table('resume')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_username'))
+        batch_op.drop_index(batch_op.f('ix_user_email'))
+
+    op.drop_table('user')
@@ -0,0 +1,47 @@
+"""Store resume and analysis blobs as compressed binary
+
+Revision ID: 3967893ced2a
+Revises: 0ec5af5876e1
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.database import CompressedText
+
+
+# revision identifiers, used by Alembic.
+revision = '3967893ced2a'
+down_revision = '0ec5af5876e1'
+branch_labels = None
+depends_on = None
+
+COLUMNS = {
+    'resume': ['structured_data_json'],
+    'analysis': ['job_description', 'analysis_data_json'],
+}
+
+
+def upgrade():
+    # Existing rows keep their plain text, which CompressedText still reads;
+    # compress them afterwards with "flask compress-blobs"
+    for table, columns in COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.Text(), type_=sa.LargeBinary(),
+                                      existing_nullable=True)
+
+
+def downgrade():
+    # Compressed rows are turned back into text before the columns go back to TEXT
+    connection = op.get_bind()
+    for table, columns in COLUMNS.items():
+        for column in columns:
+            rows = connection.execute(sa.text(f'SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL'))
+            for row_id, value in rows.fetchall():
+                connection.execute(sa.text(f'UPDATE {table} SET {column} = :value WHERE id = :id'),
+                                   {'value': CompressedText.decompress(value), 'id': row_id})
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.LargeBinary(), type_=sa.Text(),
+                                      existing_nullable=True)
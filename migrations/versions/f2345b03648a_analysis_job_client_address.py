@@ -0,0 +1,26 @@
+"""Record the submitter's address on analysis jobs
+
+Revision ID: f2345b03648a
+Revises: 3967893ced2a
+Create Date: 2026-10-18 09:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2345b03648a'
+down_revision = '3967893ced2a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('analysis_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('client_address', sa.String(length=45), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('analysis_job', schema=None) as batch_op:
+        batch_op.drop_column('client_address')
@@ -2,15 +2,18 @@ import pytest
 from app import create_app, db
 
 @pytest.fixture(scope='module')
-def app():
+def app(tmp_path_factory):
     """Create and configure a new app instance for each test module."""
     # Create a test client using the Flask application configured for testing
-    app = create_app()
-    app.config.update({
+    # The database is a file rather than ":memory:": job worker threads need their own
+    # connections, or one thread's rollback can undo another thread's uncommitted writes
+    app = create_app({
         "TESTING": True,
-        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",  # Use an in-memory database
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path_factory.mktemp('db') / 'app.db'),
         "WTF_CSRF_ENABLED": False,  # Disable CSRF for testing forms
-        "SERVER_NAME": "127.0.0.1" # Helps with url_for
+        "SERVER_NAME": "127.0.0.1", # Helps with url_for
+        # Caches and sessions go to a fresh file, so nothing carries over between runs
+        "CACHE_DATABASE_PATH": str(tmp_path_factory.mktemp('cache') / 'cache.db'),
     })
 
     with app.app_context():
@@ -0,0 +1,81 @@
+import time
+from app.cache import LRUCache, SQLiteCache, TieredCache, make_cache_key
+from app import nlp_processor
+from app.llm import llm_client, StubProvider
+
+
+def test_make_cache_key_normalizes_whitespace():
+    """Keys should ignore cosmetic whitespace differences but not content changes."""
+    assert make_cache_key("Jane  Doe\n", "Python") == make_cache_key("Jane Doe", " Python")
+    assert make_cache_key("Jane Doe", "Python") != make_cache_key("Jane Doe", "Java")
+
+
+def test_lru_cache_evicts_and_expires():
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')  # 'a' is now the most recently used entry
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.evictions == 1
+
+    cache.set('short', 'lived', ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('short') is None
+    assert cache.expirations == 1
+
+
+def test_sqlite_cache_evicts_least_recently_accessed(tmp_path):
+    store = SQLiteCache(str(tmp_path / 'cache.db'), max_entries=2)
+    store.set('a', b'1')
+    store.set('b', b'2')
+    store.get('a')
+    store.set('c', b'3')
+    assert store.get('b') is None
+    assert store.get('a') == b'1'
+    assert store.count() == 2
+
+
+def test_tiered_cache_falls_back_to_disk(app, tmp_path):
+    cache = TieredCache('test')
+    app.config['CACHE_DATABASE_PATH'] = str(tmp_path / 'cache.db')
+    cache.init_app(app)
+    cache.set('key', {'match_score': 80})
+    cache.memory.clear()
+
+    assert cache.get('key') == {'match_score': 80}
+    assert cache.get('key') == {'match_score': 80}
+    assert cache.get('missing') is None
+    stats = cache.stats()
+    assert stats['disk_hits'] == 1
+    assert stats['memory_hits'] == 1
+    assert stats['misses'] == 1
+
+
+def test_get_combined_ai_data_uses_cache(mocker):
+    """A repeat analysis of the same resume and JD should not call Gemini again."""
+    mocker.patch.object(nlp_processor, 'ai_cache', TieredCache('ai'))
+    stub = StubProvider(response='```json {"analysis_results": {"match_score": 70}} ```')
+    mocker.patch.object(llm_client, 'provider', stub)
+
+    first = nlp_processor.get_combined_ai_data("resume text", "job description")
+    second = nlp_processor.get_combined_ai_data("resume  text", "job description")
+
+    assert first == second == {"analysis_results": {"match_score": 70}}
+    assert stub.calls == 1
+
+
+def test_sqlite_cache_counts_rows_without_scanning(tmp_path):
+    store = SQLiteCache(str(tmp_path / 'cache.db'), max_entries=3)
+    for key in 'abcde':
+        store.set(key, b'1')
+    store.set('e', b'2')
+    store.delete('d')
+    assert store._count == store.count() == 2
+    assert store.evictions == 2
+
+    # A second process writing to the same file is picked up when it connects
+    other = SQLiteCache(str(tmp_path / 'cache.db'), max_entries=3)
+    other.set('f', b'3')
+    assert other._count == 3
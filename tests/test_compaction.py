@@ -0,0 +1,66 @@
+from app.compaction import (compact_whitespace, dedupe_lines, strip_boilerplate, fit_to_budget, compact_inputs,
+                            estimate_tokens)
+
+RESUME = """Jane Doe | jane@example.com | 555-0100
+Summary
+Data   engineer with  8 years of experience.
+• Built pipelines (cid:12)with Spark­.
+Page 1 of 2
+-----------
+Jane Doe | jane@example.com | 555-0100
+
+
+Experience
+● Led a team of five engineers on the billing platform.
+Remote
+Remote
+"""
+
+JD = """Data Engineer
+About us
+We are a fast growing company with offices in ten cities and a great culture of learning.
+Requirements:
+- 5+ years with Python and SQL.
+We are an equal opportunity employer. All qualified applicants will receive consideration without regard to race, color, religion or sex. You must know Airflow.
+If you need a reasonable accommodation, contact hr@example.com.
+Benefits
+- Health insurance and a generous 401k match for all full-time employees.
+"""
+
+
+def test_compact_whitespace_and_dedupe_keep_the_content():
+    text = dedupe_lines(compact_whitespace(RESUME))
+    assert text.split('\n') == [
+        'Jane Doe | jane@example.com | 555-0100', 'Summary', 'Data engineer with 8 years of experience.',
+        '- Built pipelines with Spark.', '', 'Experience', '- Led a team of five engineers on the billing platform.',
+        'Remote', 'Remote',
+    ]
+
+
+def test_strip_boilerplate_removes_notices_but_not_requirements():
+    text = strip_boilerplate(compact_whitespace(JD))
+    assert 'opportunity' not in text and 'accommodation' not in text
+    assert '- 5+ years with Python and SQL.' in text
+    assert 'You must know Airflow.' in text
+
+
+def test_fit_to_budget_drops_low_priority_sections_first():
+    text = strip_boilerplate(compact_whitespace(JD))
+    fitted = fit_to_budget(text, 30)
+    assert estimate_tokens(fitted) <= 30
+    assert 'About us' not in fitted and 'Benefits' not in fitted
+    assert fitted.startswith('Data Engineer\nRequirements:\n- 5+ years with Python and SQL.')
+
+    # Text without any structure is cut at a word boundary
+    fitted = fit_to_budget('word ' * 1000, 100)
+    assert estimate_tokens(fitted) <= 100 and fitted.endswith('word')
+
+
+def test_compact_inputs_shares_the_budget():
+    long_resume = '\n'.join(f'- Achievement number {i} with measurable impact on revenue.' for i in range(2000))
+    resume, jd = compact_inputs(long_resume, JD, budget=1000)
+    assert estimate_tokens(resume) + estimate_tokens(jd) <= 1000
+    # A short job description is kept whole; the resume gets the rest of the budget
+    assert 'You must know Airflow.' in jd and 'Benefits' in jd
+    assert resume.startswith('- Achievement number 0 ')
+    assert estimate_tokens(resume) > 800
@@ -0,0 +1,99 @@
+import json
+import threading
+from sqlalchemy import text
+from app import create_app, db
+from app.database import compress_existing_rows
+from app.models import User, Resume, Analysis
+
+
+def test_sqlite_connections_use_wal_and_busy_timeout(tmp_path):
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'pragmas.db'}",
+                      'CACHE_DATABASE_PATH': str(tmp_path / 'cache.db')})
+    with app.app_context():
+        with db.engine.connect() as connection:
+            assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert connection.execute(text('PRAGMA busy_timeout')).scalar() == app.config['SQLITE_BUSY_TIMEOUT_MS']
+            assert connection.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        assert db.engine.pool.size() == app.config['DATABASE_POOL_SIZE']
+
+
+def test_concurrent_writes_do_not_fail_with_database_locked(tmp_path):
+    """Many threads registering users at once should all succeed rather than hit "database is locked"."""
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'stress.db'}",
+                      'CACHE_DATABASE_PATH': str(tmp_path / 'cache.db')})
+    with app.app_context():
+        db.create_all()
+
+    threads, writes = 8, 25
+    errors = []
+    start = threading.Barrier(threads)
+
+    def register_users(worker):
+        start.wait()
+        for i in range(writes):
+            with app.app_context():
+                try:
+                    user = User(username=f'user-{worker}-{i}', email=f'user-{worker}-{i}@example.com')
+                    user.password_hash = 'x'
+                    db.session.add(user)
+                    db.session.commit()
+                    # Read back in a separate transaction, as the request that follows a write would
+                    User.query.filter_by(username=user.username).one()
+                except Exception as e:
+                    errors.append(e)
+
+    workers = [threading.Thread(target=register_users, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    with app.app_context():
+        assert User.query.count() == threads * writes
+
+
+def test_compressed_columns_round_trip_and_migrate_legacy_rows(tmp_path):
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'blobs.db'}",
+                      'CACHE_DATABASE_PATH': str(tmp_path / 'cache.db')})
+    jd = 'We are looking for a Python developer with strong SQL skills. ' * 20
+    analysis_json = json.dumps({'match_score': 81, 'missing_keywords': ['docker'] * 30})
+    with app.app_context():
+        db.create_all()
+        resume = Resume(original_filename='cv.pdf', structured_data_json='{"full_name": "Jane"}')
+        analysis = Analysis(job_description=jd, analysis_data_json=analysis_json, resume=resume)
+        db.session.add(analysis)
+        db.session.commit()
+
+        stored = db.session.execute(text('SELECT job_description FROM analysis')).scalar()
+        assert isinstance(stored, bytes) and len(stored) < len(jd) // 5
+
+        # A row written before compression was enabled
+        db.session.execute(text('INSERT INTO analysis (job_description, analysis_data_json, resume_id) '
+                                'VALUES (:jd, :data, :resume_id)'),
+                           {'jd': jd, 'data': analysis_json, 'resume_id': resume.id})
+        db.session.commit()
+        db.session.expunge_all()
+
+        legacy = Analysis.query.order_by(Analysis.id.desc()).first()
+        assert legacy.job_description == jd
+        assert legacy.analysis_data['match_score'] == 81
+
+        assert compress_existing_rows(db.session, Analysis, batch_size=1, pause=0) == 1
+        assert compress_existing_rows(db.session, Analysis, pause=0) == 0
+        stored = db.session.execute(text('SELECT job_description FROM analysis WHERE id = :id'),
+                                    {'id': legacy.id}).scalar()
+        assert isinstance(stored, bytes)
+        db.session.expunge_all()
+        assert db.session.get(Analysis, legacy.id).job_description == jd
+
+
+def test_analysis_data_is_decoded_once(mocker):
+    analysis = Analysis(analysis_data_json='{"match_score": 70}')
+    loads = mocker.spy(json, 'loads')
+    assert analysis.analysis_data['match_score'] == 70
+    assert analysis.analysis_data['match_score'] == 70
+    assert loads.call_count == 1
+
+    analysis.analysis_data_json = '{"match_score": 90}'
+    assert analysis.analysis_data['match_score'] == 90
@@ -0,0 +1,50 @@
+import pytest
+from app.docx_export import DOCXExporter, DOCXTooLargeError, DOCXTimeoutError
+import app.docx_export as docx_export
+
+HTML = '<h1>Jane Doe</h1><p>Data engineer.</p>'
+
+
+class _App:
+    def __init__(self, **config):
+        self.config = config
+        self.extensions = {}
+
+
+def test_export_is_cached_and_served_with_etag(client):
+    response = client.post('/export/docx', json={'html': HTML})
+    assert response.status_code == 200
+    assert response.data[:2] == b'PK'
+    etag = response.headers['ETag']
+
+    # Unchanged content: no conversion at all
+    response = client.post('/export/docx', json={'html': HTML}, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.post('/export/docx', json={'html': HTML + '<p>More</p>'}, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_export_reuses_cached_documents(mocker):
+    exporter = DOCXExporter()
+    exporter.init_app(_App(DOCX_EXPORT_WORKERS=0))
+    convert = mocker.patch.object(docx_export, 'html_to_docx', return_value=b'PK-document')
+    assert exporter.export(HTML) == b'PK-document'
+    assert exporter.export(HTML) == b'PK-document'
+    assert convert.call_count == 1
+    assert exporter.stats()['cache_hits'] == 1
+
+
+def test_export_limits_size_and_time():
+    exporter = DOCXExporter()
+    exporter.init_app(_App(DOCX_EXPORT_WORKERS=0, DOCX_MAX_HTML_BYTES=100))
+    with pytest.raises(DOCXTooLargeError):
+        exporter.export('<p>' + 'x' * 200 + '</p>')
+
+    exporter = DOCXExporter()
+    exporter.init_app(_App(DOCX_EXPORT_WORKERS=1, DOCX_EXPORT_TIMEOUT=0.5))
+    huge = '<ul>' + '<li>Built data pipelines with Spark.</li>' * 20000 + '</ul>'
+    with pytest.raises(DOCXTimeoutError):
+        exporter.export(huge)
@@ -0,0 +1,123 @@
+import io
+import threading
+import time
+import uuid
+from app.jobs import job_queue, QueueFullError
+
+MOCK_AI_RESPONSE = {
+    "analysis_results": {"match_score": 88, "missing_keywords": []},
+    "structured_resume": {"full_name": "Queued User"}
+}
+
+
+def _post_async(client):
+    data = {
+        'resume': (io.BytesIO(b"%PDF-1.4 fake file content"), 'test.pdf'),
+        'job_description': 'A test job description.',
+        'async': '1'
+    }
+    return client.post('/api/analyze', data=data, content_type='multipart/form-data')
+
+
+def test_async_analyze_returns_job_and_result(client, mocker):
+    """The async mode should return a job id at once and expose the result once the worker finishes."""
+    mocker.patch('app.routes.get_text_from_file', return_value="This is the mocked resume text.")
+    mocker.patch('app.jobs.get_combined_ai_data', return_value=MOCK_AI_RESPONSE)
+
+    response = _post_async(client)
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] == 'queued'
+
+    job_queue.wait(job['job_id'], 5)
+    status = client.get(job['status_url']).get_json()
+    assert status['status'] == 'done'
+    assert status['result']['analysis_results']['match_score'] == 88
+
+    # Fetching a finished job stores it in the session for the designer
+    assert client.get('/choose-template').status_code == 200
+
+    events = client.get(job['events_url'])
+    assert events.mimetype == 'text/event-stream'
+    assert b'"status": "done"' in events.data
+
+
+def test_async_analyze_failed_job(client, mocker):
+    mocker.patch('app.routes.get_text_from_file', return_value="This is the mocked resume text.")
+    mocker.patch('app.jobs.get_combined_ai_data', return_value={"error": "boom"})
+
+    job = _post_async(client).get_json()
+    job_queue.wait(job['job_id'], 5)
+    status = client.get(job['status_url']).get_json()
+    assert status['status'] == 'failed'
+    assert 'error' in status
+
+
+def test_anonymous_jobs_are_scheduled_under_the_client_address(client, mocker):
+    """Queued jobs of anonymous users don't all share one scheduler key."""
+    from app.scheduler import scheduler
+    mocker.patch('app.routes.get_text_from_file', return_value="This is the mocked resume text.")
+    mocker.patch('app.jobs.get_combined_ai_data', return_value=MOCK_AI_RESPONSE)
+    request_class = mocker.spy(scheduler, 'request_class')
+
+    data = {'resume': (io.BytesIO(b"%PDF-1.4 fake file content"), 'test.pdf'),
+            'job_description': 'A test job description.', 'async': '1'}
+    job = client.post('/api/analyze', data=data, environ_overrides={'REMOTE_ADDR': '198.51.100.23'}).get_json()
+    assert job_queue.wait(job['job_id'], 5)
+    request_class.assert_any_call('198.51.100.23', 'interactive')
+
+
+def test_async_analyze_queue_full(client, mocker):
+    mocker.patch('app.routes.get_text_from_file', return_value="This is the mocked resume text.")
+    mocker.patch.object(job_queue, 'submit', side_effect=QueueFullError('full'))
+
+    response = _post_async(client)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+
+
+def test_unknown_job_returns_404(client):
+    assert client.get('/api/jobs/does-not-exist').status_code == 404
+
+
+def _queued_job(app, text):
+    from app import db
+    from app.models import AnalysisJob
+    with app.app_context():
+        job = AnalysisJob(id=uuid.uuid4().hex, resume_text=text, job_description='A recovered JD.')
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+
+def test_job_events_release_the_database_session_while_waiting(app, client, mocker):
+    from app import db
+    job_id = _queued_job(app, "Waiting resume.")
+    sessions_open = []
+    mocker.patch.object(job_queue, 'wait', side_effect=lambda *a: sessions_open.append(db.session.registry.has()))
+    app.config['JOB_EVENTS_TIMEOUT'] = 0.01
+    try:
+        events = client.get(f'/api/jobs/{job_id}/events')
+    finally:
+        app.config['JOB_EVENTS_TIMEOUT'] = 30
+    assert b'"status": "queued"' in events.data
+    assert sessions_open and not any(sessions_open)
+
+
+def test_recovered_jobs_beyond_the_free_slots_run_later(app, mocker):
+    mocker.patch('app.jobs.get_combined_ai_data', return_value=MOCK_AI_RESPONSE)
+    mocker.patch.object(job_queue, '_slots', threading.BoundedSemaphore(1))
+    job_ids = [_queued_job(app, f"Recovered resume {i}.") for i in range(3)]
+    with app.app_context():
+        assert job_queue.recover() >= 3
+
+    from app.models import AnalysisJob
+    deadline = time.monotonic() + 5
+    with app.app_context():
+        while time.monotonic() < deadline:
+            from app import db
+            db.session.expire_all()
+            if all(db.session.get(AnalysisJob, job_id).status == 'done' for job_id in job_ids):
+                break
+            time.sleep(0.01)
+        assert [db.session.get(AnalysisJob, job_id).status for job_id in job_ids] == ['done'] * 3
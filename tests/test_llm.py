@@ -0,0 +1,115 @@
+import time
+import pytest
+from app.llm import (LLMClient, StubProvider, CircuitBreaker, CircuitOpenError, LLMTimeoutError,
+                     TransientLLMError, LLMError)
+from app.scheduler import Scheduler
+
+
+class FlakyProvider(StubProvider):
+    """Fails the first `failures` calls, then succeeds."""
+
+    def __init__(self, failures, error=TransientLLMError, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.error = error
+
+    def generate(self, prompt, timeout):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error('upstream hiccup')
+        return super().generate(prompt, timeout)
+
+
+def test_retries_transient_errors():
+    provider = FlakyProvider(failures=2, response='ok')
+    client = LLMClient(provider, max_retries=2, backoff_base=0.01)
+    assert client.generate('prompt').text == 'ok'
+    assert client.counters['retries'] == 2
+
+
+def test_does_not_retry_permanent_errors():
+    provider = FlakyProvider(failures=1, error=ValueError)
+    client = LLMClient(provider, max_retries=2, backoff_base=0.01)
+    with pytest.raises(LLMError):
+        client.generate('prompt')
+    assert provider.calls == 1
+
+
+def test_deadline_is_enforced():
+    client = LLMClient(StubProvider(latency=0.5), timeout=0.1)
+    start = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        client.generate('prompt')
+    assert time.monotonic() - start < 0.4
+
+
+def test_circuit_breaker_fails_fast_then_recovers():
+    provider = StubProvider(error_rate=1.0)
+    client = LLMClient(provider, max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.1))
+    for _ in range(2):
+        with pytest.raises(TransientLLMError):
+            client.generate('prompt')
+    with pytest.raises(CircuitOpenError):
+        client.generate('prompt')
+    assert provider.calls == 2
+
+    # After the reset timeout a trial call is let through and closes the circuit
+    time.sleep(0.15)
+    provider.error_rate = 0.0
+    assert client.generate('prompt').text == '{}'
+    assert client.breaker.state == 'closed'
+
+
+def test_hedged_request_beats_slow_call():
+    latencies = iter([1.0, 0.01])
+    provider = StubProvider(latency=lambda: next(latencies, 0.01), response='fast')
+    client = LLMClient(provider, hedge=True, hedge_min_samples=1)
+    client.latency.record(0.05)
+
+    start = time.monotonic()
+    assert client.generate('prompt').text == 'fast'
+    assert time.monotonic() - start < 0.5
+    assert client.counters['hedges'] == 1
+
+
+def test_permanent_errors_do_not_open_the_circuit():
+    provider = FlakyProvider(failures=10, error=ValueError)
+    client = LLMClient(provider, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.1))
+    for _ in range(3):
+        with pytest.raises(LLMError):
+            client.generate('prompt')
+    assert client.breaker.state == 'closed'
+
+
+def test_permanent_error_keeps_another_calls_trial():
+    """A call admitted before the circuit opened must not free the trial slot of the half-open call."""
+    client = LLMClient(StubProvider(), breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0))
+    assert client.breaker.before_call() is False
+    client.breaker.record_failure()
+    assert client.breaker.before_call() is True
+
+    with pytest.raises(LLMError):
+        client._retry_delay(ValueError('rejected prompt'), 0, time.monotonic() + 1, trial=False)
+    with pytest.raises(CircuitOpenError):
+        client.breaker.before_call()
+
+
+def test_abandoned_stream_releases_the_half_open_trial():
+    """A client that disconnects mid-stream must not leave the circuit stuck half-open."""
+    client = LLMClient(StubProvider(response='x' * 200), breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0))
+    client.breaker.record_failure()
+    assert client.breaker.state == 'half-open'
+
+    stream = client.stream('prompt')
+    next(stream)
+    stream.close()
+    assert ''.join(client.stream('prompt')) == 'x' * 200
+    assert client.breaker.state == 'closed'
+
+
+def test_retries_wait_for_admission_again():
+    scheduler = Scheduler(requests_per_minute=6000, burst=10)
+    client = LLMClient(FlakyProvider(failures=2, response='ok'), backoff_base=0.01, scheduler=scheduler)
+    assert client.generate('prompt').text == 'ok'
+    assert scheduler.stats()['admitted'] == 3
+    assert scheduler.stats()['in_flight'] == 0
@@ -0,0 +1,90 @@
+import io
+import logging
+import pytest
+import time
+from app.metrics import Histogram, registry, metrics
+from app.llm import llm_client, StubProvider
+
+OPERATOR = {'Authorization': 'Bearer secret'}
+
+
+@pytest.fixture(scope='module', autouse=True)
+def metrics_token(app):
+    app.config['METRICS_TOKEN'] = 'secret'
+    yield
+    app.config['METRICS_TOKEN'] = None
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('test_seconds', 'A test histogram.', ['stage'], buckets=(0.1, 1))
+    histogram.observe(0.05, stage='a')
+    histogram.observe(0.5, stage='a')
+    histogram.observe(5, stage='a')
+    samples = dict(histogram.samples())
+    assert samples['test_seconds_bucket{stage="a",le="0.1"}'] == 1
+    assert samples['test_seconds_bucket{stage="a",le="1"}'] == 2
+    assert samples['test_seconds_bucket{stage="a",le="+Inf"}'] == 3
+    assert samples['test_seconds_count{stage="a"}'] == 3
+
+
+def test_analyze_reports_stage_timings_and_metrics(client, mocker, caplog):
+    mocker.patch('app.utils.parse_docx', return_value="Python developer resume")
+    stub = StubProvider(response='{"analysis_results": {"match_score": 70}, "structured_resume": {}}')
+    mocker.patch.object(llm_client, 'provider', stub)
+
+    data = {'resume': (io.BytesIO(b"PK\x03\x04 docx bytes for metrics"), 'metrics.docx'),
+            'job_description': 'A metrics job description.'}
+    caplog.set_level(logging.INFO, logger='app')
+    response = client.post('/api/analyze', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    timing = response.headers['Server-Timing']
+    for stage_name in ('upload', 'hash', 'parse', 'extract', 'compact', 'llm', 'json', 'ai', 'total'):
+        assert f'{stage_name};dur=' in timing
+
+    body = client.get('/metrics', headers=OPERATOR).get_data(as_text=True)
+    assert 'app_stage_duration_seconds_count{stage="llm"}' in body
+    assert 'http_request_duration_seconds_count{method="POST",endpoint="/api/analyze",status="200"}' in body
+    assert 'llm_tokens_count{kind="prompt"}' in body
+    assert 'app_cache_misses{cache="text"}' in body
+    assert 'llm_client_calls{model=' in body
+    assert 'prompt_input_tokens_count{stage="compacted"}' in body
+    assert 'POST /api/analyze: 1 model calls' in caplog.text
+
+
+def test_stage_errors_are_counted_by_class(client, mocker):
+    mocker.patch('app.utils.parse_docx', return_value="Another resume")
+    mocker.patch.object(llm_client, 'provider', StubProvider(response='not json'))
+    data = {'resume': (io.BytesIO(b"PK\x03\x04 other docx bytes"), 'bad.docx'), 'job_description': 'Another JD.'}
+
+    assert client.post('/api/analyze', data=data, content_type='multipart/form-data').status_code == 502
+    assert 'app_errors_total{stage="json",error="JSONDecodeError"}' in registry.render()
+
+
+def test_sampling_profiler_is_toggled_per_request(app, client, mocker):
+    mocker.patch.object(metrics, 'profiling', True)
+    mocker.patch.object(metrics, 'profile_interval', 0.001)
+    mocker.patch('app.routes.render_template', side_effect=lambda *a, **k: time.sleep(0.05) or 'ok')
+
+    assert 'X-Profile-Id' not in client.get('/').headers
+    response = client.get('/?profile=1')
+    profile = client.get(f"/metrics/profiles/{response.headers['X-Profile-Id']}", headers=OPERATOR)
+    assert 'index' in profile.get_data(as_text=True)
+
+    mocker.patch.object(metrics, 'profiling', False)
+    assert client.get(f"/metrics/profiles/{response.headers['X-Profile-Id']}", headers=OPERATOR).status_code == 404
+
+
+def test_metrics_and_stats_are_for_operators_only(app, client):
+    for path in ('/metrics', '/api/cache/stats', '/api/llm/stats'):
+        assert client.get(path, headers=OPERATOR, environ_overrides={'REMOTE_ADDR': '203.0.113.7'}).status_code == 200
+        assert client.get(path).status_code == 403
+        assert client.get(path, headers={'Authorization': 'Bearer wrong'}).status_code == 403
+
+    # Without a token nobody gets in, not even requests from the loopback address
+    app.config['METRICS_TOKEN'] = None
+    try:
+        assert client.get('/metrics', environ_overrides={'REMOTE_ADDR': '127.0.0.1'}).status_code == 403
+        assert client.get('/metrics', headers={'Authorization': 'Bearer None'}).status_code == 403
+    finally:
+        app.config['METRICS_TOKEN'] = 'secret'
@@ -11,3 +11,77 @@ def test_password_hashing(app):
 
         assert u.check_password('dog') is False
         assert u.check_password('cat') is True
+
+
+def test_logged_in_requests_use_the_user_cache(app):
+    """After the first request, loading the logged-in user doesn't query the database."""
+    from sqlalchemy import event
+    from app import db
+    from app.identity import user_cache, UserSnapshot
+
+    with app.app_context():
+        user = User(username='cached', email='cached@example.com')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        client = app.test_client()
+        client.post('/login', data={'username': 'cached', 'password': 'secret'})
+        client.get('/')
+
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response = client.get('/')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert b'Logout' in response.data
+        assert statements == []
+
+        snapshot = user_cache.load(user_id)
+        assert isinstance(snapshot, UserSnapshot)
+        assert snapshot.email == 'cached@example.com'
+
+        # Changing the email or password drops the cached snapshot
+        user.email = 'changed@example.com'
+        db.session.commit()
+        assert user_cache.load(user_id).email == 'changed@example.com'
+
+        db.session.delete(user)
+        db.session.commit()
+        assert user_cache.load(user_id) is None
+
+
+def test_login_and_logout_rotate_the_session_id(app):
+    """A session id planted before login is not the one that ends up authenticated."""
+    from app import db
+
+    with app.app_context():
+        user = User(username='rotated', email='rotated@example.com')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+
+    client = app.test_client()
+    client.get('/login')
+    client.post('/login', data={'username': 'missing', 'password': 'x'})
+    before = client.get_cookie('session', domain='127.0.0.1').value
+    client.post('/login', data={'username': 'rotated', 'password': 'secret'})
+    logged_in = client.get_cookie('session', domain='127.0.0.1').value
+    assert logged_in != before
+
+    # The pre-login id is gone, so a fixated cookie doesn't become authenticated
+    attacker = app.test_client()
+    attacker.set_cookie('session', before, domain='127.0.0.1')
+    assert b'Logout' not in attacker.get('/').data
+    attacker.set_cookie('session', logged_in, domain='127.0.0.1')
+    assert b'Logout' in attacker.get('/').data
+
+    client.get('/logout')
+    assert client.get_cookie('session', domain='127.0.0.1').value != logged_in
+    assert b'Logout' not in attacker.get('/').data
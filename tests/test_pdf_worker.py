@@ -0,0 +1,44 @@
+import os
+import pytest
+from app.pdf_worker import PDFWorkerPool, PDFTooLargeError, PDFTimeoutError, extract_pdf_text
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), 'test_files', 'sample.pdf')
+
+
+@pytest.fixture
+def pdf_bytes():
+    with open(SAMPLE_PDF, 'rb') as f:
+        return f.read()
+
+
+def test_extract_pdf_text_modes(pdf_bytes):
+    assert "Hello World PDF" in extract_pdf_text(pdf_bytes, mode='layout')
+    assert "Hello World PDF" in extract_pdf_text(pdf_bytes, mode='fast')
+    for mode in ('layout', 'fast'):
+        assert extract_pdf_text(pdf_bytes, max_pages=0, mode=mode) == ""
+        assert "Hello World PDF" in extract_pdf_text(pdf_bytes, max_pages=None, mode=mode)
+
+
+def test_pool_extracts_in_worker(pdf_bytes):
+    pool = PDFWorkerPool()
+    pool.processes.workers = 1
+    try:
+        assert "Hello World PDF" in pool.extract(pdf_bytes)
+        assert "Hello World PDF" in pool.extract(pdf_bytes, mode='fast')
+        assert pool.processes.stats() == {'workers': 1, 'idle': 1}
+    finally:
+        pool.shutdown()
+
+
+def test_pool_enforces_byte_cap_and_timeout(pdf_bytes):
+    pool = PDFWorkerPool()
+    pool.processes.workers = 1
+    pool.max_bytes = 10
+    with pytest.raises(PDFTooLargeError):
+        pool.extract(pdf_bytes)
+
+    pool.max_bytes = len(pdf_bytes)
+    pool.timeout = 0.001
+    with pytest.raises(PDFTimeoutError):
+        pool.extract(pdf_bytes)
+    assert pool.processes.stats()['workers'] == 0
@@ -0,0 +1,44 @@
+import os
+import threading
+import time
+import pytest
+from app.process_pool import ProcessPool, WorkerCrashedError, WorkerTimeoutError
+
+
+@pytest.fixture
+def pool():
+    pool = ProcessPool(workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_workers_are_not_forked_from_the_app(pool):
+    assert pool.run(os.getpid) != os.getpid()
+    assert pool._context.get_start_method() in ('forkserver', 'spawn')
+
+
+def test_workers_are_replaced_after_max_tasks(pool):
+    pool.workers = 1
+    pool.max_tasks_per_child = 2
+    pids = [pool.run(os.getpid) for _ in range(4)]
+    assert pids[0] == pids[1] != pids[2] == pids[3]
+
+
+def test_timeout_kills_only_its_own_worker(pool):
+    pool.run(os.getpid)
+    results = []
+    neighbour = threading.Thread(target=lambda: results.append(pool.run(time.sleep, 1, timeout=10)))
+    neighbour.start()
+    with pytest.raises(WorkerTimeoutError):
+        pool.run(time.sleep, 30, timeout=0.5)
+    neighbour.join()
+    assert results == [None]
+
+
+def test_crashed_worker_fails_only_its_call(pool):
+    with pytest.raises(WorkerCrashedError):
+        pool.run(os._exit, 1)
+    with pytest.raises(ValueError):
+        pool.run(int, 'not a number')
+    assert pool.run(int, '42') == 42
+    assert pool.stats()['workers'] == 1
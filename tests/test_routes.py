@@ -42,7 +42,7 @@ def test_api_analyze_with_mocking(client, mocker):
     # 3. Simulate a file upload and form submission
     import io
     data = {
-        'resume': (io.BytesIO(b"fake file content"), 'test.pdf'),
+        'resume': (io.BytesIO(b"%PDF-1.4 fake file content"), 'test.pdf'),
         'job_description': 'A test job description.'
     }
 
@@ -53,4 +53,121 @@ def test_api_analyze_with_mocking(client, mocker):
     assert response.status_code == 200
     json_response = response.get_json()
     assert json_response['analysis_results']['match_score'] == 95
-    assert json_response['structured_resume']['full_name'] == "Test User"
\ No newline at end of file
+    assert json_response['structured_resume']['full_name'] == "Test User"
+
+def test_cover_letter_streaming(client, mocker):
+    """
+    Test that the cover letter streams over SSE and is available as a full document afterwards.
+    """
+    import io
+    mocker.patch('app.routes.get_combined_ai_data', return_value={"analysis_results": {}, "structured_resume": {}})
+    mocker.patch('app.routes.get_text_from_file', return_value="Streaming resume text.")
+    data = {
+        'resume': (io.BytesIO(b"%PDF-1.4 fake file content"), 'test.pdf'),
+        'job_description': 'A streaming job description.'
+    }
+    client.post('/api/analyze', data=data, content_type='multipart/form-data')
+
+    response = client.post('/generate-cover-letter')
+    assert response.status_code == 200
+    assert b"EventSource" in response.data
+
+    mocker.patch('app.routes.stream_cover_letter', return_value=iter(["Dear Hiring Manager,", " I am excited."]))
+    response = client.get('/generate-cover-letter/stream')
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert 'event: chunk' in body
+    assert 'event: done' in body
+
+    response = client.get('/cover-letter')
+    assert response.status_code == 200
+    assert b"Dear Hiring Manager, I am excited." in response.data
+
+    # The non-streaming path is still available as a fallback
+    mocker.patch('app.routes.generate_full_cover_letter', return_value="A complete letter.")
+    response = client.post('/generate-cover-letter', data={'stream': '0'})
+    assert b"A complete letter." in response.data
+
+
+def test_api_analyze_fast_mode(client, mocker):
+    """
+    Test that fast mode scores the resume locally without calling the AI.
+    """
+    import io
+    ai_call = mocker.patch('app.routes.get_combined_ai_data')
+    mocker.patch('app.routes.get_text_from_file', return_value="Python developer with SQL experience.")
+    data = {
+        'resume': (io.BytesIO(b"%PDF-1.4 fake file content"), 'test.pdf'),
+        'job_description': 'Looking for a Python and Kubernetes developer.',
+        'mode': 'fast'
+    }
+    response = client.post('/api/analyze', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    analysis = response.get_json()['analysis_results']
+    assert 'kubernetes' in analysis['missing_keywords']
+    assert ai_call.call_count == 0
+
+
+def test_api_analyze_batch(client, mocker):
+    """
+    Test that the batch endpoint parses the file once and streams one NDJSON line per job description.
+    """
+    import io, json, threading
+
+    # Every call waits until all four are in flight, so the batch only completes if they run concurrently
+    all_running = threading.Barrier(4, timeout=5)
+
+    def concurrent_analysis(resume_text, jd_text):
+        all_running.wait()
+        return {"match_score": len(jd_text)}
+
+    parse = mocker.patch('app.routes.get_text_from_file', return_value="Batch resume text.")
+    mocker.patch('app.routes.get_ai_analysis', side_effect=concurrent_analysis)
+    mocker.patch('app.routes.get_structured_resume', return_value={"full_name": "Batch User"})
+    data = {
+        'resume': (io.BytesIO(b"%PDF-1.4 fake file content"), 'test.pdf'),
+        'job_descriptions': json.dumps(['JD one', 'JD number two', 'JD three!', 'JD 4']),
+    }
+
+    response = client.post('/api/analyze/batch', data=data, content_type='multipart/form-data')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert parse.call_count == 1
+    assert sorted(line['index'] for line in lines[:-1]) == [0, 1, 2, 3]
+    assert lines[-1]['done'] is True and lines[-1]['completed'] == 4
+    assert lines[-1]['structured_resume'] == {"full_name": "Batch User"}
+
+
+def test_designer_render_cache_and_etag(client, mocker):
+    """Designs are rendered once per resume, answer 304 when unchanged and refuse unknown names."""
+    import io
+    from app import designer
+    from app.designer import design_renderer
+    mocker.patch('app.routes.get_combined_ai_data',
+                 return_value={"analysis_results": {}, "structured_resume": {"full_name": "Design User", "contact_info": {}}})
+    mocker.patch('app.routes.get_text_from_file', return_value="Designer resume text.")
+    client.post('/api/analyze', data={'resume': (io.BytesIO(b"%PDF-1.4 fake"), 'test.pdf'), 'job_description': 'A JD.'},
+                content_type='multipart/form-data')
+
+    render = mocker.spy(design_renderer, 'render')
+    templates = mocker.spy(designer, 'render_template')
+    response = client.get('/designer/onyx')
+    assert response.status_code == 200
+    assert b"Design User" in response.data
+    etag = response.headers['ETag']
+
+    # The second request is served from the cache without rendering the template again
+    response = client.get('/designer/onyx')
+    assert templates.call_count == 1
+    assert response.headers['ETag'] == etag
+    assert design_renderer.stats()['cache_hits'] >= 1
+
+    response = client.get('/designer/onyx', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert render.call_count == 2
+
+    assert client.get('/designer/designer_layout').status_code == 404
+    assert client.get('/designer/_onyx_content').status_code == 404
+    assert client.get('/designer/..%2Flogin').status_code == 404
@@ -0,0 +1,79 @@
+import threading
+import time
+import pytest
+from app.scheduler import Scheduler, OverloadedError, TokenBucket
+
+def _call_in_thread(scheduler, user, priority, order, hold=0.05):
+    def run():
+        with scheduler.request_class(user, priority):
+            try:
+                with scheduler.admit():
+                    order.append((user, priority))
+                    time.sleep(hold)
+            except OverloadedError:
+                order.append((user, 'shed'))
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=100, capacity=2)
+    bucket.take()
+    bucket.take()
+    assert 0 < bucket.wait_time() <= 0.01
+    time.sleep(0.02)
+    assert bucket.wait_time() == 0
+
+
+def test_priorities_and_round_robin_between_users():
+    """Interactive calls go first; within a class users take turns instead of first come, first served."""
+    scheduler = Scheduler(requests_per_minute=0, max_concurrency=1, max_per_user=1)
+    order = []
+    blocker = _call_in_thread(scheduler, 'blocker', 'interactive', order, hold=0.2)
+    time.sleep(0.05)
+    threads = []
+    for user, priority in [('alice', 'batch'), ('alice', 'interactive'), ('alice', 'interactive'),
+                           ('bob', 'interactive'), ('carol', 'cover_letter')]:
+        threads.append(_call_in_thread(scheduler, user, priority, order, hold=0.01))
+        time.sleep(0.01)
+    for thread in [blocker] + threads:
+        thread.join()
+    assert order == [('blocker', 'interactive'), ('alice', 'interactive'), ('bob', 'interactive'),
+                     ('alice', 'interactive'), ('carol', 'cover_letter'), ('alice', 'batch')]
+
+
+def test_sheds_load_with_retry_after():
+    scheduler = Scheduler(requests_per_minute=60, burst=1, max_queue_depth=4, max_queued_per_user=2,
+                          queue_timeout=0.2)
+    order = []
+    threads = []
+    for user in ['a', 'a', 'a', 'a', 'b']:
+        threads.append(_call_in_thread(scheduler, user, 'interactive', order, hold=0))
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    # One call used the burst token; 'a' may only queue two more, the rest waited too long
+    assert order.count(('a', 'shed')) == 3
+    assert scheduler.counters['shed'] >= 1
+    assert scheduler.counters['timeouts'] >= 1
+
+    with scheduler.request_class('c', 'batch'):
+        scheduler._queued = scheduler.max_queue_depth
+        with pytest.raises(OverloadedError) as excinfo:
+            with scheduler.admit():
+                pass
+        scheduler._queued = 0
+    assert excinfo.value.status == 429
+    assert excinfo.value.retry_after >= 1
+
+
+def test_shed_analysis_returns_429(client, mocker):
+    import io
+    from app.scheduler import scheduler
+    mocker.patch('app.routes.get_text_from_file', return_value="Shed resume text.")
+    mocker.patch.object(scheduler, '_enqueue', side_effect=OverloadedError('busy', retry_after=7))
+    data = {'resume': (io.BytesIO(b"%PDF-1.4 fake file content"), 'test.pdf'), 'job_description': 'A shed JD.'}
+    response = client.post('/api/analyze', data=data, content_type='multipart/form-data')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '7'
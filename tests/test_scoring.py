@@ -0,0 +1,34 @@
+import time
+from app.scoring import tokenize, score_resume
+
+JD = """Senior Data Engineer
+We are looking for a data engineer with strong Python and SQL skills.
+Experience with Apache Spark, Airflow and AWS is required.
+Knowledge of Kubernetes and CI/CD pipelines is a plus."""
+
+RESUME = """Jane Doe
+Data Engineer at Acme
+Built ETL pipelines in Python and SQL on AWS using Airflow."""
+
+
+def test_tokenize_normalizes_skills():
+    tokens = tokenize("APIs, Kubernetes, pipelines; Node.js, C++, C# and K8s")
+    assert tokens == ['api', 'kubernetes', 'pipeline', 'node.js', 'c++', 'c#', 'kubernetes']
+
+
+def test_score_resume_reports_missing_keywords():
+    result = score_resume(RESUME, JD)
+    assert 0 < result['match_score'] < 100
+    assert 'spark' in result['missing_keywords']
+    assert 'kubernetes' in result['missing_keywords']
+    assert 'python' in result['matched_keywords']
+    assert 'python' not in result['missing_keywords']
+
+
+def test_score_resume_is_deterministic_and_fast():
+    start = time.perf_counter()
+    first = score_resume(RESUME, JD)
+    assert time.perf_counter() - start < 0.5
+    assert score_resume(RESUME, JD) == first
+    assert score_resume(JD, JD)['match_score'] == 100
+    assert score_resume("", JD) == {'match_score': 0, 'missing_keywords': [], 'matched_keywords': []}
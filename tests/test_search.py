@@ -0,0 +1,110 @@
+from sqlalchemy import text
+from app import db
+from app.models import User, Resume
+from app.services import save_analysis
+from app.search import search_analyses, rebuild_search_index, build_match_query
+
+DATA_ENGINEER = {
+    "analysis_results": {"match_score": 64, "missing_keywords": ["airflow", "spark"]},
+    "structured_resume": {"full_name": "Search User", "skills": ["Python", "dbt"]}
+}
+FRONTEND = {
+    "analysis_results": {"match_score": 82, "missing_keywords": ["typescript"]},
+    "structured_resume": {"full_name": "Search User", "skills": ["Python", "dbt"]}
+}
+
+
+def _user(username):
+    user = User(username=username, email=f'{username}@example.com')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_search_ranks_matches_and_is_scoped_to_the_user(app):
+    with app.app_context():
+        user, other = _user('searcher'), _user('other-searcher')
+        save_analysis(user.id, 'jane_cv.pdf', "Jane's resume", "Senior Data Engineer\nBuild pipelines with <Spark>.",
+                      DATA_ENGINEER)
+        save_analysis(user.id, 'jane_cv.pdf', "Jane's resume", "Frontend Developer\nReact and CSS.", FRONTEND)
+        save_analysis(other.id, 'other.pdf', "Other resume", "Data Engineer\nWarehousing.", DATA_ENGINEER)
+        db.session.commit()
+
+        results, has_more = search_analyses(user.id, 'data engineer')
+        assert [r['jd_title'] for r in results] == ['Senior Data Engineer']
+        assert has_more is False
+        assert '<mark>Data</mark>' in results[0]['snippet']
+        assert '&lt;Spark&gt;' in search_analyses(user.id, 'pipelines')[0][0]['snippet']
+
+        # Missing keywords, resume skills and filenames are searchable too; the last term is a prefix
+        assert search_analyses(user.id, 'airflow')[0][0]['match_score'] == 64
+        assert len(search_analyses(user.id, 'dbt')[0]) == 2
+        assert len(search_analyses(user.id, 'jane')[0]) == 2
+        assert search_analyses(user.id, 'typescr')[0][0]['jd_title'] == 'Frontend Developer'
+
+        # Paging, and rows leave the index with their analyses
+        page, has_more = search_analyses(user.id, 'python', per_page=1)
+        assert len(page) == 1 and has_more is True
+        # Only the newest match is ranked when the window is a single row
+        assert [r['jd_title'] for r in search_analyses(user.id, 'python', rank_window=1)[0]] == ['Frontend Developer']
+        resume = Resume.query.filter_by(user_id=user.id).first()
+        db.session.delete(resume)
+        db.session.commit()
+        assert search_analyses(user.id, 'python') == ([], False)
+        assert len(search_analyses(other.id, 'data engineer')[0]) == 1
+
+        db.session.delete(user)
+        db.session.delete(other)
+        db.session.commit()
+
+
+def test_search_endpoint_and_rebuild(app):
+    with app.app_context():
+        user = _user('api-searcher')
+        save_analysis(user.id, 'cv.docx', "A resume", "Machine Learning Engineer\nPyTorch.", DATA_ENGINEER)
+        db.session.commit()
+        assert rebuild_search_index() >= 1
+
+        client = app.test_client()
+        client.post('/login', data={'username': 'api-searcher', 'password': 'secret'})
+        data = client.get('/api/search?q=pytorch').get_json()
+        assert data['results'][0]['jd_title'] == 'Machine Learning Engineer'
+        assert data['results'][0]['url'].endswith(f"/analysis/{data['results'][0]['analysis_id']}")
+        page = client.get('/dashboard?q=pytorch')
+        assert b'<mark>PyTorch</mark>' in page.data
+
+        db.session.delete(user)
+        db.session.commit()
+
+
+def test_match_query_quotes_user_input():
+    assert build_match_query(7, 'the "data" OR engineer*') == 'owner:u7 AND ("data" OR "engineer"*)'
+    assert build_match_query(7, 'the and of') is None
+
+
+def test_search_falls_back_without_the_index(app):
+    """A database without the FTS table (e.g. created by migrations) still searches titles and filenames."""
+    with app.app_context():
+        user = _user('fallback-searcher')
+        save_analysis(user.id, 'cv_100%.pdf', "Resume", "Data Engineer\nPipelines.", DATA_ENGINEER)
+        save_analysis(user.id, 'cv_v2.pdf', "Resume v2", "Backend Developer\nAPIs.", FRONTEND)
+        db.session.commit()
+        db.session.execute(text('DROP TABLE analysis_fts'))
+        db.session.commit()
+        try:
+            # Saving keeps working while the index is missing
+            save_analysis(user.id, 'cv_v3.pdf', "Resume v3", "Data Analyst\nSQL.", FRONTEND)
+            db.session.commit()
+
+            assert [r['jd_title'] for r in search_analyses(user.id, 'data')[0]] == ['Data Analyst', 'Data Engineer']
+            # LIKE wildcards in the query match literally
+            assert [r['filename'] for r in search_analyses(user.id, '100%')[0]] == ['cv_100%.pdf']
+            assert search_analyses(user.id, 'cv%v')[0] == []
+            assert [r['filename'] for r in search_analyses(user.id, '_v2')[0]] == ['cv_v2.pdf']
+        finally:
+            rebuild_search_index()
+        assert len(search_analyses(user.id, 'pipelines')[0]) == 1
+
+        db.session.delete(user)
+        db.session.commit()
@@ -0,0 +1,111 @@
+import json
+from app import db
+from app.models import User, Resume
+from app.services import save_analysis, get_stored_structure, get_dashboard_page, backfill_analysis_columns
+from app import nlp_processor
+from app.cache import TieredCache
+from app.llm import llm_client, StubProvider
+
+FULL_DATA = {
+    "analysis_results": {"match_score": 75},
+    "structured_resume": {"full_name": "Dedup User", "skills": ["Python"]}
+}
+
+
+def test_save_analysis_deduplicates_resumes(app):
+    """Analyzing the same resume twice should add analyses to one Resume row."""
+    with app.app_context():
+        user = User(username='dedup', email='dedup@example.com')
+        db.session.add(user)
+        db.session.commit()
+
+        save_analysis(user.id, 'cv.pdf', "My resume  text", "First JD", FULL_DATA)
+        db.session.commit()
+        save_analysis(user.id, 'cv-copy.pdf', "My resume text", "Second JD", FULL_DATA)
+        db.session.commit()
+
+        resumes = Resume.query.filter_by(user_id=user.id).all()
+        assert len(resumes) == 1
+        assert resumes[0].analyses.count() == 2
+        assert get_stored_structure(user.id, "My resume text") == FULL_DATA["structured_resume"]
+        assert get_stored_structure(None, "My resume text") is None
+
+        db.session.delete(user)
+        db.session.commit()
+
+
+def test_known_resume_only_sends_analysis_prompt(mocker):
+    """Once a resume has been parsed, later JDs only use the lighter analysis prompt."""
+    mocker.patch.object(nlp_processor, 'ai_cache', TieredCache('ai'))
+    prompts = []
+    responses = iter(['{"analysis_results": {"match_score": 60}, "structured_resume": {"full_name": "A"}}',
+                      '{"match_score": 90}'])
+    mocker.patch.object(llm_client, 'provider', StubProvider(response=lambda p: prompts.append(p) or next(responses)))
+
+    nlp_processor.get_combined_ai_data("resume", "first JD")
+    assert "structured_resume" in prompts[0]
+
+    result = nlp_processor.get_combined_ai_data("resume", "second JD")
+    assert "structured_resume" not in prompts[1]
+    assert result == {"analysis_results": {"match_score": 90}, "structured_resume": {"full_name": "A"}}
+
+
+def test_dashboard_pages_with_keyset_cursor(app, mocker):
+    """The dashboard lists resumes a page at a time without parsing any analysis JSON."""
+    with app.app_context():
+        user = User(username='pager', email='pager@example.com')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        for i in range(3):
+            save_analysis(user.id, f'cv{i}.pdf', f"Resume number {i}", f"Data Engineer {i}\nDetails", FULL_DATA)
+            db.session.commit()
+
+        loads = mocker.spy(json, 'loads')
+        resumes, analyses, cursor = get_dashboard_page(user.id, per_page=2)
+        assert [r.original_filename for r in resumes] == ['cv2.pdf', 'cv1.pdf']
+        assert analyses[resumes[0].id][0].match_score == 75
+        assert analyses[resumes[0].id][0].jd_title == 'Data Engineer 2'
+
+        resumes, analyses, cursor = get_dashboard_page(user.id, cursor, per_page=2)
+        assert [r.original_filename for r in resumes] == ['cv0.pdf']
+        assert cursor is None
+        assert loads.call_count == 0
+
+        # Pages are bounded by analyses, not resumes, and grouped by resume
+        for i in range(3, 6):
+            save_analysis(user.id, 'cv0.pdf', "Resume number 0", f"Data Engineer {i}\nDetails", FULL_DATA)
+            db.session.commit()
+        resumes, analyses, cursor = get_dashboard_page(user.id, per_page=4)
+        assert [r.original_filename for r in resumes] == ['cv0.pdf', 'cv2.pdf']
+        assert [a.jd_title for a in analyses[resumes[0].id]] == ['Data Engineer 5', 'Data Engineer 4', 'Data Engineer 3']
+        resumes, analyses, cursor = get_dashboard_page(user.id, cursor, per_page=4)
+        assert [r.original_filename for r in resumes] == ['cv1.pdf', 'cv0.pdf']
+        assert cursor is None
+
+        client = app.test_client()
+        client.post('/login', data={'username': 'pager', 'password': 'secret'})
+        response = client.get('/dashboard')
+        assert response.status_code == 200
+        assert b'Data Engineer 2' in response.data
+        assert b'75%' in response.data
+
+        db.session.delete(user)
+        db.session.commit()
+
+
+def test_backfill_analysis_columns(app):
+    with app.app_context():
+        user = User(username='legacy', email='legacy@example.com')
+        db.session.add(user)
+        db.session.commit()
+        analysis = save_analysis(user.id, 'old.pdf', "Old resume", "  Backend Developer  \n...", FULL_DATA)
+        analysis.match_score = analysis.jd_title = None
+        db.session.commit()
+
+        assert backfill_analysis_columns(batch_size=1) >= 1
+        assert analysis.match_score == 75
+        assert analysis.jd_title == 'Backend Developer'
+
+        db.session.delete(user)
+        db.session.commit()
@@ -0,0 +1,92 @@
+from flask import Flask, session
+from app.sessions import ServerSideSessionInterface, SQLiteSessionBackend, MemorySessionBackend
+
+
+def _make_app(backend):
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test-secret'
+    app.session_interface = ServerSideSessionInterface(backend)
+
+    @app.route('/set')
+    def set_value():
+        session['original_jd_text'] = 'x' * 10000
+        return 'ok'
+
+    @app.route('/get')
+    def get_value():
+        return str(len(session.get('original_jd_text', '')))
+
+    @app.route('/clear')
+    def clear():
+        session.clear()
+        return 'ok'
+
+    return app
+
+
+def test_cookie_only_carries_the_session_id(tmp_path):
+    """Large session values must stay on the server, not in the cookie."""
+    app = _make_app(SQLiteSessionBackend(str(tmp_path / 'sessions.db')))
+    client = app.test_client()
+
+    response = client.get('/set')
+    cookie = response.headers['Set-Cookie']
+    assert len(cookie) < 200
+    assert client.get('/get').data == b'10000'
+
+    # Unmodified requests don't rewrite the cookie
+    assert 'Set-Cookie' not in client.get('/get').headers
+
+
+def test_sqlite_backend_is_consistent_across_processes(tmp_path):
+    """Two workers sharing the database never serve each other's stale session."""
+    path = str(tmp_path / 'sessions.db')
+    first, second = _make_app(SQLiteSessionBackend(path)), _make_app(SQLiteSessionBackend(path))
+    client = first.test_client()
+    client.get('/set')
+    cookie = client.get_cookie('session').value
+
+    other = second.test_client()
+    other.set_cookie('session', cookie)
+    assert other.get('/get').data == b'10000'
+    client.get('/clear')
+    assert other.get('/get').data == b'0'
+
+
+def test_regenerate_moves_the_session_to_a_new_id():
+    backend = MemorySessionBackend()
+    app = _make_app(backend)
+
+    @app.route('/rotate')
+    def rotate():
+        session.regenerate()
+        return 'ok'
+
+    client = app.test_client()
+    client.get('/set')
+    old_cookie = client.get_cookie('session').value
+    client.get('/rotate')
+    assert client.get_cookie('session').value != old_cookie
+    assert client.get('/get').data == b'10000'
+    assert len(backend.memory) == 1
+
+    # The old id no longer loads anything
+    client.set_cookie('session', old_cookie)
+    assert client.get('/get').data == b'0'
+
+
+def test_tampered_or_cleared_sessions_start_empty():
+    backend = MemorySessionBackend()
+    app = _make_app(backend)
+    client = app.test_client()
+    client.get('/set')
+
+    client.set_cookie('session', 'forged-session-id')
+    assert client.get('/get').data == b'0'
+
+    client = app.test_client()
+    client.get('/set')
+    assert len(backend.memory) == 2
+    client.get('/clear')
+    assert client.get('/get').data == b'0'
+    assert len(backend.memory) == 1
@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+from app.warmup import warmup
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def test_create_app_defers_heavy_imports(tmp_path):
+    """Building the app must not import the model SDK or the document libraries."""
+    probe = ("import json, sys; from app import create_app; create_app(); "
+             "print(json.dumps([m for m in ('google.generativeai', 'pdfplumber', 'docx', 'html2docx') "
+             "if m in sys.modules]))")
+    env = dict(os.environ, PYTHONPATH=ROOT, LLM_PROVIDER='stub', DATABASE_URL=f'sqlite:///{tmp_path}/app.db',
+               CACHE_DATABASE_PATH=str(tmp_path / 'cache.db'))
+    output = subprocess.run([sys.executable, '-c', probe], env=env, cwd=tmp_path,
+                            capture_output=True, text=True, check=True).stdout
+    assert json.loads(output.strip().splitlines()[-1]) == []
+
+
+def test_warmup_compiles_templates(app):
+    timings = warmup(app)
+    assert 'templates' in timings
+    assert 'html2docx' in timings
+    assert app.jinja_env.cache
+
+
+def test_warmup_leaves_no_connections_to_fork(app):
+    """After a preloading warmup, the master holds no database or cache connection."""
+    from sqlalchemy import text
+    from app import db
+    from app.cache import ai_cache
+    with app.app_context():
+        db.session.execute(text('SELECT 1'))
+        db.session.remove()
+        ai_cache.set('warmup-probe', {'ok': True})
+    assert ai_cache.disk._conn is not None
+
+    warmup(app)
+    assert ai_cache.disk._conn is None
+    assert app.session_interface.backend.disk._conn is None
+    with app.app_context():
+        assert db.engine.pool.checkedin() == 0
+    # Connections reopen on demand
+    ai_cache.memory.clear()
+    assert ai_cache.get('warmup-probe') == {'ok': True}
+
+
+def test_sqlite_cache_reopens_its_connection_after_a_fork(tmp_path, mocker):
+    from app.cache import SQLiteCache
+    cache = SQLiteCache(str(tmp_path / 'cache.db'))
+    cache.set('key', b'value')
+    parent_conn = cache._conn
+
+    mocker.patch('app.cache.os.getpid', return_value=os.getpid() + 1)
+    assert cache.get('key') == b'value'
+    assert cache._conn is not parent_conn
@@ -0,0 +1,76 @@
+import hashlib
+import io
+import os
+import pytest
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from app.uploads import UploadStream
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), 'test_files', 'sample.pdf')
+
+
+def test_upload_stream_checks_type_and_size_as_data_arrives():
+    """A wrong signature or an oversized file is refused on the chunk that gives it away."""
+    with pytest.raises(BadRequest):
+        UploadStream('pdf', 1024, 512).write(b'PK\x03\x04 a zip, not a pdf')
+
+    # The signature may be split across chunks
+    stream = UploadStream('docx', 1024, 512)
+    stream.write(b'P')
+    stream.write(b'K\x03\x04' + b'x' * 1000)
+    with pytest.raises(RequestEntityTooLarge):
+        stream.write(b'x' * 100)
+
+
+def test_upload_stream_spools_and_hashes_in_one_pass():
+    data = b'%PDF-1.4\n' + os.urandom(4096)
+    stream = UploadStream('pdf', 1024 * 1024, 1024)
+    for start in range(0, len(data), 1000):
+        stream.write(data[start:start + 1000])
+    stream.seek(0)
+
+    assert stream.path is not None and os.path.getsize(stream.path) == len(data)
+    assert stream.read() == data
+    assert stream.sha256 == hashlib.sha256(data).hexdigest()
+    stream.close()
+    assert not os.path.exists(stream.path)
+
+
+def test_analyze_rejects_bad_uploads_before_parsing(app, client, mocker):
+    parse = mocker.patch('app.utils.parse_docx')
+    app.config['UPLOAD_MAX_BYTES'] = 64 * 1024
+    try:
+        mismatched = client.post('/api/analyze', data={'resume': (io.BytesIO(b'%PDF-1.4 renamed'), 'cv.docx'),
+                                                       'job_description': 'A JD.'})
+        oversized = client.post('/api/analyze', data={'resume': (io.BytesIO(b'PK\x03\x04' + b'x' * 65536), 'cv.docx'),
+                                                      'job_description': 'A JD.'})
+        wrong_type = client.post('/api/analyze/batch', data={'resume': (io.BytesIO(b'GIF89a'), 'cv.gif'),
+                                                             'job_description': 'A JD.'})
+    finally:
+        app.config['UPLOAD_MAX_BYTES'] = 10 * 1024 * 1024
+
+    assert mismatched.status_code == 400
+    assert 'not a valid .docx' in mismatched.get_json()['error']
+    assert oversized.status_code == 413
+    assert wrong_type.status_code == 400
+    assert 'Invalid file type' in wrong_type.get_json()['error']
+    parse.assert_not_called()
+
+
+def test_spooled_pdf_is_extracted_from_its_temp_file(app, client, mocker):
+    """A PDF upload above the spool size reaches the extractor as a path, already hashed."""
+    extract = mocker.patch('app.utils.pdf_pool.extract', return_value="Spooled resume text.")
+    hash_stream = mocker.patch('app.utils.hash_stream')
+    mocker.patch('app.routes.get_fast_analysis', return_value={'analysis_results': {}, 'structured_resume': {}})
+    with open(SAMPLE_PDF, 'rb') as f:
+        data = f.read()
+    app.config['UPLOAD_SPOOL_BYTES'] = 64
+    try:
+        response = client.post('/api/analyze', data={'resume': (io.BytesIO(data), 'spooled.pdf'),
+                                                      'job_description': 'A JD.', 'mode': 'fast'})
+    finally:
+        app.config['UPLOAD_SPOOL_BYTES'] = 512 * 1024
+
+    assert response.status_code == 200
+    path = extract.call_args.args[0]
+    assert isinstance(path, str) and path.endswith('.pdf')
+    hash_stream.assert_not_called()
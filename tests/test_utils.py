@@ -53,3 +53,58 @@ def test_parse_pdf():
     # Assert that the text we expect is in the result
     assert "Hello World PDF" in result_text
 
+
+
+def test_parse_docx_includes_tables_headers_and_footers():
+    """
+    Tests that the streaming DOCX extractor picks up text that python-docx's
+    paragraph list misses: headers, tables and footers, in document order.
+    """
+    import io
+    import docx
+
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = 'Jane Doe | jane@example.com'
+    document.add_paragraph('Summary paragraph')
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = 'Skills'
+    table.cell(0, 1).text = 'Python, SQL'
+    document.add_paragraph('After table')
+    document.sections[0].footer.paragraphs[0].text = 'Page footer'
+    file_stream = io.BytesIO()
+    document.save(file_stream)
+    file_stream.seek(0)
+
+    lines = parse_docx(file_stream).splitlines()
+
+    assert lines == ['Jane Doe | jane@example.com', 'Summary paragraph', 'Skills\tPython, SQL',
+                     'After table', 'Page footer']
+
+
+def test_parse_docx_rejects_non_docx():
+    """Tests that invalid files still return an empty string after the python-docx fallback."""
+    import io
+    assert parse_docx(io.BytesIO(b"not a zip file")) == ""
+
+
+def test_get_text_from_file_caches_by_content(mocker):
+    """A re-upload of the same bytes, under any name, should be served without parsing."""
+    import io
+    from werkzeug.datastructures import FileStorage
+    from app import utils
+    from app.cache import TieredCache
+
+    mocker.patch.object(utils, 'text_cache', TieredCache('text'))
+    parse = mocker.spy(utils, 'parse_docx')
+
+    with open(os.path.join(TEST_FILES_DIR, 'sample.docx'), 'rb') as f:
+        data = f.read()
+    first = utils.get_text_from_file(FileStorage(io.BytesIO(data), filename='resume.docx'))
+    second = utils.get_text_from_file(FileStorage(io.BytesIO(data), filename='copy.docx'))
+
+    assert first == second
+    assert "Hello World DOCX" in second
+    assert parse.call_count == 1
+    stats = utils.text_cache.stats()
+    assert stats['memory_hits'] == 1
+    assert stats['parse_seconds_saved'] > 0